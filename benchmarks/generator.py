@@ -0,0 +1,85 @@
+import os
+import time
+import random
+
+from config import FILE_CATEGORIES, YEAR_RANGE
+
+# Extensions the rules don't know, so the fallback rule gets its share
+
+UNKNOWN_EXTENSIONS = [".bin", ".dat", ""]
+
+
+def extension_pool(unknown_share=0.1):
+    """
+    
+    (extension, weight) pairs: every extension from FILE_CATEGORIES gets the same weight,
+    unknown ones share 'unknown_share' of the total.
+    
+    """
+    
+    known = [ext for extensions in FILE_CATEGORIES.values() for ext in extensions]
+    known_weight = (1 - unknown_share) / len(known)
+    unknown_weight = unknown_share / len(UNKNOWN_EXTENSIONS)
+    
+    return [(ext, known_weight) for ext in known] + [(ext, unknown_weight) for ext in UNKNOWN_EXTENSIONS]
+
+
+def generate_tree(root, seed=0, files=10000, depth=0, fanout=4, median_size=4096, max_size=4 * 1024 * 1024,
+                  years=YEAR_RANGE, unknown_share=0.1):
+    """
+    
+    Build the same synthetic tree for the same arguments.
+    
+    Parameters:
+        root (str): Existing empty folder to fill
+        seed (int): Random seed, same seed -> same names, sizes and mtimes
+        files (int): Number of files
+        depth (int): Sub folder levels (0 puts everything at the top level)
+        fanout (int): Sub folders per folder
+        median_size (int): Median file size in bytes (sizes are log-normal)
+        max_size (int): Largest file allowed
+        years (int): mtimes are spread over this many years back from now
+        unknown_share (float): Share of files with extensions no rule knows
+    
+    Return:
+        dict describing what was generated (file count, total bytes, folders)
+    
+    """
+    
+    rng = random.Random(seed)
+    
+    folders = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"dir_{d}_{i}") for parent in level for i in range(fanout)]
+        folders.extend(level)
+    for folder in folders[1:]:
+        os.makedirs(folder, exist_ok=True)
+        
+    extensions, weights = zip(*extension_pool(unknown_share))
+    now = time.time()
+    spread = years * 365 * 24 * 3600
+    total_bytes = 0
+    
+    # One shared buffer, files only differ in length
+    
+    payload = bytes(rng.getrandbits(8) for _ in range(64 * 1024))
+    
+    for i in range(files):
+        folder = rng.choice(folders)
+        extension = rng.choices(extensions, weights)[0]
+        size = min(max_size, int(rng.lognormvariate(0, 1.5) * median_size))
+        path = os.path.join(folder, f"file_{i}{extension}")
+        
+        with open(path, "wb") as f:
+            remaining = size
+            while remaining > 0:
+                chunk = payload[:remaining]
+                f.write(chunk)
+                remaining -= len(chunk)
+                
+        mtime = now - rng.random() * spread
+        os.utime(path, (mtime, mtime))
+        total_bytes += size
+        
+    return {"files": files, "bytes": total_bytes, "folders": len(folders), "seed": seed}
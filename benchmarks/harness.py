@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+# Allow running as 'python benchmarks/harness.py' from the repo root
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generator import generate_tree
+from services.file_organizer import FileOrganizer
+from services.rules_engine import RulesEngine
+from services.executor import execute_plan
+from services.report_generator import generate_CSV_report
+
+PHASES = ("collect", "rules", "moves", "report")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class PhaseTimer:
+    """
+    Wall and CPU time of one phase.
+    """
+
+    def __init__(self, results, name):
+        self.results = results
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.results.setdefault(self.name, []).append({
+            "wall": time.perf_counter() - self.wall,
+            "cpu": time.process_time() - self.cpu,
+        })
+        return False
+
+
+def tmpfs_base():
+    """
+    Somewhere in RAM so the numbers measure our code, not the disk.
+    """
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    print("warning: /dev/shm not available, timings include real disk I/O", file=sys.stderr)
+    return None
+
+
+def run_once(args, results):
+    root = tempfile.mkdtemp(prefix="organizer_bench_", dir=tmpfs_base())
+
+    try:
+        generate_tree(root, seed=args.seed, files=args.files, depth=args.depth,
+                      median_size=args.median_size, years=args.years)
+
+        organizer = FileOrganizer(root, recursive=args.depth > 0, move_workers=args.workers)
+
+        with PhaseTimer(results, "collect"):
+            files = list(organizer._walk_files()) if organizer.recursive else organizer._collect_files()
+
+        with PhaseTimer(results, "rules"):
+            engine = RulesEngine()
+            organizer._setup_rules(engine)
+            plan = engine.plan(files)
+
+        records = []
+        with PhaseTimer(results, "moves"):
+            execute_plan(plan, records, workers=args.workers)
+
+        with PhaseTimer(results, "report"):
+            generate_CSV_report(records, csv_filename=os.path.join(root, "report.csv"))
+    finally:
+        shutil.rmtree(root)
+
+
+def summarize(args, results):
+    phases = {}
+    for name in PHASES:
+        runs = results[name]
+        wall = statistics.median(run["wall"] for run in runs)
+        phases[name] = {
+            "wall_s": wall,
+            "cpu_s": statistics.median(run["cpu"] for run in runs),
+            "min_wall_s": min(run["wall"] for run in runs),
+            "us_per_file": wall / args.files * 1e6,
+        }
+
+    return {
+        "params": {
+            "files": args.files, "depth": args.depth, "seed": args.seed, "median_size": args.median_size,
+            "years": args.years, "workers": args.workers, "repeat": args.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "phases": phases,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Ratio of current / baseline median wall time per phase.
+
+    Return:
+        A tuple: (dict of phase -> ratio, list of phases slower than 1 + threshold)
+    """
+
+    if baseline["params"] != current["params"]:
+        print("warning: baseline was recorded with different parameters", file=sys.stderr)
+
+    ratios = {}
+    regressions = []
+    for name in PHASES:
+        before = baseline["phases"].get(name, {}).get("wall_s")
+        if not before:
+            continue
+        ratios[name] = current["phases"][name]["wall_s"] / before
+        if ratios[name] > 1 + threshold:
+            regressions.append(name)
+
+    return ratios, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each phase of an organizer run on a synthetic tree.")
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=0, help="Sub folder levels (> 0 uses the recursive walk)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--median-size", type=int, default=4096)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a phase counts as a regression")
+    parser.add_argument("--output", help="Also write the result JSON here")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for _ in range(args.repeat):
+        run_once(args, results)
+
+    current = summarize(args, results)
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        ratios, regressions = compare(current, baseline, args.threshold)
+        current["baseline_ratio"] = ratios
+        current["regressions"] = regressions
+
+    text = json.dumps(current, indent=2)
+    print(text)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+
+    return 1 if current.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
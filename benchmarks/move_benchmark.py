@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+# Allow running as 'python benchmarks/move_benchmark.py' from the repo root
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.file_organizer import FileOrganizer
+from services.rules_engine import RulesEngine
+from services.executor import execute_plan
+
+
+def legacy_execute(plan):
+    """
+    The per-file executor before grouping: makedirs + shutil.move on full paths.
+    """
+    for move in plan:
+        os.makedirs(os.path.dirname(move.destination), exist_ok=True)
+        shutil.move(move.source, move.destination)
+
+
+class PathLookupCounter:
+    """
+    Adds up how many path components the kernel has to resolve.
+
+    A full path argument costs one lookup per component, a name relative to an open
+    directory fd costs one. os.makedirs, os.path.exists and shutil.move all go
+    through the wrapped functions.
+    """
+
+    WRAPPED = ("stat", "lstat", "mkdir", "rename", "open")
+
+    def __init__(self):
+        self.lookups = 0
+        self.calls = 0
+
+    def _cost(self, path, relative):
+        if relative:
+            return 1
+        return len([part for part in os.path.abspath(path).split(os.sep) if part])
+
+    def _wrap(self, name, original):
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            counter.calls += 1
+            if name == "rename":
+                counter.lookups += counter._cost(args[0], kwargs.get("src_dir_fd") is not None)
+                counter.lookups += counter._cost(args[1], kwargs.get("dst_dir_fd") is not None)
+            elif args and isinstance(args[0], (str, bytes)):
+                counter.lookups += counter._cost(args[0], kwargs.get("dir_fd") is not None)
+            return original(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        self._originals = {name: getattr(os, name) for name in self.WRAPPED}
+        for name, original in self._originals.items():
+            setattr(os, name, self._wrap(name, original))
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+        return False
+
+
+def make_files(directory, count):
+    extensions = [".pdf", ".jpg", ".mp3", ".mp4", ".zip", ".csv", ".bin"]
+    for i in range(count):
+        with open(os.path.join(directory, f"file_{i}{extensions[i % len(extensions)]}"), "wb") as f:
+            f.write(b"x" * (i % 256))
+
+
+def run(label, execute, base, count):
+    directory = tempfile.mkdtemp(prefix="move_bench_", dir=base)
+
+    try:
+        make_files(directory, count)
+        organizer = FileOrganizer(directory)
+        engine = RulesEngine()
+        organizer._setup_rules(engine)
+        plan = engine.plan(organizer._collect_files())
+
+        with PathLookupCounter() as counter:
+            start = time.perf_counter()
+            execute(plan)
+            elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    return label, counter.calls / count, counter.lookups / count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the per-file and destination-grouped movers.")
+    parser.add_argument("--files", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+    results = [
+        run("makedirs+shutil.move", legacy_execute, base, args.files),
+        run("grouped dir_fd rename", execute_plan, base, args.files),
+    ]
+
+    print(f"{'mover':<24}{'calls/file':>12}{'lookups/file':>14}{'seconds':>10}")
+    for label, calls, lookups, seconds in results:
+        print(f"{label:<24}{calls:>12.2f}{lookups:>14.2f}{seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import shutil
+import getpass
+import datetime
+import argparse
+import tempfile
+import tracemalloc
+
+# Allow running as 'python benchmarks/scan_benchmark.py' from the repo root
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.file_organizer import FileOrganizer
+
+
+class LegacyFileItem:
+    """
+    Copy of the FileItem layout before the scandir collector (dict based, eager datetimes).
+    Kept here only so the benchmark has something to compare against.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.extension = os.path.splitext(self.name)[1].lower()
+        self.size = os.path.getsize(path)
+        self.created = datetime.datetime.fromtimestamp(os.path.getctime(path))
+        self.modified = datetime.datetime.fromtimestamp(os.path.getmtime(path))
+        self.owner = getpass.getuser()
+
+
+def legacy_collect(directory):
+    """
+    The old listdir + isfile + three getters collector.
+    """
+    files = []
+    for filename in os.listdir(directory):
+        file_path = os.path.join(directory, filename)
+        if os.path.isfile(file_path):
+            files.append(LegacyFileItem(file_path))
+    return files
+
+
+class SyscallCounter:
+    """
+    Counts stat-family and directory listing calls made from Python.
+
+    os.path.isfile/getsize/getctime/getmtime all go through os.stat, and DirEntry
+    caches its stat, so wrapping os.stat and the scandir entries is enough to see
+    how many times the kernel is asked about each file.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __enter__(self):
+        self._stat = os.stat
+        self._listdir = os.listdir
+        self._scandir = os.scandir
+        counter = self
+
+        def stat(*args, **kwargs):
+            counter.calls += 1
+            return counter._stat(*args, **kwargs)
+
+        def listdir(*args, **kwargs):
+            counter.calls += 1
+            return counter._listdir(*args, **kwargs)
+
+        def scandir(*args, **kwargs):
+            counter.calls += 1
+            return _CountingScandir(counter._scandir(*args, **kwargs), counter)
+
+        os.stat = stat
+        os.listdir = listdir
+        os.scandir = scandir
+        return self
+
+    def __exit__(self, *exc):
+        os.stat = self._stat
+        os.listdir = self._listdir
+        os.scandir = self._scandir
+        return False
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counter):
+        self._iterator = iterator
+        self._counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._iterator.close()
+        return False
+
+    def __iter__(self):
+        for entry in self._iterator:
+            yield _CountingEntry(entry, self._counter)
+
+
+class _CountingEntry:
+    def __init__(self, entry, counter):
+        self._entry = entry
+        self._counter = counter
+        self._stat_done = False
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_file(self, *, follow_symlinks=True):
+        # The dirent type is free, only symlinks need a stat to resolve
+        if follow_symlinks and self._entry.is_symlink():
+            self._count_stat()
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_dir(self, *, follow_symlinks=True):
+        if follow_symlinks and self._entry.is_symlink():
+            self._count_stat()
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def inode(self):
+        return self._entry.inode()
+
+    def stat(self, *, follow_symlinks=True):
+        self._count_stat()
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def _count_stat(self):
+        if not self._stat_done:
+            self._stat_done = True
+            self._counter.calls += 1
+
+
+def make_tree(directory, count):
+    """
+    Fill a directory with 'count' small files and a few sub folders.
+    """
+    extensions = [".pdf", ".jpg", ".mp3", ".mp4", ".zip", ".csv", ".bin"]
+    for i in range(count):
+        with open(os.path.join(directory, f"file_{i}{extensions[i % len(extensions)]}"), "wb") as f:
+            f.write(b"x" * (i % 512))
+    for i in range(10):
+        os.mkdir(os.path.join(directory, f"folder_{i}"))
+
+
+def measure(label, collect, directory, count):
+    with SyscallCounter() as counter:
+        collect(directory)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    files = collect(directory)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "collector": label,
+        "files": len(files),
+        "syscalls_per_file": counter.calls / count,
+        "seconds": elapsed,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the legacy and scandir file collectors.")
+    parser.add_argument("--files", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    directory = tempfile.mkdtemp(prefix="scan_bench_", dir=base)
+
+    try:
+        make_tree(directory, args.files)
+        organizer = FileOrganizer(directory)
+
+        results = [
+            measure("listdir+isfile+getters", legacy_collect, directory, args.files),
+            measure("scandir+from_stat", lambda d: organizer._collect_files(), directory, args.files),
+        ]
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'collector':<26}{'files':>8}{'calls/file':>12}{'seconds':>10}{'peak KiB':>12}")
+    for r in results:
+        print(f"{r['collector']:<26}{r['files']:>8}{r['syscalls_per_file']:>12.2f}"
+              f"{r['seconds']:>10.3f}{r['peak_kib']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# What each scenario runs under 'python -X importtime' (from the repo root)
+
+SCENARIOS = {
+    "cli_help": ["-m", "file_organizer", "--help"],
+    "cli_parse": ["-c", "import file_organizer; file_organizer.build_parser().parse_args(['plan', '.'])"],
+    "organizer": ["-c", "import services.file_organizer"],
+}
+
+
+def import_times(arguments):
+    """
+    Run one interpreter with -X importtime.
+
+    Return:
+        A tuple: (total import time in ms, set of imported module names)
+    """
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        cwd=REPO, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{completed.stderr}")
+
+    total_us = 0
+    modules = set()
+
+    # Lines look like: "import time:       488 |      61999 |   services.file_batch"
+
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+
+    return total_us / 1000, modules
+
+
+def measure(name, repeat):
+    arguments = SCENARIOS[name]
+
+    # One warm-up run so the numbers don't include the disk cache filling up
+
+    import_times(arguments)
+
+    runs = [import_times(arguments) for _ in range(repeat)]
+    return {
+        "median_ms": statistics.median(total for total, _ in runs),
+        "min_ms": min(total for total, _ in runs),
+        "modules": runs[0][1],
+    }
+
+
+def check(name, result, budget):
+    """
+    Return:
+        List of problems (empty when the scenario is within its budget)
+    """
+
+    problems = []
+
+    if result["median_ms"] > budget["max_ms"]:
+        problems.append(f"{name}: {result['median_ms']:.1f} ms of imports, budget is {budget['max_ms']} ms")
+
+    for module in budget.get("forbidden", []):
+        if module in result["modules"]:
+            problems.append(f"{name}: imports '{module}', which it must not")
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check CLI and organizer import time against a budget.")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="Budget JSON to check against")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save-budget", action="store_true",
+                        help="Write the measured times (plus --headroom) as the new budget")
+    parser.add_argument("--headroom", type=float, default=0.5, help="Extra allowance when saving a budget")
+    args = parser.parse_args(argv)
+
+    budgets = {}
+    if os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budgets = json.load(f)
+
+    problems = []
+    report = {}
+
+    for name in SCENARIOS:
+        result = measure(name, args.repeat)
+        report[name] = {"median_ms": round(result["median_ms"], 1), "min_ms": round(result["min_ms"], 1),
+                        "modules": len(result["modules"])}
+
+        if args.save_budget:
+            budgets.setdefault(name, {})["max_ms"] = round(result["median_ms"] * (1 + args.headroom))
+        elif name in budgets:
+            report[name]["budget_ms"] = budgets[name]["max_ms"]
+            problems.extend(check(name, result, budgets[name]))
+
+    print(json.dumps(report, indent=2))
+
+    if args.save_budget:
+        with open(args.budget, "w") as f:
+            f.write(json.dumps(budgets, indent=2) + "\n")
+
+    for problem in problems:
+        print(f"regression: {problem}", file=sys.stderr)
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
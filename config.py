@@ -43,4 +43,124 @@ EXCLUDED_ITEMS = {
 
 EXCLUDED_EXT = {
     ".exe"
-}
\ No newline at end of file
+}
+
+# Max number of threads reading directories during a recursive scan
+
+SCAN_WORKERS = 8
+
+# Threads used for same-filesystem renames while moving
+
+MOVE_WORKERS = 4
+
+# Max cross-device copies running at once against one source device (keeps spinning disks sane)
+
+COPY_WORKERS_PER_DEVICE = 2
+
+# Buffer size for cross-device copies that can't be done inside the kernel
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Checksum cross-device copies before the source is deleted (costs a read of the copy)
+
+VERIFY_COPIES = False
+
+# Report written to the logs folder: "csv", "jsonl" or "sqlite"
+
+REPORT_FORMAT = "csv"
+
+# Report records are written in batches: whichever comes first, this many records or this many seconds
+
+REPORT_BATCH_SIZE = 1000
+REPORT_FLUSH_INTERVAL = 1.0
+
+# Incremental re-runs: remember what was scanned (in the logs folder) and skip what didn't change
+
+INCREMENTAL_SCAN = False
+SCAN_INDEX_FILENAME = "scan_index.sqlite"
+
+# Watch mode: how often landed files are organized, and how long a file must be quiet first
+
+WATCH_INTERVAL_MS = 500
+WATCH_DEBOUNCE_MS = 200
+
+# Duplicate detection before the rules run; extra copies go to DUPLICATES_FOLDER
+# DUPLICATE_ACTION: "move" keeps the copies, "hardlink" replaces them with links to the kept file
+
+DEDUPE = False
+DUPLICATES_FOLDER = "Duplicates"
+DUPLICATE_ACTION = "move"
+HASH_CACHE_FILENAME = "hash_cache.sqlite"
+
+# Content sniffing: files whose extension no category knows are sorted by their first SNIFF_BYTES bytes
+# Reads run on SNIFF_WORKERS threads, results are cached in the logs folder, SNIFF_READ_BUDGET caps
+# the bytes read per run (None for no limit)
+
+SNIFF_CONTENT = False
+SNIFF_BYTES = 512
+SNIFF_WORKERS = 4
+SNIFF_READ_BUDGET = None
+SNIFF_CACHE_FILENAME = "sniff_cache.sqlite"
+
+# Declarative rules (JSON or TOML) checked before the FILE_CATEGORIES rules, see services/rule_config.py
+# Checked rules are cached in the logs folder until the file changes
+
+RULE_FILE = None
+RULE_CACHE_FILENAME = "rule_cache.json"
+
+# What happens when a file's name is already taken in its destination folder (see services/destination_index.py)
+# "rename" adds ' (1)', ' (2)', ..., "skip_identical" leaves same size+hash files where they are,
+# "keep_newest" replaces the older file or leaves the older new one where it is
+
+COLLISION_POLICY = "rename"
+
+# Write-ahead journal of every run's moves (logs folder), used by --resume and --rollback
+# Outcomes are fsynced in batches: whichever comes first, this many records or this many seconds
+
+JOURNAL_MOVES = True
+JOURNAL_FILENAME = "move_journal.jsonl"
+JOURNAL_SYNC_RECORDS = 1000
+JOURNAL_SYNC_INTERVAL = 0.5
+
+# Per-run counters, phase timers and latency histograms, written to the logs folder
+
+METRICS = False
+METRICS_FILENAME = "metrics.json"
+
+# Logging: formatting and writing happen on a background thread when queued,
+# the log file is rotated at LOG_MAX_BYTES, and a progress line is logged at most every LOG_PROGRESS_INTERVAL seconds
+
+LOG_QUEUED = True
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_PROGRESS_INTERVAL = 2.0
+
+# Progress events for listeners such as the GUI are sent at most every PROGRESS_EVENT_INTERVAL seconds
+
+PROGRESS_EVENT_INTERVAL = 0.1
+
+# Decide moves a chunk of files at a time with NumPy masks (falls back to file by file without NumPy)
+
+VECTORIZED_RULES = True
+PLAN_BATCH_SIZE = 4096
+
+# Smaller chunks are decided file by file, so a short run never even imports NumPy
+
+VECTORIZED_MIN_FILES = 256
+
+# Whose folder a file is sorted into: "user" (whoever runs the organizer), "uid" (the file's real owner)
+# or "mapping" (team from OWNER_MAP_FILE by uid or group, real owner otherwise)
+
+OWNER_SOURCE = "user"
+OWNER_MAP_FILE = None
+
+# Batch runs over many roots: processes in the pool (None uses every CPU)
+
+SHARD_WORKERS = None
+
+# organize_files pipeline: chunks start at PIPELINE_FIRST_CHUNK files and double up to PIPELINE_CHUNK_SIZE,
+# at most PIPELINE_QUEUE_CHUNKS chunks wait between two stages
+
+PIPELINE_FIRST_CHUNK = 64
+PIPELINE_CHUNK_SIZE = 2048
+PIPELINE_QUEUE_CHUNKS = 4
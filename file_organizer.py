@@ -0,0 +1,186 @@
+import sys
+import logging
+import argparse
+
+from config import (LOGS_FOLDER, REPORT_FORMAT, OWNER_SOURCE, OWNER_MAP_FILE, SHARD_WORKERS, WATCH_INTERVAL_MS,
+                    WATCH_DEBOUNCE_MS, DUPLICATE_ACTION, RULE_FILE, COLLISION_POLICY)
+
+# Headless command line: python -m file_organizer organize|plan|watch|resume|rollback|batch|gui
+#
+# Only argparse and config are loaded up front. The organizer, Tk, NumPy, SQLite and the other
+# optional parts are imported by the command that needs them, so cron runs don't pay for the GUI
+# and '--help' or a typo return straight away.
+
+logger = logging.getLogger("file_organizer")
+
+
+def _organizer_options(args):
+    """
+
+    FileOrganizer keyword arguments from the shared command line options.
+
+    """
+
+    return {
+        "recursive": args.recursive,
+        "incremental": args.incremental,
+        "dedupe": args.dedupe,
+        "duplicate_action": args.duplicate_action,
+        "sniff_content": args.sniff,
+        "rule_file": args.rules,
+        "collision_policy": args.on_collision,
+        "report_format": args.report_format,
+        "owner_source": args.owner_source,
+        "owner_map": args.owner_map,
+    }
+
+
+def _organizer(args, **overrides):
+    from services.file_organizer import FileOrganizer
+
+    options = _organizer_options(args)
+    options.update(overrides)
+    return FileOrganizer(args.directory, **options)
+
+
+def organize(args):
+    _organizer(args, metrics=args.metrics).organize_files(profile=args.profile)
+    logger.info(f"Files organized in directory: {args.directory}")
+
+
+def plan(args):
+    _organizer(args, metrics=args.metrics).organize_files(dry_run=True, profile=args.profile)
+    logger.info(f"Dry run finished, nothing was moved in: {args.directory}")
+
+
+def watch(args):
+    _organizer(args).watch(interval_ms=args.interval_ms, debounce_ms=args.debounce_ms, use_inotify=not args.polling)
+
+
+def resume(args):
+    _organizer(args).resume()
+    logger.info(f"Interrupted run finished in directory: {args.directory}")
+
+
+def rollback(args):
+    _organizer(args).rollback()
+    logger.info(f"Last run rolled back in directory: {args.directory}")
+
+
+def batch(args):
+    from services.shards import run_shards, split_root
+
+    roots = args.roots
+    if args.split:
+        roots = [shard for root in roots for shard in split_root(root)]
+
+    results = run_shards(roots, args.output, workers=args.workers, dry_run=args.dry_run,
+                         **_organizer_options(args))
+
+    failed = [result for result in results if not result["ok"]]
+    for result in failed:
+        print(f"Failed: {result['root']}: {result['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def gui(args):
+    from ui.project_gui import OrganizerGUI
+
+    OrganizerGUI().run()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="file_organizer", description="Organize a folder by file type and date.")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="DEBUG also logs every single file")
+    parser.add_argument("--log-dir", help="Folder the logs/app.log file goes into (default: current folder)")
+
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    # Options shared by every command that builds a FileOrganizer
+
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--recursive", action="store_true", help="Organize sub folders too")
+    options.add_argument("--incremental", action="store_true", help="Skip what didn't change since the last run")
+    options.add_argument("--dedupe", action="store_true", help="Send extra copies of a file to the Duplicates folder")
+    options.add_argument("--duplicate-action", choices=["move", "hardlink"], default=DUPLICATE_ACTION)
+    options.add_argument("--sniff", action="store_true",
+                         help="Sort files with an unknown extension by their first bytes")
+    options.add_argument("--rules", default=RULE_FILE, help="JSON or TOML file with extra rules")
+    options.add_argument("--on-collision", choices=["rename", "skip_identical", "keep_newest"],
+                         default=COLLISION_POLICY, help="What to do when a file's name is taken at its destination")
+    options.add_argument("--report-format", choices=["csv", "jsonl", "sqlite"], default=REPORT_FORMAT)
+    options.add_argument("--owner-source", choices=["user", "uid", "mapping"], default=OWNER_SOURCE,
+                         help="Owner folder from the runner, the file's uid, or the --owner-map teams")
+    options.add_argument("--owner-map", default=OWNER_MAP_FILE, help="JSON file mapping uids/groups to teams")
+
+    directory = argparse.ArgumentParser(add_help=False)
+    directory.add_argument("directory", help="Folder to organize")
+
+    run = argparse.ArgumentParser(add_help=False)
+    run.add_argument("--metrics", action="store_true", help="Write logs/metrics.json")
+    run.add_argument("--profile", action="store_true", help="Profile the run (logs/profile.pstats), implies --metrics")
+
+    command = commands.add_parser("organize", parents=[directory, options, run], help="Move files into place")
+    command.set_defaults(run=organize)
+
+    command = commands.add_parser("plan", parents=[directory, options, run],
+                                  help="Write the logs/plan report without moving anything")
+    command.set_defaults(run=plan)
+
+    command = commands.add_parser("watch", parents=[directory, options],
+                                  help="Keep running and organize files as they land (Ctrl+C to stop)")
+    command.add_argument("--interval-ms", type=int, default=WATCH_INTERVAL_MS, help="Time between batches")
+    command.add_argument("--debounce-ms", type=int, default=WATCH_DEBOUNCE_MS,
+                         help="Quiet time before a written file is handled")
+    command.add_argument("--polling", action="store_true", help="Poll the folder instead of using inotify")
+    command.set_defaults(run=watch)
+
+    command = commands.add_parser("resume", parents=[directory, options],
+                                  help="Finish an interrupted run from logs/move_journal.jsonl")
+    command.set_defaults(run=resume)
+
+    command = commands.add_parser("rollback", parents=[directory, options],
+                                  help="Put back every file moved by the last run")
+    command.set_defaults(run=rollback)
+
+    command = commands.add_parser("batch", parents=[options], help="Organize many folders across a process pool")
+    command.add_argument("roots", nargs="+", metavar="ROOT")
+    command.add_argument("--split", action="store_true", help="Run every sub folder of each ROOT as its own shard")
+    command.add_argument("--workers", type=int, default=SHARD_WORKERS, help="Processes (default: one per CPU)")
+    command.add_argument("--output", default=LOGS_FOLDER, help="Folder for the merged batch report and metrics")
+    command.add_argument("--dry-run", action="store_true", help="Only plan the moves")
+    command.set_defaults(run=batch)
+
+    command = commands.add_parser("gui", help="Open the desktop window")
+    command.set_defaults(run=gui)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Parse the command line and run the command.
+
+    Return:
+        Exit code: 0 when the command finished, 1 when it failed
+    """
+
+    args = build_parser().parse_args(argv)
+
+    from logging_config import setup_logger
+
+    if args.log_dir:
+        setup_logger(base_directory=args.log_dir, level=getattr(logging, args.log_level))
+    else:
+        setup_logger(level=getattr(logging, args.log_level))
+
+    try:
+        return args.run(args) or 0
+    except Exception as e:
+        logger.error(f"{args.command} failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,30 @@
 import os
+import queue
+import atexit
 import logging
-from config import LOGS_FOLDER
+import logging.handlers
+from config import LOGS_FOLDER, LOG_QUEUED, LOG_MAX_BYTES, LOG_BACKUP_COUNT
 
-def setup_logger(log_filename="app.log", base_directory=os.getcwd()):
+# Handlers and listener from the last setup_logger call, so calling it again doesn't stack them
+
+_handlers = []
+_listener = None
+
+# The exit hook is registered once, however often setup_logger is called
+
+_exit_hook_registered = False
+
+
+def _stop_listener():
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logger(log_filename="app.log", base_directory=os.getcwd(), queued=LOG_QUEUED,
+                 max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, level=logging.INFO):
     """
 
     Logger setup for the app.
@@ -10,9 +32,16 @@ def setup_logger(log_filename="app.log", base_directory=os.getcwd()):
     Args:
         log_filename (str): Where logs are written
         base_directry: Grab the path we point to for folder to be made in same location as organized files
+        queued (bool): Hand records to a background thread that does the formatting and I/O,
+                       so the thread moving files only puts them on a queue
+        max_bytes (int): Size at which the log file is rotated
+        backup_count (int): Rotated log files kept (app.log.1, app.log.2, ...)
+        level (int): Root log level (per-file messages are DEBUG)
     
     """
     
+    global _handlers, _listener, _exit_hook_registered
+    
     logs_folder = os.path.join(base_directory, LOGS_FOLDER)
 
     if not os.path.exists(logs_folder):
@@ -21,30 +50,49 @@ def setup_logger(log_filename="app.log", base_directory=os.getcwd()):
     
     full_log_path = os.path.join(logs_folder, log_filename)
     
-    logging.basicConfig(
-        
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        filename=full_log_path,
-        # Append so new logs to be added
-        filemode="a"
+    # Create a formatter shared by the file and console handlers
+    
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    
+    # Append so new logs to be added, rotated once the file reaches max_bytes
+    
+    file_handler = logging.handlers.RotatingFileHandler(
+        full_log_path, mode="a", maxBytes=max_bytes, backupCount=backup_count
     )
+    file_handler.setFormatter(formatter)
     
     # Create a console handler and set its logging level
     
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    
-    # Create a formatter and attach it to the console 
-    
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
     console_handler.setFormatter(formatter)
     
-    # Get the root logger and add the console handler if its not already there
+    # Replace whatever an earlier call attached to the root logger
     
-    logging.getLogger().addHandler(console_handler)
+    root = logging.getLogger()
+    _stop_listener()
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+        
+    if queued:
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        _listener.start()
+        _handlers = [logging.handlers.QueueHandler(log_queue)]
+        
+        # Whatever is still queued gets written before the process exits
+        
+        if not _exit_hook_registered:
+            atexit.register(_stop_listener)
+            _exit_hook_registered = True
+    else:
+        _handlers = [file_handler, console_handler]
+        
+    for handler in _handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
     
     logging.info(f"Log file will be written to:  {full_log_path}")
-    
-    
\ No newline at end of file
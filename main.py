@@ -1,32 +1,33 @@
-import logging
-from logging_config import setup_logger
+import sys
 
-from services.file_organizer import FileOrganizer
-from ui.project_gui import OrganizerGUI
+# Without arguments this opens the desktop window. Anything else goes to the headless
+# command line in file_organizer.py (e.g. 'python3 main.py organize ~/Downloads'), so
+# there is only one set of commands and options. The GUI (tkinter) and the organizer
+# are imported only by the path that uses them.
 
-setup_logger()
 
-# Get our logger form config
-logger = logging.getLogger(__name__)
-
-
-def main():
+def main(argv=None):
     """
-    Main execution function prompting user for a directory path.
+    Open the GUI when there are no arguments, otherwise run the command line.
+
+    Return:
+        Exit code: 0 when the command finished, 1 when it failed
     """
 
-    logging.info("File Organizer started.")
-    
-    directory_to_organize = input("Enter the directory path to organize: ")
-    try:
-        organizer = FileOrganizer(directory_to_organize)
-
-        organizer.organize_files()
-        logger.info(f"Files organized in directory: {directory_to_organize}")
-    except Exception as e:
-        logger.error(f"An error occurred during the organization: {e}")
-        print(f"An error occured: {e}")
-    
-if __name__ == "__main__": 
-    gui = OrganizerGUI()
-    gui.run()
\ No newline at end of file
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv:
+        import file_organizer
+
+        return file_organizer.main(argv)
+
+    from logging_config import setup_logger
+    from ui.project_gui import OrganizerGUI
+
+    setup_logger()
+    OrganizerGUI().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import FILE_CATEGORIES, SNIFF_BYTES, SNIFF_WORKERS, SNIFF_READ_BUDGET
+from services.models import FileItem
+from services.rules import build_destination
+from services.rules_engine import Rule
+from services.metrics import NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+# Magic numbers: every (offset, bytes) part has to match. First match wins, so the
+# more specific signatures (e.g. QuickTime before any other MP4) come first.
+# Everything here fits in the first SNIFF_BYTES bytes (the tar one sits at 257).
+
+MAGIC_NUMBERS = (
+    (((0, b"%PDF-"),), ".pdf"),
+    (((0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),), ".doc"),
+    (((0, b"\x89PNG\r\n\x1a\n"),), ".png"),
+    (((0, b"\xff\xd8\xff"),), ".jpg"),
+    (((0, b"GIF87a"),), ".gif"),
+    (((0, b"GIF89a"),), ".gif"),
+    (((0, b"RIFF"), (8, b"WAVE")), ".wav"),
+    (((0, b"RIFF"), (8, b"AVI ")), ".avi"),
+    (((0, b"fLaC"),), ".flac"),
+    (((0, b"ID3"),), ".mp3"),
+    (((0, b"\xff\xfb"),), ".mp3"),
+    (((0, b"\xff\xf3"),), ".mp3"),
+    (((0, b"\xff\xf2"),), ".mp3"),
+    (((4, b"ftypqt  "),), ".mov"),
+    (((4, b"ftyp"),), ".mp4"),
+    (((0, b"PK\x03\x04"),), ".zip"),
+    (((0, b"Rar!\x1a\x07"),), ".rar"),
+    (((0, b"7z\xbc\xaf\x27\x1c"),), ".7z"),
+    (((257, b"ustar"),), ".tar"),
+    (((0, b"<?xml"),), ".xml"),
+)
+
+
+def sniff_type(header):
+    """
+
+    Extension the first bytes of a file look like (e.g. '.png'), None when no magic number matches.
+
+    """
+
+    for parts, extension in MAGIC_NUMBERS:
+        if all(header.startswith(signature, offset) for offset, signature in parts):
+            return extension
+    return None
+
+
+def read_header(path, size=SNIFF_BYTES):
+    with open(path, "rb", buffering=0) as f:
+        return f.read(size)
+
+
+class SniffCache:
+    def __init__(self, filename):
+        """
+
+        Sniffed types keyed by (device, inode), only trusted while size and mtime still
+        match, so an unchanged file is never read twice across runs (like HashCache).
+        Files nothing matched are stored too, as an empty type.
+
+        Parameters:
+            filename (str): SQLite file (normally inside the logs folder)
+
+        """
+
+        self.filename = filename
+        self._lock = threading.Lock()
+
+        # Used from whichever pipeline thread plans the current chunk
+
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS sniffed (
+                device INTEGER, inode INTEGER, size INTEGER, mtime REAL, kind TEXT,
+                PRIMARY KEY (device, inode)
+            )
+        """)
+        self._updates = {}
+
+    def get(self, file):
+        """
+
+        Return:
+            The stored type ('' when nothing matched), or None when the file has to be read
+
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime, kind FROM sniffed WHERE device = ? AND inode = ?",
+                (file.device, file.inode)
+            ).fetchone()
+
+        if row is None or row[0] != file.size or row[1] != file.mtime:
+            return None
+        return row[2]
+
+    def put(self, file, kind):
+        with self._lock:
+            self._updates[(file.device, file.inode)] = (file.size, file.mtime, kind or "")
+
+    def save(self):
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO sniffed VALUES (?, ?, ?, ?, ?)",
+                    (key + value for key, value in self._updates.items())
+                )
+            self._updates = {}
+
+    def close(self):
+        self.save()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class ContentTypeRule(Rule):
+    def __init__(self, name, description, base_destination, file_categories=FILE_CATEGORIES, cache=None,
+                 read_bytes=SNIFF_BYTES, workers=SNIFF_WORKERS, read_budget=SNIFF_READ_BUDGET,
+                 enabled=True, depth="month"):
+        """
+
+        Sorts files whose extension no category knows (no extension, '.dat', 'download (3)', ...)
+        by what their first bytes look like, into the category that owns the sniffed type.
+
+        Only those files are ever read, and only 'read_bytes' of each. The reads of a
+        whole chunk are done together on a small thread pool by prepare(), which the
+        RulesEngine calls before deciding the chunk; applies_to() is then a lookup.
+
+        Parameters:
+            base_destination: Base folder the category folders are in
+            file_categories (dict): Category -> extensions, as for the extension rules
+            cache (SniffCache, optional): Reuse results for unchanged files across runs
+            read_bytes (int): Bytes read from the start of each file
+            workers (int): Threads reading at once
+            read_budget (int, optional): Most bytes read in one run (no limit when None);
+                                         files past it are left to the next rules
+
+        """
+        super().__init__(name, description, enabled)
+
+        self.base_destination = base_destination
+        self.cache = cache
+        self.read_bytes = read_bytes
+        self.workers = workers
+        self.read_budget = read_budget
+        self.depth = depth
+
+        # Sniffed extension -> category folder
+
+        self.categories = {
+            extension.lower(): category
+            for category, extensions in file_categories.items() if category != "Others"
+            for extension in extensions
+        }
+
+        # Category of every sniffed file of the chunk being planned
+
+        self._matches = {}
+        self.stats = {"lookups": 0, "cache_hits": 0, "reads": 0, "bytes_read": 0, "matched": 0,
+                      "over_budget": 0, "errors": 0}
+
+    def _sniff(self, file):
+        try:
+            header = read_header(file.path, self.read_bytes)
+        except OSError as e:
+            logger.debug("Could not sniff '%s': %s", file.name, e)
+            return False, None, 0
+        return True, sniff_type(header), len(header)
+
+    def prepare(self, files, metrics=NULL_METRICS):
+        """
+
+        Sniff every file of the chunk that has an unknown extension, cached results first.
+
+        """
+
+        self._matches = {}
+        stats = self.stats
+
+        to_read = []
+        for file in files:
+            if file.extension in self.categories or not file.size:
+                continue
+
+            stats["lookups"] += 1
+
+            kind = self.cache.get(file) if self.cache is not None else None
+
+            if kind is not None:
+                stats["cache_hits"] += 1
+                self._match(file, kind)
+            else:
+                to_read.append(file)
+
+        if self.read_budget is not None:
+            allowed = max(0, (self.read_budget - stats["bytes_read"]) // self.read_bytes)
+            stats["over_budget"] += max(0, len(to_read) - allowed)
+            to_read = to_read[:allowed]
+
+        if not to_read:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(to_read)), thread_name_prefix="sniff") as pool:
+            results = list(pool.map(self._sniff, to_read))
+
+        for file, (ok, kind, length) in zip(to_read, results):
+            if not ok:
+                stats["errors"] += 1
+                continue
+
+            stats["reads"] += 1
+            stats["bytes_read"] += length
+            self._match(file, kind)
+
+            if self.cache is not None:
+                self.cache.put(file, kind)
+
+    def _match(self, file, kind):
+        category = self.categories.get(kind) if kind else None
+        if category is not None:
+            self._matches[file.path] = category
+            self.stats["matched"] += 1
+
+    def applies_to(self, file: FileItem):
+        return file.path in self._matches
+
+    def destination_for(self, file: FileItem):
+        base_dir = os.path.join(self.base_destination, self._matches[file.path])
+        destination_folder = build_destination(base_dir, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+
+    def report(self, metrics=NULL_METRICS):
+        stats = dict(self.stats)
+
+        for name, value in stats.items():
+            metrics.count(f"sniff_{name}", value)
+
+        hit_rate = stats["cache_hits"] / stats["lookups"] * 100 if stats["lookups"] else 0.0
+        budget = f"{self.read_budget} bytes" if self.read_budget is not None else "no limit"
+
+        logger.info(f"Content sniffing: {stats['matched']} of {stats['lookups']} unknown files recognized, "
+                    f"{stats['reads']} read ({stats['bytes_read']} bytes, budget {budget}, "
+                    f"{stats['over_budget']} over budget), cache hit rate {hit_rate:.1f}%")
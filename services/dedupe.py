@@ -0,0 +1,198 @@
+import os
+import mmap
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed from the start and from the end of a file for the cheap first pass
+
+PARTIAL_HASH_BYTES = 64 * 1024
+
+
+class HashCache:
+    def __init__(self, filename):
+        """
+
+        Partial and full hashes keyed by (device, inode), only trusted while size and
+        mtime still match, so an unchanged file is never read twice across runs.
+        A rename (including our own moves) keeps the inode, so the cache survives it.
+
+        Parameters:
+            filename (str): SQLite file (normally inside the logs folder)
+
+        """
+
+        self.filename = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                device INTEGER, inode INTEGER, size INTEGER, mtime REAL, partial TEXT, full TEXT,
+                PRIMARY KEY (device, inode)
+            )
+        """)
+        self._updates = {}
+        self.hits = 0
+
+    def get(self, file):
+        row = self._connection.execute(
+            "SELECT size, mtime, partial, full FROM hashes WHERE device = ? AND inode = ?",
+            (file.device, file.inode)
+        ).fetchone()
+
+        if row is None or row[0] != file.size or row[1] != file.mtime:
+            return None, None
+
+        self.hits += 1
+        return row[2], row[3]
+
+    def put(self, file, partial, full=None):
+        self._updates[(file.device, file.inode)] = (file.size, file.mtime, partial, full)
+
+    def save(self):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                (key + value for key, value in self._updates.items())
+            )
+        self._updates = {}
+
+    def close(self):
+        self.save()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def partial_hash(path, size):
+    """
+
+    Hash of the first and last PARTIAL_HASH_BYTES of a file (the whole file when it is small).
+
+    """
+
+    digest = hashlib.blake2b()
+
+    with open(path, "rb", buffering=0) as f:
+        fd = f.fileno()
+        digest.update(os.pread(fd, PARTIAL_HASH_BYTES, 0))
+
+        if size > PARTIAL_HASH_BYTES:
+            tail = max(PARTIAL_HASH_BYTES, size - PARTIAL_HASH_BYTES)
+            digest.update(os.pread(fd, size - tail, tail))
+
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """
+
+    Hash of the whole file, read through mmap so the data isn't copied into Python.
+
+    """
+
+    digest = hashlib.blake2b()
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            digest.update(mapped)
+
+    return digest.hexdigest()
+
+
+def _hash_groups(files, hash_of):
+    """
+
+    Split files into groups with the same hash; unreadable files are dropped.
+
+    """
+
+    groups = {}
+    for file in files:
+        try:
+            key = hash_of(file)
+        except OSError as e:
+            logger.info(f"Could not hash '{file.name}'. Error: {e}")
+            continue
+        groups.setdefault(key, []).append(file)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_duplicates(files, cache=None):
+    """
+
+    Find files with identical content.
+
+    Only files of the same size can be equal, so they are bucketed by size first.
+    Same size candidates get a cheap partial hash (first and last 64 KiB), and only
+    the ones still colliding are hashed in full. Empty files are never reported.
+
+    Parameters:
+        files: list of FileItems
+        cache (HashCache, optional): Reuse hashes of unchanged files
+
+    Return:
+        dict of duplicate path -> the FileItem that is kept (oldest mtime, then path)
+
+    """
+
+    by_size = {}
+    for file in files:
+        if file.size:
+            by_size.setdefault(file.size, []).append(file)
+
+    known = {}
+
+    def cached(file):
+        hashes = known.get(file.path)
+        if hashes is None:
+            hashes = list(cache.get(file)) if cache is not None else [None, None]
+            known[file.path] = hashes
+        return hashes
+
+    def partial(file):
+        hashes = cached(file)
+        if hashes[0] is None:
+            hashes[0] = partial_hash(file.path, file.size)
+        return hashes[0]
+
+    def full(file):
+        hashes = cached(file)
+
+        # Small files were read completely by the partial hash already
+
+        if file.size <= 2 * PARTIAL_HASH_BYTES:
+            return hashes[0]
+        if hashes[1] is None:
+            hashes[1] = full_hash(file.path)
+        return hashes[1]
+
+    duplicates = {}
+
+    for candidates in by_size.values():
+        if len(candidates) < 2:
+            continue
+
+        for partial_group in _hash_groups(candidates, partial):
+            for group in _hash_groups(partial_group, full):
+                group.sort(key=lambda file: (file.mtime, file.path))
+                original = group[0]
+                for copy in group[1:]:
+                    duplicates[copy.path] = original
+
+    if cache is not None:
+        by_path = {file.path: file for file in files}
+        for path, (partial_value, full_value) in known.items():
+            cache.put(by_path[path], partial_value, full_value)
+
+    logger.info(f"Duplicate check: {len(duplicates)} duplicates found, "
+                f"{len(known)} files hashed or looked up"
+                + (f", {cache.hits} cache hits" if cache is not None else ""))
+
+    return duplicates
@@ -0,0 +1,187 @@
+import os
+import logging
+
+from config import COLLISION_POLICY
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("rename", "skip_identical", "keep_newest")
+
+# Collision outcomes that leave the file where it is (no move is planned for it)
+
+SKIPPED = ("skipped_identical", "skipped_older")
+
+
+def numbered_name(name, number):
+    """
+
+    'report.pdf' -> 'report (2).pdf' for number 2 (names without an extension just get the suffix).
+
+    """
+
+    stem, extension = os.path.splitext(name)
+    return f"{stem} ({number}){extension}"
+
+
+def _same_content(first_paths, second_paths, size):
+    """
+
+    Compare two files of the same size by hash: the cheap partial hash first, the full
+    hash only when the files are bigger than what the partial hash already read.
+    Every side is a list of paths the file may be at (a planned move's source, then
+    its destination once an earlier chunk has moved it); the first one that opens wins.
+
+    """
+
+    from services.dedupe import PARTIAL_HASH_BYTES, partial_hash, full_hash
+
+    def hash_of(paths, hasher):
+        error = None
+        for path in paths:
+            try:
+                return hasher(path)
+            except FileNotFoundError as e:
+                error = e
+        raise error
+
+    if hash_of(first_paths, lambda path: partial_hash(path, size)) != \
+            hash_of(second_paths, lambda path: partial_hash(path, size)):
+        return False
+
+    if size <= 2 * PARTIAL_HASH_BYTES:
+        return True
+    return hash_of(first_paths, full_hash) == hash_of(second_paths, full_hash)
+
+
+class DestinationIndex:
+    def __init__(self, policy=COLLISION_POLICY):
+        """
+
+        Names already taken in every destination folder, so a planned move never lands on
+        an existing file without anyone deciding so.
+
+        Each folder is listed once, the first time a move is planned into it, and every
+        planned move adds its name right away, so later files (and later chunks, when the
+        same index is passed to every RulesEngine.plan() call of a run) see it too.
+        A name is looked up in a dict, no file is stat'ed unless it collides and the policy
+        has to compare the two files.
+
+        Parameters:
+            policy (str): What to do when a name is taken:
+                          "rename" moves the file as 'name (1).ext', 'name (2).ext', ...
+                          "skip_identical" leaves it where it is when both files have the same
+                          size and hash, renames it otherwise
+                          "keep_newest" replaces the existing file when the new one is newer,
+                          leaves the new one where it is otherwise (two files of one plan:
+                          RulesEngine.plan() leaves the older one where it is)
+
+        """
+
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported collision policy: {policy}")
+
+        self.policy = policy
+
+        # Folder -> {name: None for a file found on disk (stat'ed only when needed), or
+        # (size, mtime, paths) for a file planned in this run or already compared}
+
+        self._folders = {}
+
+        # (folder, name) -> next suffix number to try, so a thousand 'scan.pdf' don't try 1..n every time
+
+        self._suffixes = {}
+        self.stats = {"folders_listed": 0, "names_listed": 0}
+
+    def _names(self, folder):
+        names = self._folders.get(folder)
+        if names is not None:
+            return names
+
+        try:
+            names = dict.fromkeys(os.listdir(folder))
+        except FileNotFoundError:
+
+            # Created by the run, nothing can be in it yet
+
+            names = {}
+        except OSError as e:
+
+            # Not a folder (a file named like a category) or unreadable: the moves into it
+            # fail on their own in the executor, one file at a time
+
+            logger.debug("Could not list '%s': %s", folder, e)
+            names = {}
+
+        self.stats["folders_listed"] += 1
+        self.stats["names_listed"] += len(names)
+        self._folders[folder] = names
+        return names
+
+    def _existing(self, names, folder, name):
+        entry = names[name]
+        if entry is None:
+            path = os.path.join(folder, name)
+            stat_result = os.stat(path)
+            entry = (stat_result.st_size, stat_result.st_mtime, (path,))
+            names[name] = entry
+        return entry
+
+    def _free_name(self, names, folder, name):
+        number = self._suffixes.get((folder, name), 1)
+        while numbered_name(name, number) in names:
+            number += 1
+        self._suffixes[(folder, name)] = number + 1
+        return numbered_name(name, number)
+
+    def resolve(self, file, destination):
+        """
+
+        Check a planned destination against the index and claim it.
+
+        Parameters:
+            file: FileItem about to be moved
+            destination (str): Path the rule picked
+
+        Return:
+            A tuple: (destination to use, collision outcome). The outcome is None when the
+            name was free, "renamed", "replaced", or one of SKIPPED (the file stays where
+            it is and the destination is the file it collided with)
+
+        """
+
+        folder, name = os.path.split(destination)
+        names = self._names(folder)
+        planned = (file.size, file.mtime, (file.path, destination))
+
+        if name not in names:
+            names[name] = planned
+            return destination, None
+
+        outcome = "renamed"
+
+        if self.policy != "rename":
+            try:
+                size, mtime, paths = self._existing(names, folder, name)
+
+                if self.policy == "keep_newest":
+                    outcome = "replaced" if file.mtime > mtime else "skipped_older"
+                elif size == file.size and _same_content(paths, (file.path,), size):
+                    outcome = "skipped_identical"
+            except OSError as e:
+
+                # Can't compare them, keeping both is the safe choice
+
+                logger.info(f"Could not compare '{file.name}' with '{destination}', renaming it. Error: {e}")
+                outcome = "renamed"
+
+        if outcome in SKIPPED:
+            return destination, outcome
+
+        if outcome == "replaced":
+            names[name] = planned
+            return destination, outcome
+
+        name = self._free_name(names, folder, name)
+        destination = os.path.join(folder, name)
+        names[name] = (file.size, file.mtime, (file.path, destination))
+        return destination, outcome
@@ -0,0 +1,394 @@
+import os
+import errno
+import shutil
+import logging
+import threading
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import MOVE_WORKERS, COPY_WORKERS_PER_DEVICE, VERIFY_COPIES
+from services.rules import group_by_destination
+from services.destination_index import SKIPPED
+from services.transfer import transfer_file
+from services.report_generator import processed_timestamp
+from services.metrics import NULL_METRICS
+from services.progress import ProgressLogger
+
+logger = logging.getLogger(__name__)
+
+# Renames relative to open directory fds (POSIX only, everything else uses shutil.move)
+
+DIR_FD_RENAME = os.rename in os.supports_dir_fd and hasattr(os, "O_DIRECTORY")
+
+
+class DirectoryHandles:
+    def __init__(self, limit=64):
+        """
+        
+        Small LRU of open directory fds keyed by path, so the kernel resolves each
+        folder path once instead of once per file.
+        
+        Parameters:
+            limit (int): Max number of fds kept open at the same time
+        
+        """
+        
+        self.limit = limit
+        self._fds = OrderedDict()
+        
+    def get(self, path):
+        fd = self._fds.get(path)
+        
+        if fd is not None:
+            self._fds.move_to_end(path)
+            return fd
+        
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        self._fds[path] = fd
+        
+        if len(self._fds) > self.limit:
+            _, oldest = self._fds.popitem(last=False)
+            os.close(oldest)
+            
+        return fd
+    
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _move(move, sources, destination_fd, verify=False):
+    """
+    
+    Move one file. Same device moves are a rename (relative to the source and
+    destination folder fds when we have them), anything else (or a surprise EXDEV)
+    is copied with transfer_file.
+    
+    """
+    
+    if move.same_device:
+        try:
+            if destination_fd is not None:
+                source_fd = sources.get(os.path.dirname(move.source))
+                os.rename(os.path.basename(move.source), os.path.basename(move.destination),
+                          src_dir_fd=source_fd, dst_dir_fd=destination_fd)
+            else:
+                shutil.move(move.source, move.destination)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            
+    transfer_file(move.source, move.destination, verify=verify)
+
+
+def _record(move, report_data):
+    file_name = os.path.basename(move.source)
+    
+    if move.collision in SKIPPED:
+        logger.debug("Rule '%s' left '%s' where it is, %s: %s", move.rule, file_name, move.collision,
+                     move.destination)
+    else:
+        logger.debug("Rule '%s' moved '%s' to %s", move.rule, file_name, move.destination)
+    
+    if report_data is not None:
+        record = {
+            "file_name": file_name,
+            "original_path": move.source,
+            "destination": move.destination,
+            "rule_applied": move.rule,
+            "processed_at": processed_timestamp(),
+            "collision": move.collision
+        }
+        report_data.append(record)
+        logger.debug("[RECORD ADDED] Report entry added for '%s'", file_name)
+
+
+class OrderedReport:
+    def __init__(self, report_data, journal=None, metrics=NULL_METRICS, progress=None, cancel_event=None):
+        """
+        
+        Collects finished moves from any worker and writes their report records
+        in plan order, so the CSV is the same whatever the worker count.
+        Outcomes also go to the move journal (if any) as soon as they happen,
+        and to the progress line (if any).
+        
+        Once 'cancel_event' is set the lanes stop taking new moves; what is left is
+        marked with skip(), journaled as "cancelled" so the journal isn't taken for an
+        interrupted run and the next run plans those files again.
+        
+        """
+        
+        self.report_data = report_data
+        self.journal = journal
+        self.metrics = metrics
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.moved = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._finished = {}
+        self._next = 0
+        
+    def done(self, position, move):
+        """
+        
+        Mark a plan position as finished. 'move' is None when the move failed.
+        
+        """
+        
+        if self.journal is not None:
+            if move is None:
+                self.journal.failed(position)
+            else:
+                self.journal.done(position)
+                
+        if move is None:
+            self.metrics.count("files_failed")
+        else:
+            self.metrics.count("files_moved")
+            self.metrics.add_bytes(move.rule, move.size)
+                
+        with self._lock:
+            self._finished[position] = move
+            
+            if self.progress is not None:
+                self.progress.update(1, move.size if move is not None else 0)
+            
+            self._flush()
+            
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def skip(self, position):
+        """
+        
+        Leave a plan position untouched because the run was cancelled.
+        
+        """
+        
+        if self.journal is not None:
+            self.journal.cancelled(position)
+            
+        with self._lock:
+            self.skipped += 1
+            self._finished[position] = None
+            self._flush()
+            
+    def _flush(self):
+        
+        # Flush every record that is next in line
+        
+        while self._next in self._finished:
+            finished = self._finished.pop(self._next)
+            self._next += 1
+            
+            if finished is not None:
+                self.moved += 1
+                _record(finished, self.report_data)
+
+
+def _failed(move, e):
+    logger.info(f"Rule '{move.rule}' failed to move '{os.path.basename(move.source)}'. Error: {e}")
+
+
+def _rename_group(folder, items, report, verify):
+    """
+    
+    Rename lane: one destination folder, created and opened once, files moved in plan order.
+    
+    """
+    
+    metrics = report.metrics
+    
+    try:
+        with metrics.timer("mkdir"):
+            os.makedirs(folder, exist_ok=True)
+        destination_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY) if DIR_FD_RENAME else None
+    except OSError as e:
+        logger.info(f"Could not prepare '{folder}', skipping {len(items)} files. Error: {e}")
+        for position, _ in items:
+            report.done(position, None)
+        return
+    
+    try:
+        with DirectoryHandles() as sources:
+            for position, move in items:
+                if report.cancelled():
+                    report.skip(position)
+                    continue
+                
+                try:
+                    with metrics.timer("rename" if move.same_device else "copy"):
+                        _move(move, sources, destination_fd, verify)
+                except Exception as e:
+                    _failed(move, e)
+                    report.done(position, None)
+                    continue
+                
+                report.done(position, move)
+    finally:
+        if destination_fd is not None:
+            os.close(destination_fd)
+
+
+def _copy_one(position, move, device_limits, report, verify):
+    """
+    
+    Copy lane: a cross device move, limited per source device.
+    
+    """
+    
+    if report.cancelled():
+        report.skip(position)
+        return
+    
+    with device_limits[move.device]:
+        try:
+            os.makedirs(os.path.dirname(move.destination), exist_ok=True)
+            with report.metrics.timer("copy"):
+                transfer_file(move.source, move.destination, verify=verify)
+        except Exception as e:
+            _failed(move, e)
+            report.done(position, None)
+            return
+        
+    report.done(position, move)
+
+
+def execute_plan(plan, report_data=None, workers=MOVE_WORKERS, copy_workers_per_device=COPY_WORKERS_PER_DEVICE,
+                 verify=VERIFY_COPIES, journal=None, metrics=NULL_METRICS, progress=None, cancel_event=None):
+    """
+    
+    Carry out every move of a MovePlan.
+    
+    Same filesystem renames and cross device copies run in separate thread pools,
+    so a slow copy never holds up cheap renames. Renames are grouped by destination
+    folder: each folder is created and opened once, then every file for it is renamed
+    relative to that fd. Copies are capped per source device and go through
+    transfer_file (kernel copy, fsync, then unlink). Moves with a link_target are
+    done first as hard links.
+    
+    Report records are written in plan order, so the final layout and the CSV are the
+    same for any worker count. Files a name collision left in place (plan.skipped) are
+    reported first, nothing is done to them.
+    
+    Parameters:
+        plan: MovePlan built by RulesEngine.plan()
+        report_data: A list to report records that get appended
+        workers (int): Threads in the rename lane
+        copy_workers_per_device (int): Copies allowed at once per source device
+        verify (bool): Checksum every cross device copy before deleting the source
+        journal (MoveJournal, optional): Gets a "done"/"failed" per move, the caller
+                                         writes the intents before calling this
+        metrics (Metrics, optional): Gets counters, latencies per operation and bytes per rule
+        progress (ProgressLogger, optional): Rate limited progress line shared with the caller
+                                             (who then finishes it), one is made for the plan
+                                             when not given
+        cancel_event (threading.Event, optional): Set it to stop between two files, moves not
+                                                  started yet are left as they are
+    
+    Return:
+        Number of files moved
+    
+    """
+    
+    own_progress = progress is None
+    if own_progress:
+        progress = ProgressLogger(len(plan), sum(move.size for move in plan), label="Moving")
+        
+    report = OrderedReport(report_data, journal, metrics, progress, cancel_event)
+    
+    for move in plan.skipped:
+        _record(move, report_data)
+    
+    # Two moves to the same destination would race each other, run those last in plan order
+    
+    destination_counts = Counter(move.destination for move in plan)
+    
+    links = []
+    renames = []
+    copies = []
+    serial = []
+    
+    for position, move in enumerate(plan):
+        if move.link_target is not None:
+            links.append((position, move))
+        elif destination_counts[move.destination] > 1:
+            serial.append((position, move))
+        elif move.same_device:
+            renames.append((position, move))
+        else:
+            copies.append((position, move))
+            
+    # Hard links first, while every link target of this plan is still where the plan found it.
+    # A link that can't be made (e.g. across devices) becomes a normal move.
+    
+    for position, move in links:
+        if report.cancelled():
+            report.skip(position)
+            continue
+        
+        try:
+            os.makedirs(os.path.dirname(move.destination), exist_ok=True)
+            with metrics.timer("link"):
+                os.link(move.link_target, move.destination)
+                os.unlink(move.source)
+        except OSError as e:
+            logger.info(f"Could not hard-link '{move.destination}', moving it instead. Error: {e}")
+            serial.append((position, move))
+            continue
+        
+        report.done(position, move)
+        
+    serial.sort(key=lambda item: item[0])
+    
+    rename_groups = group_by_destination(renames)
+    
+    devices = {move.device for _, move in copies}
+    device_limits = {device: threading.BoundedSemaphore(copy_workers_per_device) for device in devices}
+    copy_workers = max(1, copy_workers_per_device * len(devices))
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rename") as rename_lane, \
+         ThreadPoolExecutor(max_workers=copy_workers, thread_name_prefix="copy") as copy_lane:
+        
+        futures = [rename_lane.submit(_rename_group, folder, items, report, verify)
+                   for folder, items in rename_groups.items()]
+        futures.extend(copy_lane.submit(_copy_one, position, move, device_limits, report, verify)
+                       for position, move in copies)
+        
+        for future in futures:
+            future.result()
+            
+    with DirectoryHandles() as sources:
+        for position, move in serial:
+            if report.cancelled():
+                report.skip(position)
+                continue
+            
+            try:
+                os.makedirs(os.path.dirname(move.destination), exist_ok=True)
+                with metrics.timer("rename" if move.same_device else "copy"):
+                    _move(move, sources, None, verify)
+            except Exception as e:
+                _failed(move, e)
+                report.done(position, None)
+                continue
+            
+            report.done(position, move)
+            
+    if own_progress:
+        progress.finish()
+    
+    if report.skipped:
+        logger.info(f"Run cancelled: {report.moved} files moved, {report.skipped} left where they were")
+        
+    return report.moved
@@ -0,0 +1,90 @@
+import logging
+import importlib.util
+
+# NumPy is optional: without it the engine keeps deciding file by file.
+# It is only imported (load_numpy) once a chunk big enough to be worth it shows up,
+# so short runs and the CLI don't pay its import time.
+
+np = None
+
+logger = logging.getLogger(__name__)
+
+
+def vectorized_available():
+    return np is not None or importlib.util.find_spec("numpy") is not None
+
+
+def load_numpy():
+    global np
+
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+class FileBatch:
+    def __init__(self, files):
+        """
+
+        Column view of a chunk of FileItems, so a rule can be checked against all
+        of them in one array operation instead of one method call per file.
+
+        Extensions are interned: every distinct extension gets a small int id, and
+        an extension rule becomes a single isin() over the id column.
+
+        Parameters:
+            files (list): FileItems of this chunk (kept in self.files, same order as the columns)
+
+        """
+
+        np = load_numpy()
+
+        self.files = files
+        self.extension_id = {}
+
+        extension_ids = self.extension_id
+        ids = []
+        for file in files:
+            extension = file.extension
+            extension_number = extension_ids.get(extension)
+            if extension_number is None:
+                extension_number = extension_ids[extension] = len(extension_ids)
+            ids.append(extension_number)
+
+        self.extensions = np.array(ids, dtype=np.int32)
+        self.size = np.fromiter((file.size for file in files), dtype=np.int64, count=len(files))
+        self.mtime = np.fromiter((file.mtime for file in files), dtype=np.float64, count=len(files))
+        self.ctime = np.fromiter((file.ctime for file in files), dtype=np.float64, count=len(files))
+
+    def __len__(self):
+        return len(self.files)
+
+    def extension_mask(self, extensions):
+        """
+
+        True where the file's extension is one of 'extensions'.
+
+        """
+
+        ids = [self.extension_id[extension] for extension in extensions if extension in self.extension_id]
+        if not ids:
+            return np.zeros(len(self.files), dtype=bool)
+        return np.isin(self.extensions, ids)
+
+    def mask_of(self, predicate, rows=None):
+        """
+
+        Per-file fallback: run 'predicate' on the files in 'rows' (all of them when None).
+        Used for rules that have no batch form.
+
+        """
+
+        mask = np.zeros(len(self.files), dtype=bool)
+        files = self.files
+
+        for row in (range(len(files)) if rows is None else rows):
+            if predicate(files[row]):
+                mask[row] = True
+
+        return mask
@@ -1,23 +1,61 @@
 import os
 import shutil
+import asyncio
 import datetime
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from config import FILE_CATEGORIES, LOGS_FOLDER, EXCLUDED_ITEMS, EXCLUDED_EXT, YEAR_RANGE
+from config import (FILE_CATEGORIES, LOGS_FOLDER, EXCLUDED_ITEMS, EXCLUDED_EXT, YEAR_RANGE,
+                    SCAN_WORKERS, MOVE_WORKERS, VERIFY_COPIES, REPORT_FORMAT,
+                    INCREMENTAL_SCAN, SCAN_INDEX_FILENAME, WATCH_INTERVAL_MS, WATCH_DEBOUNCE_MS,
+                    DEDUPE, DUPLICATE_ACTION, DUPLICATES_FOLDER, HASH_CACHE_FILENAME,
+                    SNIFF_CONTENT, SNIFF_CACHE_FILENAME, RULE_FILE, COLLISION_POLICY,
+                    JOURNAL_MOVES, JOURNAL_FILENAME, METRICS, METRICS_FILENAME, OWNER_SOURCE, OWNER_MAP_FILE,
+                    PIPELINE_FIRST_CHUNK, PIPELINE_CHUNK_SIZE, PIPELINE_QUEUE_CHUNKS)
 from services.models import FileItem
-from services.rules_engine import RulesEngine, ExtensionRule, FallbackRule
-from services.report_generator import generate_CSV_report
+from services.scanner import scan_directory, iter_directory, walk_files
+from services.rules_engine import RulesEngine, ExtensionRule, FallbackRule, DuplicateRule
+from services.executor import execute_plan
+from services.journal import MoveJournal, JournalIds, pending_moves, next_move_id, rollback
+from services.metrics import Metrics, NULL_METRICS
+from services.report_generator import open_report_sink, TeeReport
+from services.progress import ProgressLogger, phase_event
+from services.scan_filter import ScanFilter
+from services.owners import OwnerResolver
+from services.move_plan import PlanTotals
+from services.destination_index import DestinationIndex, SKIPPED
+from services.pipeline import feed_chunks, run_stage, run_stages
 
 # Get a module-specific logger
 logger = logging.getLogger(__name__)
 
+# Optional parts (scan index, dedupe, content sniffing, rule files, watcher, profiler) are
+# imported where they are used, so a run that doesn't use them doesn't pay their import time
+
+
 class FileOrganizer:
     def __init__(self,
         directory,
         file_categories=FILE_CATEGORIES,
         excluded_items=EXCLUDED_ITEMS,
         excluded_ext=EXCLUDED_EXT,
-        year_range=YEAR_RANGE):
+        year_range=YEAR_RANGE,
+        recursive=False,
+        scan_workers=SCAN_WORKERS,
+        move_workers=MOVE_WORKERS,
+        verify_copies=VERIFY_COPIES,
+        report_format=REPORT_FORMAT,
+        incremental=INCREMENTAL_SCAN,
+        dedupe=DEDUPE,
+        duplicate_action=DUPLICATE_ACTION,
+        sniff_content=SNIFF_CONTENT,
+        rule_file=RULE_FILE,
+        collision_policy=COLLISION_POLICY,
+        journal_moves=JOURNAL_MOVES,
+        metrics=METRICS,
+        owner_source=OWNER_SOURCE,
+        owner_map=OWNER_MAP_FILE):
         
         if not os.path.isdir(directory):
             logger.error("Invalid directory: %s", directory)
@@ -29,7 +67,56 @@ class FileOrganizer:
         self.excluded_ext = excluded_ext
         self.year_range = year_range
         
-    def _collect_files(self):
+        # Opt-in: walk sub folders too instead of only the top level
+        
+        self.recursive = recursive
+        self.scan_workers = scan_workers
+        self.move_workers = move_workers
+        
+        # Checksum cross device copies before the source is deleted
+        
+        self.verify_copies = verify_copies
+        
+        # "csv", "jsonl" or "sqlite"
+        
+        self.report_format = report_format
+        
+        # Keep a scan index in the logs folder and only look at what changed since the last run
+        
+        self.incremental = incremental
+        
+        # Look for identical files before the rules run ("move" or "hardlink" the extra copies)
+        
+        self.dedupe = dedupe
+        self.duplicate_action = duplicate_action
+        
+        # Sort files with an unknown extension by their first bytes (results cached in the logs folder)
+        
+        self.sniff_content = sniff_content
+        
+        # Extra JSON/TOML rules (name patterns, extensions) checked before the category rules
+        
+        self.rule_file = rule_file
+        self._rule_entries = []
+        
+        # A name already taken in the destination folder: "rename", "skip_identical" or "keep_newest"
+        
+        self.collision_policy = collision_policy
+        
+        # Write-ahead journal so an interrupted run can be resumed or rolled back
+        
+        self.journal_moves = journal_moves
+        
+        # Counters, timers and latency histograms, dumped to the logs folder after each run
+        
+        self.metrics = metrics
+        
+        # Owner folder from the runner ("user"), the file's uid ("uid") or a team map ("mapping")
+        
+        self.owners = OwnerResolver(owner_source, owner_map)
+        self.last_metrics = {}
+        
+    def _collect_files(self, index=None, scan_filter=None):
 
         """
         Organizes files in the given dir based on their file type and subfolders based on date.
@@ -42,28 +129,110 @@ class FileOrganizer:
             
         # Process files in the directory
         
-        files = []
+        return scan_directory(self.directory, owner=self.owners, index=index, scan_filter=scan_filter)
+    
+    def _scan_files(self, index=None, scan_filter=None):
+        """
         
-        for filename in os.listdir(self.directory):
-            
-            file_path = os.path.join(self.directory, filename)
-            
-            # Optionally avoid processing and handling of directories
-
-            if os.path.isfile(file_path):
-                # 
-                files.append(FileItem(file_path))
-                
-        return files
+        Yield FileItems from the top level of the directory while it is being read.
+        
+        """
+        
+        return iter_directory(self.directory, owner=self.owners, index=index, scan_filter=scan_filter)
+    
+    def _output_folders(self):
+        """
+        
+        Folders this organizer writes into (every category, 'Others' and the logs folder).
+        A recursive walk never enters these so a re-run doesn't re-scan what it already sorted.
+        
+        """
+        
+        folders = [os.path.join(self.directory, category) for category in self.file_categories]
+        folders.append(os.path.join(self.directory, "Others"))
+        folders.append(os.path.join(self.directory, DUPLICATES_FOLDER))
+        folders.append(os.path.join(self.directory, LOGS_FOLDER))
+        if self._rule_entries:
+            from services.rule_config import rule_folders
+            folders.extend(rule_folders(self._rule_entries, self.directory))
+        
+        return folders
+    
+    def _walk_files(self, index=None, scan_filter=None):
+        """
+        
+        Recursively yield FileItems from the whole tree under the directory.
+        
+        """
+        
+        return walk_files(
+            self.directory,
+            skip_dirs=self._output_folders(),
+            excluded_items=self.excluded_items,
+            workers=self.scan_workers,
+            owner=self.owners,
+            index=index,
+            scan_filter=scan_filter
+        )
+    
+    def _scan_filter(self):
+        """
+        
+        Exclusions and the YEAR_RANGE cutoff, checked by the scanner before any FileItem is built.
+        
+        """
+        
+        return ScanFilter(self.excluded_items, self.excluded_ext, self.year_range)
+    
+    def _load_rules(self, logs_folder_path):
+        """
+        
+        Load the rule file (if any) through the rule cache in the logs folder.
+        
+        Return:
+            Its rule_set_hash, or None without a rule file
+        
+        """
+        
+        if not self.rule_file:
+            self._rule_entries = []
+            return None
+        
+        from services.rule_config import load_rule_file
+        
+        rule_set, self._rule_entries = load_rule_file(self.rule_file, logs_folder_path)
+        return rule_set
     
-    def _setup_rules(self, engine):
+    def _setup_rules(self, engine, duplicates=None, content_rule=None):
         """
         
         Configures rules engine by setting up extension rules for 
         each file category and fallback for unrecognized files.
         
+        Parameters:
+            duplicates (dict, optional): Result of find_duplicates, checked before every other rule
+            content_rule (ContentTypeRule, optional): Checked after the extension rules, before the fallback
+        
+        Rules from the rule file (see _load_rules) come right after the duplicate rule,
+        so a name pattern wins over the plain category of the file's extension.
+        
         """
         
+        if duplicates:
+            engine.add_rule(DuplicateRule(
+                name="Duplicate Rule",
+                description=f"Moves extra copies of a file to the '{DUPLICATES_FOLDER}' folder",
+                duplicates=duplicates,
+                base_destination=self.directory,
+                action=self.duplicate_action,
+                enabled=True
+            ))
+        
+        if self._rule_entries:
+            from services.rule_config import build_rules
+            for rule in build_rules(self._rule_entries, self.directory):
+                engine.add_rule(rule)
+            
         # Loop configured categories (not 'Others' since that is fallback)
         
         for category, extensions in self.file_categories.items():
@@ -85,6 +254,9 @@ class FileOrganizer:
             )
             engine.add_rule(extension_rule)
         
+        if content_rule is not None:
+            engine.add_rule(content_rule)
+            
         # Add the fallback rule for any file not handled by the above rules
         
         fallback_rule = FallbackRule(
@@ -96,33 +268,47 @@ class FileOrganizer:
         engine.add_rule(fallback_rule)
         
         
-    def organize_files(self):
+    def organize_files(self, dry_run=False, profile=False, on_progress=None, cancel_event=None, extra_report=None):
         """
         
         Organizes files by moving them based on their on their type into category folders.
-        Also generate an audit report that goes into the 'log' folder
+        Also generate an audit report that goes into the 'log' folder.
+        
+        Runs organize_files_async() to the end, see there for the parameters.
         
         """
-        logger.info(f"Starting file organizer in: {self.directory}")
         
-        # Collect  files from the selected directory
+        return asyncio.run(self.organize_files_async(dry_run, profile, on_progress, cancel_event, extra_report))
+    
+    async def organize_files_async(self, dry_run=False, profile=False, on_progress=None, cancel_event=None,
+                                   extra_report=None):
+        """
         
-        file_list = self._collect_files()
-
-        logger.info(f"Collected {len(file_list)} files for processing.")
+        Organizes files through a pipeline: scan -> classify -> move -> report.
         
-        # Init the rules engine
+        Stages are joined by small bounded queues and pass chunks of files along, so
+        the first files move while the scan is still going and memory stays flat
+        however big the directory is. Every blocking filesystem call runs on a worker
+        thread, never on the event loop.
         
-        engine = RulesEngine()
-        self._setup_rules(engine)
+        Parameters:
+            dry_run (bool): Only build the plan and write it to the 'plan' report, nothing is moved
+            profile (bool): Run under cProfile and tracemalloc ('profile.pstats' in the logs folder),
+                            turns metrics on as well
+            on_progress (callable, optional): Gets throttled progress events (dicts with the
+                                              phase, files and bytes done and the totals)
+            cancel_event (threading.Event, optional): Set it to stop the run between two files,
+                                                      files not reached yet are left for the next run
+            extra_report (optional): Also gets every report record (anything with append(),
+                                     e.g. the merged report of a sharded run)
         
-        # Process the files using our 'Rules' and collect the reports
+        Return:
+            PlanTotals of what was (or would have been) carried out (len() and summary())
         
-        report_data = []
-
-        engine.process_files(file_list, report_data)
+        """
+        logger.info(f"Starting file organizer in: {self.directory}")
         
-        # Generate the .CSV and ensure the 'logs' folder is in the directory
+        # Ensure the 'logs' folder is in the directory
         
         logs_folder_path = os.path.join(self.directory, LOGS_FOLDER)
         
@@ -130,12 +316,383 @@ class FileOrganizer:
             os.makedirs(logs_folder_path)
             logger.info(f"Created logs folder:  {logs_folder_path}")
             
-        # Define the CSV report filepath inside of our 'logs' folder
+        # Without metrics every hook is a no-op
+        
+        metrics = Metrics() if self.metrics or profile else NULL_METRICS
+        extra = None
+        
+        if profile:
+            from services.metrics import Profiler
+            
+            with Profiler(logs_folder_path) as profiler:
+                plan = await self._organize(logs_folder_path, dry_run, metrics, on_progress, cancel_event, extra_report)
+            extra = {"memory": profiler.memory}
+        else:
+            plan = await self._organize(logs_folder_path, dry_run, metrics, on_progress, cancel_event, extra_report)
+            
+        if metrics.enabled:
+            metrics.dump(os.path.join(logs_folder_path, METRICS_FILENAME), extra)
+            
+        # Kept for callers that combine several runs (services/shards.py)
+        
+        self.last_metrics = metrics.to_dict()
+            
+        return plan
+    
+    def _dedupe(self, logs_folder_path, file_list, metrics):
+        with metrics.phase("dedupe"):
+            file_list = list(file_list)
+            from services.dedupe import HashCache, find_duplicates
+            
+            with HashCache(os.path.join(logs_folder_path, HASH_CACHE_FILENAME)) as cache:
+                duplicates = find_duplicates(file_list, cache)
+        return file_list, duplicates
+    
+    def _content_sniffing(self, logs_folder_path):
+        """
+        
+        Return:
+            A tuple: (SniffCache, ContentTypeRule), or (None, None) when sniffing is off
+        
+        """
         
-        csv_filepath = os.path.join(logs_folder_path, "report.csv")
+        if not self.sniff_content:
+            return None, None
         
-        logger.info(f"CSV report will be generated at:  {csv_filepath}")
+        from services.content_sniff import ContentTypeRule, SniffCache
         
-        # Generate the report
+        cache = SniffCache(os.path.join(logs_folder_path, SNIFF_CACHE_FILENAME))
+        content_rule = ContentTypeRule(
+            name="Content Type Rule",
+            description="Moves files with an unknown extension by what their first bytes look like",
+            base_destination=self.directory,
+            file_categories=self.file_categories,
+            cache=cache,
+            enabled=True
+        )
+        return cache, content_rule
+    
+    async def _organize(self, logs_folder_path, dry_run, metrics, on_progress=None, cancel_event=None,
+                        extra_report=None, continue_journal=False):
+        """
         
-        generate_CSV_report(report_data, csv_filename=csv_filepath)
\ No newline at end of file
+        The run itself: scan, (dedupe), then the classify/move/report pipeline.
+        
+        With 'continue_journal' the moves are appended to the existing journal instead of
+        starting a new one (resume), so a rollback still covers the whole run.
+        
+        """
+        
+        loop = asyncio.get_running_loop()
+        
+        rule_set = self._load_rules(logs_folder_path)
+        
+        index = None
+        if self.incremental:
+            from services.scan_index import ScanIndex, config_hash
+            
+            index = ScanIndex(
+                os.path.join(logs_folder_path, SCAN_INDEX_FILENAME),
+                config_hash(self.file_categories, self.excluded_items, self.excluded_ext, self.year_range,
+                            self.sniff_content, rule_set)
+            )
+        
+        if on_progress is not None:
+            on_progress(phase_event("Scanning"))
+        
+        scan_filter = self._scan_filter()
+        
+        # One thread per stage: scan feeding, classify, move and report
+        
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="pipeline") as executor:
+            
+            # Collect  files from the selected directory. Either way they stream to the rules
+            # while the scan is still running (timed as part of 'plan')
+            
+            if self.recursive:
+                file_list = self._walk_files(index, scan_filter)
+                logger.info(f"Walking sub folders with {self.scan_workers} workers.")
+            else:
+                file_list = self._scan_files(index, scan_filter)
+                logger.info(f"Scanning {self.directory}, files are organized as they are found.")
+            
+            # Duplicates have to be known before any rule runs, so the whole list is needed here
+            
+            duplicates = None
+            if self.dedupe:
+                file_list, duplicates = await loop.run_in_executor(
+                    executor, self._dedupe, logs_folder_path, file_list, metrics
+                )
+            
+            # Init the rules engine
+            
+            sniff_cache, content_rule = self._content_sniffing(logs_folder_path)
+            
+            engine = RulesEngine()
+            self._setup_rules(engine, duplicates, content_rule)
+            engine.compile()
+            
+            # Every chunk is planned against the same names, so two chunks never pick the same destination
+            
+            destinations = DestinationIndex(self.collision_policy)
+            
+            # Report records are written while the moves happen, not all at the end
+            
+            report_sink = open_report_sink(logs_folder_path, "plan" if dry_run else "report", self.report_format)
+            
+            logger.info(f"Report will be generated at:  {report_sink.filename}")
+            
+            report = report_sink if extra_report is None else TeeReport(report_sink, extra_report)
+            
+            # Every chunk's intents are on disk before its first file moves
+            
+            journal = None
+            next_id = 0
+            if self.journal_moves and not dry_run:
+                journal_path = os.path.join(logs_folder_path, JOURNAL_FILENAME)
+                if continue_journal:
+                    next_id = next_move_id(journal_path)
+                    journal = MoveJournal.reopen(journal_path)
+                else:
+                    journal = MoveJournal.start(journal_path)
+                
+            # Totals grow as chunks get planned
+            
+            totals = PlanTotals()
+            progress = ProgressLogger(0, 0, label="Moving", on_progress=on_progress)
+            
+            stop = threading.Event()
+            
+            def stopped():
+                return stop.is_set() or (cancel_event is not None and cancel_event.is_set())
+            
+            def classify(files):
+                with metrics.phase("plan"):
+                    plan = engine.plan(files, metrics, destinations)
+                    
+                totals.add(plan)
+                progress.total_files = len(totals)
+                progress.total_bytes = totals.summary()["total_bytes"]
+                return files, plan
+            
+            def move(chunk):
+                nonlocal next_id
+                
+                files, plan = chunk
+                
+                if dry_run:
+                    return plan.to_records()
+                
+                ids = list(range(next_id, next_id + len(plan)))
+                next_id += len(plan)
+                
+                records = []
+                with metrics.phase("execute"):
+                    if journal is not None:
+                        journal.intend(plan, ids)
+                        
+                    execute_plan(plan, records, workers=self.move_workers, verify=self.verify_copies,
+                                 journal=JournalIds(journal, ids) if journal is not None else None,
+                                 metrics=metrics, progress=progress, cancel_event=cancel_event)
+                    
+                # The index learns a chunk once its moves are done, never anything from a dry run
+                
+                if index is not None:
+                    moved = {record["original_path"] for record in records if record["collision"] not in SKIPPED}
+                    index.record(files, plan, moved)
+                return records
+            
+            def write(records):
+                with metrics.phase("report"):
+                    for record in records:
+                        report.write(record)
+                        
+            files_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_CHUNKS)
+            plans_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_CHUNKS)
+            records_queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_CHUNKS)
+            
+            try:
+                with report_sink:
+                    await run_stages([
+                        feed_chunks(file_list, files_queue, executor, PIPELINE_FIRST_CHUNK, PIPELINE_CHUNK_SIZE,
+                                    stopped),
+                        run_stage(files_queue, plans_queue, executor, classify),
+                        run_stage(plans_queue, records_queue, executor, move),
+                        run_stage(records_queue, None, executor, write),
+                    ], stop)
+            finally:
+                if journal is not None:
+                    journal.close()
+                if sniff_cache is not None:
+                    sniff_cache.close()
+                    
+        if not dry_run:
+            progress.finish()
+            
+        # The walk is finished once the pipeline is, so every skip has been counted
+        
+        scan_filter.report(metrics)
+        
+        if content_rule is not None:
+            content_rule.report(metrics)
+            
+        metrics.count("destination_folders_listed", destinations.stats["folders_listed"])
+        metrics.count("destination_names_listed", destinations.stats["names_listed"])
+        
+        summary = totals.summary()
+        logger.info(
+            f"Planned {summary['files']} moves ({summary['total_bytes']} bytes): "
+            f"{summary['renames']} renames, {summary['cross_device_copies']} cross device copies "
+            f"({summary['cross_device_bytes']} bytes), {summary['directories_to_create']} folders to create, "
+            f"{summary['collision_skips']} files left in place by a name collision"
+        )
+        
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        if cancelled:
+            logger.info("Run cancelled, files not reached yet were left where they were")
+            
+        # Folder rows only after a full run: otherwise the next run re-reads every folder and
+        # only skips the files finished chunks recorded
+        
+        if index is not None:
+            if not dry_run and not cancelled:
+                index.save()
+            index.close()
+        
+        return totals
+    
+    def resume(self):
+        """
+        
+        Finish an interrupted run. First the moves in its journal: those that already
+        happened are only marked done, the rest are carried out and reported to the
+        'resume_report' report. The journal only holds the chunks that were planned before
+        the run stopped, so the rest of the directory is then organized like a normal run
+        would, its moves appended to the same journal (a rollback undoes the whole run).
+        
+        Return:
+            Number of files moved from the journal
+        
+        """
+        
+        logs_folder_path = os.path.join(self.directory, LOGS_FOLDER)
+        journal_path = os.path.join(logs_folder_path, JOURNAL_FILENAME)
+        
+        if not os.path.exists(journal_path):
+            raise Exception(f"Error: no move journal found at {journal_path}")
+        
+        plan, ids, finished = pending_moves(journal_path)
+        
+        logger.info(f"Resuming: {len(finished)} moves already happened, {len(plan)} still to do")
+        
+        with MoveJournal.reopen(journal_path) as journal:
+            for move_id in finished:
+                journal.done(move_id)
+                
+            with open_report_sink(logs_folder_path, "resume_report", self.report_format) as report_sink:
+                moved = execute_plan(plan, report_sink, workers=self.move_workers, verify=self.verify_copies,
+                                     journal=JournalIds(journal, ids))
+                
+        # Files the interrupted run never got to plan, same journal so it stays one run
+        
+        metrics = Metrics() if self.metrics else NULL_METRICS
+        rest = asyncio.run(self._organize(logs_folder_path, False, metrics, continue_journal=True))
+        if metrics.enabled:
+            metrics.dump(os.path.join(logs_folder_path, METRICS_FILENAME))
+        logger.info(f"Resume finished: {moved} journaled moves, {len(rest)} files the run never reached")
+        
+        return moved
+            
+    def rollback(self):
+        """
+        
+        Undo the last journaled run: every moved file goes back to where it was.
+        
+        Return:
+            Number of files put back
+        
+        """
+        
+        journal_path = os.path.join(self.directory, LOGS_FOLDER, JOURNAL_FILENAME)
+        
+        if not os.path.exists(journal_path):
+            raise Exception(f"Error: no move journal found at {journal_path}")
+        
+        return rollback(journal_path, self.directory, workers=self.move_workers)
+    
+    def watch(self, interval_ms=WATCH_INTERVAL_MS, debounce_ms=WATCH_DEBOUNCE_MS, stop_event=None, use_inotify=True):
+        """
+        
+        Keep running and organize files as they land in the directory (top level only).
+        Uses inotify on Linux and polling elsewhere. Files are picked up once they have been
+        quiet for 'debounce_ms' and the rules run on them in batches every 'interval_ms'.
+        Report records go to the 'watch_report' report in the logs folder.
+        
+        Parameters:
+            interval_ms (int): Time between batches
+            debounce_ms (int): Quiet time before a written file is handled
+            stop_event (threading.Event, optional): Set it to stop watching (runs until
+                                                    interrupted otherwise)
+            use_inotify (bool): False forces the polling watcher
+        
+        """
+        
+        stop_event = stop_event or threading.Event()
+        
+        logs_folder_path = os.path.join(self.directory, LOGS_FOLDER)
+        os.makedirs(logs_folder_path, exist_ok=True)
+        
+        # Rules are compiled once for the whole watch
+        
+        self._load_rules(logs_folder_path)
+        
+        from services.watcher import BatchWatcher, open_watcher
+        
+        sniff_cache, content_rule = self._content_sniffing(logs_folder_path)
+        
+        engine = RulesEngine()
+        self._setup_rules(engine, content_rule=content_rule)
+        engine.compile()
+        
+        scan_filter = self._scan_filter()
+        
+        logger.info(f"Watching {self.directory} (batches every {interval_ms} ms)")
+        
+        with open_report_sink(logs_folder_path, "watch_report", self.report_format) as report_sink, \
+             open_watcher(self.directory, use_inotify) as watcher:
+            
+            batches = BatchWatcher(self.directory, watcher, interval_ms, debounce_ms, stop_event)
+            
+            try:
+                for paths in batches:
+                    files = []
+                    
+                    for path in paths:
+                        if scan_filter.rejects_name(os.path.basename(path)) is not None:
+                            continue
+                        try:
+                            stat_result = os.stat(path)
+                            file = FileItem(path, owner=self.owners.owner_of(stat_result), stat_result=stat_result)
+                        except OSError:
+                            
+                            # Gone again before we got to it (temp files, quick renames)
+                            
+                            continue
+                        
+                        if not scan_filter.too_old(file.mtime):
+                            files.append(file)
+                        
+                    # Listed again every batch, anything could have landed in those folders since
+                    
+                    plan = engine.plan(files, destinations=DestinationIndex(self.collision_policy))
+                    moved = execute_plan(plan, report_sink, workers=self.move_workers, verify=self.verify_copies)
+                    
+                    if sniff_cache is not None:
+                        sniff_cache.save()
+                        
+                    logger.info(f"Watch batch: {moved} of {len(paths)} files organized")
+            except KeyboardInterrupt:
+                logger.info("Watch stopped")
+            finally:
+                if sniff_cache is not None:
+                    sniff_cache.close()
@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import errno
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOURNAL_SYNC_RECORDS, JOURNAL_SYNC_INTERVAL, MOVE_WORKERS
+from services.move_plan import MovePlan, PlannedMove
+from services.transfer import transfer_file
+
+logger = logging.getLogger(__name__)
+
+
+class MoveJournal:
+    def __init__(self, filename, sync_records=JOURNAL_SYNC_RECORDS, sync_interval=JOURNAL_SYNC_INTERVAL):
+        """
+
+        Append-only write-ahead journal of a run's moves (JSON lines).
+
+        Every move is written as an "intent" (all fields of the PlannedMove) and fsynced
+        before anything on disk changes. Outcomes ("done", "failed", "cancelled", "undone")
+        are buffered and fsynced every 'sync_records' records or 'sync_interval' seconds.
+        A lost outcome is harmless: resume and rollback look at the disk to see whether the
+        move happened.
+
+        Use MoveJournal.start() for a new run and MoveJournal.reopen() to keep writing
+        to an existing one (a resumed run appends its moves after next_move_id(), so a
+        rollback still covers the whole run). start() refuses to replace the journal of
+        a run that still has moves to finish (see unfinished_moves()).
+
+        """
+
+        self.filename = filename
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        self._file = None
+        self._buffer = []
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, filename, **kwargs):
+        pending = unfinished_moves(filename)
+        if pending:
+            raise Exception(f"Error: {filename} holds an interrupted run with {pending} moves left, "
+                            f"resume it or roll it back first")
+
+        journal = cls(filename, **kwargs)
+        journal._file = open(filename, "w")
+        journal._append([{"op": "run", "started": time.time()}])
+        journal.sync()
+        return journal
+
+    @classmethod
+    def reopen(cls, filename, **kwargs):
+        journal = cls(filename, **kwargs)
+        journal._file = open(filename, "a")
+        return journal
+
+    def _append(self, records):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def intend(self, plan, ids=None):
+        """
+
+        Write the intent of every move and fsync, before the first move happens.
+
+        Parameters:
+            plan: MovePlan about to be executed
+            ids (list, optional): Journal id per plan position (defaults to the position)
+
+        """
+
+        with self._lock:
+            self._append(
+                {"op": "intent", "id": ids[position] if ids else position, "move": list(move)}
+                for position, move in enumerate(plan)
+            )
+            self._sync()
+
+    def _outcome(self, op, move_id):
+        with self._lock:
+            self._buffer.append({"op": op, "id": move_id})
+
+            if len(self._buffer) >= self.sync_records or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def done(self, move_id):
+        self._outcome("done", move_id)
+
+    def failed(self, move_id):
+        self._outcome("failed", move_id)
+
+    def cancelled(self, move_id):
+        self._outcome("cancelled", move_id)
+
+    def undone(self, move_id):
+        self._outcome("undone", move_id)
+
+    def _sync(self):
+        if self._buffer:
+            self._append(self._buffer)
+            self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class JournalIds:
+    def __init__(self, journal, ids):
+        """
+
+        Lets the executor report plan positions while the journal gets the original ids
+        (used when resuming, where the plan only holds the leftover moves).
+
+        """
+
+        self.journal = journal
+        self.ids = ids
+
+    def done(self, position):
+        self.journal.done(self.ids[position])
+
+    def failed(self, position):
+        self.journal.failed(self.ids[position])
+
+    def cancelled(self, position):
+        self.journal.cancelled(self.ids[position])
+
+
+def read_journal(filename):
+    """
+
+    Replay a journal file.
+
+    Return:
+        A tuple: (dict of id -> PlannedMove, dict of id -> last outcome or None)
+
+    """
+
+    moves = {}
+    outcomes = {}
+
+    with open(filename) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+
+                # A torn last line from a crash, nothing after it was written
+
+                break
+
+            if record["op"] == "intent":
+                moves[record["id"]] = PlannedMove(*record["move"])
+                outcomes.setdefault(record["id"], None)
+            elif record["op"] in ("done", "failed", "cancelled", "undone"):
+                outcomes[record["id"]] = record["op"]
+
+    return moves, outcomes
+
+
+def next_move_id(filename):
+    """
+
+    First id not used by the journal yet, for moves appended to it.
+
+    """
+
+    moves, _ = read_journal(filename)
+    return max(moves, default=-1) + 1
+
+
+def unfinished_moves(filename):
+    """
+
+    Number of journaled moves without an outcome whose source is still in place, i.e.
+    what a resume would still have to do (0 when there is no journal). Moves that
+    happened but lost their "done" in a crash don't count, neither do moves a cancelled
+    run left alone (they are "cancelled", the next run simply plans them again).
+
+    """
+
+    if not os.path.exists(filename):
+        return 0
+
+    moves, outcomes = read_journal(filename)
+    return sum(1 for move_id, move in moves.items() if outcomes[move_id] is None and os.path.lexists(move.source))
+
+
+def pending_moves(filename):
+    """
+
+    Moves of a journaled run that still have to happen, checked against the disk.
+
+    A move without a recorded outcome is finished if its source is gone and its
+    destination exists. A hard link that was made but whose source wasn't removed
+    yet only needs the unlink, so it is finished here too.
+
+    Return:
+        A tuple: (MovePlan of leftover moves, their journal ids, ids found already done)
+
+    """
+
+    moves, outcomes = read_journal(filename)
+    leftover = []
+    ids = []
+    finished = []
+
+    for move_id, move in moves.items():
+        if outcomes[move_id] is not None:
+            continue
+
+        source_exists = os.path.lexists(move.source)
+        destination_exists = os.path.lexists(move.destination)
+
+        if not source_exists:
+            if destination_exists:
+                finished.append(move_id)
+            else:
+                logger.error(f"Journal: '{move.source}' is neither at its source nor at '{move.destination}'")
+            continue
+
+        if move.link_target is not None and destination_exists and os.path.samefile(move.source, move.destination):
+            os.unlink(move.source)
+            finished.append(move_id)
+            continue
+
+        leftover.append(move)
+        ids.append(move_id)
+
+    return MovePlan(leftover), ids, finished
+
+
+def _prune_empty(folder, stop):
+    """
+
+    Remove 'folder' and its parents while they are empty, never going above 'stop'.
+
+    """
+
+    stop = os.path.abspath(stop)
+    folder = os.path.abspath(folder)
+
+    while folder != stop and folder.startswith(stop + os.sep):
+        try:
+            os.rmdir(folder)
+        except OSError:
+            return
+        folder = os.path.dirname(folder)
+
+
+def _reverse(move):
+    os.makedirs(os.path.dirname(move.source), exist_ok=True)
+
+    try:
+        os.rename(move.destination, move.source)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        transfer_file(move.destination, move.source)
+
+
+def rollback(filename, root, workers=MOVE_WORKERS):
+    """
+
+    Put every file of a journaled run back where it came from, in parallel.
+
+    Every move whose destination exists and whose source is free is reversed (this also
+    covers moves that happened but whose "done" was lost in a crash). Moves an interrupted
+    run never got to are marked undone as they are, a hard link it made without removing
+    the source yet is removed. Folders left empty by the rollback are removed, up to 'root'.
+
+    Parameters:
+        filename (str): Journal of the run
+        root (str): Organized directory (never removed)
+        workers (int): Threads doing the reverse moves
+
+    Return:
+        Number of files put back
+
+    """
+
+    moves, outcomes = read_journal(filename)
+
+    candidates = []
+    untouched = []
+
+    for move_id, move in moves.items():
+        if outcomes[move_id] not in (None, "done"):
+            continue
+
+        if not os.path.lexists(move.source):
+            if os.path.lexists(move.destination):
+                candidates.append((move_id, move))
+        elif outcomes[move_id] is None:
+            untouched.append((move_id, move))
+
+    restored = 0
+    lock = threading.Lock()
+
+    with MoveJournal.reopen(filename) as journal:
+
+        # Still at the source, so nothing to undo (a half done hard link loses the link)
+
+        for move_id, move in untouched:
+            if move.link_target is not None and os.path.lexists(move.destination) \
+                    and os.path.samefile(move.source, move.destination):
+                os.unlink(move.destination)
+            journal.undone(move_id)
+
+        def undo(item):
+            nonlocal restored
+            move_id, move = item
+
+            try:
+                _reverse(move)
+            except Exception as e:
+                logger.info(f"Rollback could not restore '{move.source}'. Error: {e}")
+                return
+
+            journal.undone(move_id)
+            _prune_empty(os.path.dirname(move.destination), root)
+
+            with lock:
+                restored += 1
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rollback") as pool:
+            list(pool.map(undo, candidates))
+
+    logger.info(f"Rollback restored {restored} of {len(candidates)} files")
+    return restored
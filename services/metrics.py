@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# Shared "do nothing" context so a disabled timer costs one method call
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class NullMetrics:
+    """
+    Instrumentation switched off: every call returns straight away.
+    """
+
+    enabled = False
+
+    def count(self, name, amount=1):
+        pass
+
+    def add_bytes(self, rule, amount):
+        pass
+
+    def observe(self, operation, seconds):
+        pass
+
+    def timer(self, operation):
+        return _NULL_CONTEXT
+
+    def phase(self, name):
+        return _NULL_CONTEXT
+
+    def to_dict(self):
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+class _Timer:
+    __slots__ = ("metrics", "operation", "start")
+
+    def __init__(self, metrics, operation):
+        self.metrics = metrics
+        self.operation = operation
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.operation, time.perf_counter() - self.start)
+        return False
+
+
+class _Phase:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+
+        with self.metrics._lock:
+            phase = self.metrics.phases.setdefault(self.name, {"wall_s": 0.0, "cpu_s": 0.0, "runs": 0})
+            phase["wall_s"] += wall
+            phase["cpu_s"] += cpu
+            phase["runs"] += 1
+        return False
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        """
+
+        Counters, per phase wall/CPU timers, latency histograms per operation type
+        (rename, copy, mkdir, ...) and bytes moved per rule. Safe to use from worker threads.
+
+        Latencies are bucketed by powers of two in microseconds, so the histograms
+        stay the same size no matter how many files go through.
+
+        """
+
+        self.counters = {}
+        self.phases = {}
+        self.histograms = {}
+        self.bytes_per_rule = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_bytes(self, rule, amount):
+        with self._lock:
+            self.bytes_per_rule[rule] = self.bytes_per_rule.get(rule, 0) + amount
+
+    def observe(self, operation, seconds):
+        bucket = int(seconds * 1e6).bit_length()
+
+        with self._lock:
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "buckets": {}}
+
+            histogram["count"] += 1
+            histogram["total_s"] += seconds
+            if seconds > histogram["max_s"]:
+                histogram["max_s"] = seconds
+            histogram["buckets"][bucket] = histogram["buckets"].get(bucket, 0) + 1
+
+    def timer(self, operation):
+        """Time one operation into its latency histogram (use as a with-block)."""
+        return _Timer(self, operation)
+
+    def phase(self, name):
+        """Time a whole phase of the run, wall and CPU (use as a with-block)."""
+        return _Phase(self, name)
+
+    def to_dict(self):
+        with self._lock:
+            histograms = {}
+            for operation, histogram in self.histograms.items():
+                histograms[operation] = {
+                    "count": histogram["count"],
+                    "total_s": histogram["total_s"],
+                    "mean_us": histogram["total_s"] / histogram["count"] * 1e6,
+                    "max_us": histogram["max_s"] * 1e6,
+
+                    # Bucket k holds latencies below 2^k microseconds
+
+                    "buckets_us": {f"<{2 ** bucket}": count for bucket, count in sorted(histogram["buckets"].items())},
+                }
+
+            return {
+                "counters": dict(self.counters),
+                "phases": {name: dict(phase) for name, phase in self.phases.items()},
+                "latency": histograms,
+                "bytes_per_rule": dict(self.bytes_per_rule),
+            }
+
+    def merge(self, summary):
+        """
+
+        Add another run's to_dict() output into these metrics (e.g. one shard of a batch run).
+
+        """
+
+        with self._lock:
+            for name, amount in summary.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+            for rule, amount in summary.get("bytes_per_rule", {}).items():
+                self.bytes_per_rule[rule] = self.bytes_per_rule.get(rule, 0) + amount
+
+            for name, other in summary.get("phases", {}).items():
+                phase = self.phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "runs": 0})
+                for key in phase:
+                    phase[key] += other[key]
+
+            for operation, other in summary.get("latency", {}).items():
+                histogram = self.histograms.get(operation)
+                if histogram is None:
+                    histogram = self.histograms[operation] = {"count": 0, "total_s": 0.0, "max_s": 0.0, "buckets": {}}
+
+                histogram["count"] += other["count"]
+                histogram["total_s"] += other["total_s"]
+                histogram["max_s"] = max(histogram["max_s"], other["max_us"] / 1e6)
+
+                # "<2^k" back to bucket k
+
+                for label, count in other["buckets_us"].items():
+                    bucket = int(label[1:]).bit_length() - 1
+                    histogram["buckets"][bucket] = histogram["buckets"].get(bucket, 0) + count
+
+    def dump(self, filename, extra=None):
+        """
+
+        Write the summary as JSON (e.g. logs/metrics.json).
+
+        """
+
+        summary = self.to_dict()
+        if extra:
+            summary.update(extra)
+
+        with open(filename, "w") as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Metrics written to: {filename}")
+
+
+class Profiler:
+    def __init__(self, folder, top=25):
+        """
+
+        Wraps a run in cProfile and tracemalloc. On exit the profile is saved as
+        'profile.pstats' in 'folder' and memory figures are kept in self.memory.
+
+        cProfile only sees the thread that enables it, so every thread started during
+        the run (pipeline stages, scan, move and sniff pools) gets its own profiler;
+        they are merged into the one profile.pstats.
+
+        Parameters:
+            folder (str): Where profile.pstats goes
+            top (int): Number of biggest allocation sites to keep
+
+        """
+
+        self.folder = folder
+        self.top = top
+        self.memory = {}
+
+    def __enter__(self):
+
+        # Only profiled runs load these
+
+        import cProfile
+        import tracemalloc
+
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._thread_profiles = []
+        lock = threading.Lock()
+
+        # Runs once per new thread, on its first profiling event, and hands the thread to cProfile
+
+        def profile_thread(frame, event, arg):
+            profile = cProfile.Profile()
+            with lock:
+                self._thread_profiles.append(profile)
+            profile.enable()
+
+        threading.setprofile(profile_thread)
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        import pstats
+        import tracemalloc
+
+        threading.setprofile(None)
+        self._profile.disable()
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        self.memory = {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_allocations": [
+                {"where": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:self.top]
+            ],
+        }
+
+        stats = pstats.Stats(self._profile)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+
+        path = os.path.join(self.folder, "profile.pstats")
+        stats.dump_stats(path)
+        logger.info(f"Profile of {len(self._thread_profiles) + 1} threads written to: {path} "
+                    f"(open with: python -m pstats {path})")
+        return False
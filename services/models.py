@@ -1,64 +1,113 @@
 import os
 import datetime
-import getpass
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def default_owner():
+    """
+    Return the current system user, looked up only once per process.
+    """
+    import getpass
+    return getpass.getuser()
+
 
 class FileItem:
-    def __init__(self, path, owner=None):
+
+    # Slots keep per-file memory small when a scan produces millions of items
+
+    __slots__ = ("path", "name", "extension", "size", "ctime", "mtime",
+                 "device", "inode", "owner", "_created", "_modified")
+
+    def __init__(self, path, owner=None, stat_result=None):
         """
         Represents a single file in the system with our metadata.
-        
+
         Parameters:
             path (str): Full file path (e.g. "/home/user/photos/photo.jpeg")
-            owner (str, optional): Logical owner of the file (team, project, user) 
+            owner (str, optional): Logical owner of the file (team, project, user)
                                                     Defaults to current system user.
+            stat_result (os.stat_result, optional): Already fetched stat for the path.
+                                                    When missing a single os.stat() is done.
         """
-        
+
     #  Full path to file
 
         self.path = path
-        
+
     #  Extract just the filename (e.g. photo.jpg)
-    
+
         self.name = os.path.basename(path)
-        
+
     #  FIle extension (e.g. "jpeg"), normalized to lowercase for consistency
 
         self.extension = os.path.splitext(self.name)[1].lower()
-        
+
+    #  One stat call gives us size and both timestamps
+
+        if stat_result is None:
+            stat_result = os.stat(path)
+
     #  Get files bytes (e.g. "skip tiny files" or "group by size")
-    
-        self.size = os.path.getsize(path)
-        
-    #  Create timestamp (datetime object) - help with chronology
-    
-        self.created = datetime.datetime.fromtimestamp(os.path.getctime(path))
-        
-    #  Last modification timestamp (datetime object) - useful for "recently updated" rules
-    
-        self.modified = datetime.datetime.fromtimestamp(os.path.getmtime(path))
-        
+
+        self.size = stat_result.st_size
+
+    #  Raw timestamps (float seconds), datetime objects are only built on access
+
+        self.ctime = stat_result.st_ctime
+        self.mtime = stat_result.st_mtime
+        self._created = None
+        self._modified = None
+
+    #  Device and inode, used to spot cheap same-filesystem renames
+
+        self.device = stat_result.st_dev
+        self.inode = stat_result.st_ino
+
     # Logical owner (defaults to current system user if not provided)
-    
+
     # This allows business-like ownership (teams, projects, individuals)
-    
-        self.owner = owner if owner else getpass.getuser()
-        
+
+        self.owner = owner if owner else default_owner()
+
+    @classmethod
+    def from_stat(cls, path, stat_result, owner=None):
+        """
+        Build a FileItem from a stat result we already have (e.g. from os.scandir).
+        No extra syscalls are made.
+        """
+        return cls(path, owner=owner, stat_result=stat_result)
+
+    @property
+    def created(self):
+        """Create timestamp (datetime object) - help with chronology"""
+        if self._created is None:
+            self._created = datetime.datetime.fromtimestamp(self.ctime)
+        return self._created
+
+    @property
+    def modified(self):
+        """Last modification timestamp (datetime object) - useful for "recently updated" rules"""
+        if self._modified is None:
+            self._modified = datetime.datetime.fromtimestamp(self.mtime)
+        return self._modified
+
     def year_created(self):
         """Return the year the file was created (int)"""
         return self.created.year
-    
+
     def month_created(self):
         """Return the month the file was created (int, 1-12)"""
         return self.created.month
-    
+
     def day_created(self):
         """Return the day of the month the file was created (int, 1-31)"""
         return self.created.day
-    
+
     def __repr__(self):
         """
         Dev friendly (str) representation of the FileItem.
         Shows key metadata for quick debugging.
         """
         return (f"<FileItem name={self.name}, ext={self.extension}, >"
-                f"size={self.size}, bytes, owner={self.owner}")
\ No newline at end of file
+                f"size={self.size}, bytes, owner={self.owner}")
@@ -0,0 +1,181 @@
+import os
+from collections import namedtuple
+
+# One decided move. Nothing on disk has been touched when this is built.
+# With a link_target the destination becomes a hard link to that file and the source is removed.
+# 'collision' is the DestinationIndex outcome when the rule's name was already taken (None otherwise).
+
+PlannedMove = namedtuple("PlannedMove",
+                         ["source", "destination", "rule", "size", "same_device", "device", "link_target",
+                          "collision"],
+                         defaults=(None, None, None))
+
+
+class DestinationProbe:
+    def __init__(self):
+        """
+        
+        Answers "which device will this folder live on?" and "does it exist yet?"
+        for destination folders while a plan is built. Every folder is only
+        looked at once, so the cost grows with the number of folders, not files.
+        
+        """
+        
+        self._devices = {}
+        self.missing = set()
+        
+    def device_of(self, folder):
+        """
+        
+        Return st_dev of the folder, or of its nearest existing parent when it
+        hasn't been created yet. Missing folders are remembered in self.missing.
+        
+        """
+        
+        device = self._devices.get(folder)
+        if device is not None:
+            return device
+        
+        try:
+            device = os.stat(folder).st_dev
+        except (FileNotFoundError, NotADirectoryError):
+            
+            # NotADirectoryError: a file sits where a parent folder should be, the moves
+            # into it fail one by one in the executor
+            
+            self.missing.add(folder)
+            parent = os.path.dirname(folder)
+            
+            # Reached the top without finding anything, nothing more to check
+            
+            if not parent or parent == folder:
+                return None
+            device = self.device_of(parent)
+            
+        self._devices[folder] = device
+        return device
+
+
+class MovePlan:
+    def __init__(self, moves, directories_to_create=(), skipped=()):
+        """
+        
+        Immutable list of planned moves and the folders that running them will create.
+        
+        Parameters:
+            moves: iterable of PlannedMove
+            directories_to_create: folders that don't exist yet
+            skipped: PlannedMoves a name collision left where they are, only reported
+        
+        """
+        
+        self._moves = tuple(moves)
+        self._directories = frozenset(directories_to_create)
+        self._skipped = tuple(skipped)
+        
+    @property
+    def moves(self):
+        return self._moves
+    
+    @property
+    def directories_to_create(self):
+        return self._directories
+    
+    @property
+    def skipped(self):
+        return self._skipped
+    
+    def __iter__(self):
+        return iter(self._moves)
+    
+    def __len__(self):
+        return len(self._moves)
+    
+    def summary(self):
+        """
+        
+        Cost of the plan without running it.
+        
+        Return:
+            dict with file/byte totals, cheap renames vs. cross device copies,
+            files left in place by a name collision and the number of folders to create
+        
+        """
+        
+        renames = 0
+        rename_bytes = 0
+        copies = 0
+        copy_bytes = 0
+        
+        for move in self._moves:
+            if move.same_device:
+                renames += 1
+                rename_bytes += move.size
+            else:
+                copies += 1
+                copy_bytes += move.size
+                
+        return {
+            "files": len(self._moves),
+            "total_bytes": rename_bytes + copy_bytes,
+            "renames": renames,
+            "rename_bytes": rename_bytes,
+            "cross_device_copies": copies,
+            "cross_device_bytes": copy_bytes,
+            "collision_skips": len(self._skipped),
+            "directories_to_create": len(self._directories),
+        }
+    
+    def to_records(self):
+        """
+        
+        Plan as report records (same columns as the run report plus size and device info),
+        files a name collision leaves in place last.
+        
+        """
+        
+        return [
+            {
+                "file_name": os.path.basename(move.source),
+                "original_path": move.source,
+                "destination": move.destination,
+                "rule_applied": move.rule,
+                "size": move.size,
+                "same_device": move.same_device,
+                "collision": move.collision,
+            }
+            for move in self._moves + self._skipped
+        ]
+
+
+class PlanTotals:
+    def __init__(self):
+        """
+        
+        Running totals over the chunks of a pipelined run. Answers len() and summary()
+        like a MovePlan without keeping the moves, so memory doesn't grow with the run.
+        
+        """
+        
+        self._totals = {
+            "files": 0,
+            "total_bytes": 0,
+            "renames": 0,
+            "rename_bytes": 0,
+            "cross_device_copies": 0,
+            "cross_device_bytes": 0,
+            "collision_skips": 0,
+        }
+        self._directories = set()
+        
+    def add(self, plan):
+        summary = plan.summary()
+        for key in self._totals:
+            self._totals[key] += summary[key]
+        self._directories.update(plan.directories_to_create)
+        
+    def __len__(self):
+        return self._totals["files"]
+    
+    def summary(self):
+        return dict(self._totals, directories_to_create=len(self._directories))
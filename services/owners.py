@@ -0,0 +1,114 @@
+import json
+import logging
+
+from services.models import default_owner
+
+# pwd and grp only exist on POSIX, elsewhere uids are used as they are
+
+try:
+    import pwd
+    import grp
+except ImportError:
+    pwd = None
+    grp = None
+
+logger = logging.getLogger(__name__)
+
+OWNER_SOURCES = ("user", "uid", "mapping")
+
+
+def load_owner_map(filename):
+    """
+
+    Read a mapping file, e.g.:
+
+        {"users": {"1000": "design", "bob": "finance"}, "groups": {"video": "media"}}
+
+    Users and groups can be given by name or by id.
+
+    Return:
+        A tuple: (dict of uid -> owner, dict of gid -> owner)
+
+    """
+
+    with open(filename) as f:
+        mapping = json.load(f)
+
+    def ids(section, lookup):
+        resolved = {}
+        for key, owner in mapping.get(section, {}).items():
+            if key.isdigit():
+                resolved[int(key)] = owner
+            elif lookup is not None:
+                try:
+                    resolved[lookup(key)] = owner
+                except KeyError:
+                    logger.warning(f"Owner map: unknown {section[:-1]} '{key}' ignored")
+        return resolved
+
+    users = ids("users", (lambda name: pwd.getpwnam(name).pw_uid) if pwd else None)
+    groups = ids("groups", (lambda name: grp.getgrnam(name).gr_gid) if grp else None)
+
+    return users, groups
+
+
+class OwnerResolver:
+    def __init__(self, source="user", owner_map=None):
+        """
+
+        Decides the owner folder of a file from its stat result.
+
+        Sources:
+            "user"     Whoever runs the organizer (the old behaviour)
+            "uid"      The file's real owner, st_uid looked up with pwd
+            "mapping"  The team from the mapping file (uid first, then gid), falling
+                       back to the "uid" name for files nobody mapped
+
+        Every lookup is cached by id, including misses: an unknown uid costs one
+        failing pwd call per run and is then used as a plain number.
+
+        Parameters:
+            source (str): One of OWNER_SOURCES
+            owner_map (str, optional): JSON mapping file, required for "mapping"
+
+        """
+
+        if source not in OWNER_SOURCES:
+            raise ValueError(f"Unsupported owner source: {source}")
+        if source == "mapping" and not owner_map:
+            raise ValueError("Owner source 'mapping' needs an owner map file")
+
+        self.source = source
+        self.users, self.groups = load_owner_map(owner_map) if source == "mapping" else ({}, {})
+        self._names = {}
+        self._owners = {}
+
+    def user_name(self, uid):
+        name = self._names.get(uid)
+
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name if pwd else str(uid)
+            except KeyError:
+                name = str(uid)
+            self._names[uid] = name
+
+        return name
+
+    def owner_of(self, stat_result):
+        if self.source == "user":
+            return default_owner()
+
+        uid = stat_result.st_uid
+
+        if self.source == "uid":
+            return self.user_name(uid)
+
+        key = (uid, stat_result.st_gid)
+        owner = self._owners.get(key)
+
+        if owner is None:
+            owner = self.users.get(uid) or self.groups.get(stat_result.st_gid) or self.user_name(uid)
+            self._owners[key] = owner
+
+        return owner
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+
+async def feed_chunks(items, outbox, executor, first_size, max_size, stopped):
+    """
+
+    First stage: walk a blocking iterable (e.g. the scanner) on a worker thread and
+    put its items on 'outbox' in chunks. Chunks start small so the next stages get
+    work right away, then double up to 'max_size'.
+
+    A full outbox blocks the worker thread, so a slow consumer slows the scan down
+    instead of letting items pile up. None is put last.
+
+    Parameters:
+        items: Iterable to consume (only touched from the worker thread)
+        outbox (asyncio.Queue): Bounded queue to the next stage
+        executor: Where the blocking iteration runs
+        first_size (int): Size of the first chunk
+        max_size (int): Largest chunk
+        stopped (callable): Returns True once the run should stop feeding
+
+    """
+
+    loop = asyncio.get_running_loop()
+
+    def put(chunk):
+        future = asyncio.run_coroutine_threadsafe(outbox.put(chunk), loop)
+
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stopped():
+                    future.cancel()
+                    return False
+
+    def produce():
+        size = first_size
+        chunk = []
+
+        try:
+            for item in items:
+                if stopped():
+                    return
+                chunk.append(item)
+
+                if len(chunk) >= size:
+                    if not put(chunk):
+                        return
+                    chunk = []
+                    size = min(size * 2, max_size)
+
+            if chunk:
+                put(chunk)
+        finally:
+
+            # A generator (the recursive walk) cancels its pending directories on close
+
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    await loop.run_in_executor(executor, produce)
+    await outbox.put(None)
+
+
+async def run_stage(inbox, outbox, executor, work):
+    """
+
+    Middle or last stage: take items from 'inbox' until None, run the blocking
+    'work(item)' on the executor and put what it returns on 'outbox' (if any).
+
+    """
+
+    loop = asyncio.get_running_loop()
+
+    while True:
+        item = await inbox.get()
+        if item is None:
+            break
+
+        result = await loop.run_in_executor(executor, work, item)
+
+        if outbox is not None:
+            await outbox.put(result)
+
+    if outbox is not None:
+        await outbox.put(None)
+
+
+async def run_stages(stages, stop):
+    """
+
+    Run every stage concurrently. When one fails, 'stop' is set so the feeding thread
+    lets go, the other stages are cancelled and the error is raised.
+
+    Parameters:
+        stages (list): Coroutines from feed_chunks / run_stage
+        stop (threading.Event): Checked by feed_chunks through its 'stopped' callable
+
+    """
+
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,100 @@
+import time
+import logging
+
+from config import LOG_PROGRESS_INTERVAL, PROGRESS_EVENT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def _human_bytes(amount):
+    for unit in ("B", "KB", "MB", "GB"):
+        if amount < 1024:
+            return f"{amount:.1f} {unit}"
+        amount /= 1024
+    return f"{amount:.1f} TB"
+
+
+def phase_event(phase, total_files=0, total_bytes=0):
+    """
+    
+    Progress event for the start of a phase, before any file is done.
+    
+    """
+    
+    return {"phase": phase, "files": 0, "total_files": total_files, "bytes": 0, "total_bytes": total_bytes}
+
+
+class ProgressLogger:
+    def __init__(self, total_files, total_bytes, interval=LOG_PROGRESS_INTERVAL, label="Progress",
+                 on_progress=None, event_interval=PROGRESS_EVENT_INTERVAL):
+        """
+        
+        Replaces a log line per file with one INFO line every 'interval' seconds:
+        files done, files/s, bytes/s and an ETA.
+        
+        A listener (e.g. the GUI) can get the same numbers as events, at most once every
+        'event_interval' seconds, so a busy run never waits on whoever is listening.
+        
+        Parameters:
+            total_files (int): Files expected
+            total_bytes (int): Bytes expected
+            interval (float): Min seconds between two progress lines
+            label (str): Start of the line, also the event's "phase"
+            on_progress (callable, optional): Called with a dict (see snapshot())
+            event_interval (float): Min seconds between two events
+        
+        """
+        
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.label = label
+        self.files = 0
+        self.bytes = 0
+        self._start = time.monotonic()
+        self._next = self._start + interval
+        self.on_progress = on_progress
+        self.event_interval = event_interval
+        self._next_event = self._start
+        
+    def update(self, files=1, size=0):
+        """
+        
+        Count finished work. Between two lines or events this costs only a clock read.
+        
+        """
+        
+        self.files += files
+        self.bytes += size
+        
+        now = time.monotonic()
+        if self.on_progress is not None and now >= self._next_event:
+            self._next_event = now + self.event_interval
+            self.on_progress(self.snapshot())
+            
+        if now >= self._next:
+            self._next = now + self.interval
+            self._log(now)
+            
+    def snapshot(self):
+        return {"phase": self.label, "files": self.files, "total_files": self.total_files,
+                "bytes": self.bytes, "total_bytes": self.total_bytes}
+        
+    def finish(self):
+        if self.on_progress is not None:
+            self.on_progress(self.snapshot())
+        self._log(time.monotonic())
+        
+    def _log(self, now):
+        elapsed = max(now - self._start, 1e-9)
+        files_per_second = self.files / elapsed
+        bytes_per_second = self.bytes / elapsed
+        
+        remaining = self.total_files - self.files
+        eta = f"{remaining / files_per_second:.0f}s" if files_per_second and remaining > 0 else "0s"
+        percent = self.files / self.total_files * 100 if self.total_files else 100.0
+        
+        logger.info(
+            f"{self.label}: {self.files}/{self.total_files} files ({percent:.1f}%), "
+            f"{files_per_second:.0f} files/s, {_human_bytes(bytes_per_second)}/s, ETA {eta}"
+        )
@@ -1,5 +1,11 @@
+import os
 import csv
+import json
+import time
 import logging
+import threading
+
+from config import REPORT_FORMAT, REPORT_BATCH_SIZE, REPORT_FLUSH_INTERVAL
 
 logger = logging.getLogger(__name__)
 
@@ -34,4 +40,226 @@ def generate_CSV_report(report_data, csv_filename="report.csv"):
         logger.info(f"CSV report generated: {csv_filename}")
         
     except Exception as e:
-        logger.error(f"Error generating CSV reports: {e}")
\ No newline at end of file
+        logger.error(f"Error generating CSV reports: {e}")
+
+# Cached "YYYY-MM-DDTHH:MM:SS" for the current second, so stamping a record is one time.time() call
+
+_second_cache = (None, "")
+
+
+def processed_timestamp():
+    """
+    
+    Cheap stand-in for datetime.datetime.now().isoformat() (same format, local time).
+    The date part is only formatted once per second.
+    
+    """
+    
+    global _second_cache
+    
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _second_cache
+    
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        _second_cache = (second, prefix)
+        
+    return f"{prefix}.{int((now - second) * 1000000):06d}"
+
+
+class ReportSink:
+    def __init__(self, filename, batch_size=REPORT_BATCH_SIZE, flush_interval=REPORT_FLUSH_INTERVAL):
+        """
+        
+        Writes report records while the run is going instead of holding them all until the end.
+        Records are buffered and written in batches, whenever 'batch_size' records are waiting
+        or 'flush_interval' seconds passed since the last write.
+        
+        Subclasses only implement _open(first_record) and _write_batch(records).
+        A sink can be used anywhere a report_data list was (it has append()).
+        
+        Parameters:
+            filename (str): Where the report is written
+            batch_size (int): Records buffered before a write
+            flush_interval (float): Max seconds a record waits in the buffer
+        
+        """
+        
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._buffer = []
+        self._opened = False
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        
+    def write(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            self.count += 1
+            
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+                
+    append = write
+    
+    def flush(self):
+        with self._lock:
+            self._flush()
+            
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        
+        if not self._buffer:
+            return
+        
+        if not self._opened:
+            self._open(self._buffer[0])
+            self._opened = True
+            
+        self._write_batch(self._buffer)
+        self._buffer = []
+        
+    def close(self):
+        self.flush()
+        
+        with self._lock:
+            if self._opened:
+                self._close()
+                logger.info(f"Report generated: {self.filename} ({self.count} records)")
+            else:
+                logger.info("No data to report")
+                
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    def _open(self, first_record):
+        raise NotImplementedError("This method must be overridden by subclasses.")
+    
+    def _write_batch(self, records):
+        raise NotImplementedError("This method must be overridden by subclasses.")
+    
+    def _close(self):
+        raise NotImplementedError("This method must be overridden by subclasses.")
+
+
+class CSVReportSink(ReportSink):
+    """Same CSV layout as generate_CSV_report, header taken from the first record."""
+    
+    def _open(self, first_record):
+        self._file = open(self.filename, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=list(first_record.keys()))
+        self._writer.writeheader()
+        
+    def _write_batch(self, records):
+        self._writer.writerows(records)
+        self._file.flush()
+        
+    def _close(self):
+        self._file.close()
+
+
+class JSONLReportSink(ReportSink):
+    """One JSON object per line."""
+    
+    def _open(self, first_record):
+        self._file = open(self.filename, "w")
+        
+    def _write_batch(self, records):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        
+    def _close(self):
+        self._file.close()
+
+
+class SQLiteReportSink(ReportSink):
+    """
+    Records go into a SQLite table (columns from the first record), so a huge audit
+    can be queried without loading it. Every batch is one transaction.
+    """
+    
+    def __init__(self, filename, table="report", **kwargs):
+        super().__init__(filename, **kwargs)
+        self.table = table
+        
+    def _open(self, first_record):
+        
+        # Only this backend needs sqlite3, the CSV and JSONL reports don't load it
+        
+        import sqlite3
+        
+        self._columns = list(first_record.keys())
+        
+        # Workers hand records over from their own threads, writes are serialized by our lock
+        
+        self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+        columns = ", ".join(f'"{column}"' for column in self._columns)
+        self._connection.execute(f'CREATE TABLE "{self.table}" ({columns})')
+        self._insert = (
+            f'INSERT INTO "{self.table}" VALUES ({", ".join("?" for _ in self._columns)})'
+        )
+        
+    def _write_batch(self, records):
+        with self._connection:
+            self._connection.executemany(
+                self._insert,
+                ([record.get(column) for column in self._columns] for record in records)
+            )
+            
+    def _close(self):
+        self._connection.close()
+
+
+class TeeReport:
+    def __init__(self, *targets):
+        """
+        
+        Hands every record to several reports (sinks or lists), e.g. the run's own
+        report and a merged one.
+        
+        """
+        
+        self.targets = targets
+        
+    def write(self, record):
+        for target in self.targets:
+            target.append(record)
+            
+    append = write
+
+
+# Report format name -> (sink class, file extension)
+
+REPORT_SINKS = {
+    "csv": (CSVReportSink, ".csv"),
+    "jsonl": (JSONLReportSink, ".jsonl"),
+    "sqlite": (SQLiteReportSink, ".sqlite"),
+}
+
+
+def open_report_sink(folder, name, report_format=REPORT_FORMAT, **kwargs):
+    """
+    
+    Create the sink for a report format.
+    
+    Parameters:
+        folder (str): Folder the report is written to
+        name (str): File name without extension (e.g. "report")
+        report_format (str): "csv", "jsonl" or "sqlite"
+    
+    """
+    
+    if report_format not in REPORT_SINKS:
+        raise ValueError(f"Unsupported report format: {report_format}")
+    
+    sink_class, extension = REPORT_SINKS[report_format]
+    return sink_class(os.path.join(folder, name + extension), **kwargs)
@@ -0,0 +1,227 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+
+from config import RULE_CACHE_FILENAME
+from services.rules_engine import ExtensionRule, PatternRule
+
+# tomllib is only in the standard library from Python 3.11, JSON rule files work everywhere
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cached layout changes so old caches are thrown away
+
+RULE_CACHE_VERSION = 1
+
+DEPTHS = ("year", "month", "day")
+
+
+def rule_set_hash(data):
+    """
+
+    Fingerprint of a rule file's bytes (and of the Python version, whose 're'
+    checked the patterns). Used as the rule cache key and in the scan index fingerprint.
+
+    """
+
+    digest = hashlib.sha256(data)
+    digest.update(f"{RULE_CACHE_VERSION}:{sys.version_info[:2]}".encode())
+    return digest.hexdigest()
+
+
+def parse_rule_file(filename, data):
+    """
+
+    Read the rules of a JSON or TOML rule file, e.g.:
+
+        {"rules": [
+            {"name": "Invoices", "glob": "invoice_*.pdf", "destination": "Finance/Invoices"},
+            {"name": "Camera", "regex": "IMG_\\d+", "ignore_case": true, "destination": "Pictures/Camera"},
+            {"name": "Ebooks", "extensions": [".epub", ".mobi"], "destination": "Books", "depth": "year"}
+        ]}
+
+    or in TOML, one [[rules]] table per rule.
+
+    Return:
+        List of rule dicts, as written in the file
+
+    """
+
+    if filename.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML rule files need Python 3.11 or later, use a JSON rule file instead")
+        document = tomllib.loads(data.decode("utf-8"))
+    else:
+        document = json.loads(data)
+
+    rules = document.get("rules") if isinstance(document, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError(f"Rule file {filename} has no 'rules' list")
+    return rules
+
+
+def validate_rules(entries):
+    """
+
+    Check every rule and bring it into one shape. Regexes are compiled here once, so
+    a broken pattern is reported by rule name before any file is touched.
+
+    Return:
+        List of normalized rule dicts (what the rule cache stores)
+
+    Raise:
+        ValueError naming the first bad rule
+
+    """
+
+    normalized = []
+    names = set()
+
+    for number, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Rule #{number} is not a table/object")
+
+        name = entry.get("name") or f"Rule #{number}"
+        if name in names:
+            raise ValueError(f"Rule '{name}' is defined twice")
+        names.add(name)
+
+        kinds = [kind for kind in ("glob", "regex", "extensions") if kind in entry]
+        if len(kinds) != 1:
+            raise ValueError(f"Rule '{name}' needs exactly one of 'glob', 'regex' or 'extensions'")
+        kind = kinds[0]
+
+        if not entry.get("destination"):
+            raise ValueError(f"Rule '{name}' has no destination")
+
+        depth = entry.get("depth", "month")
+        if depth not in DEPTHS:
+            raise ValueError(f"Rule '{name}': unsupported depth '{depth}'")
+
+        match = entry[kind]
+        if kind == "extensions":
+            if isinstance(match, str):
+                match = [match]
+            match = [extension.lower() if extension.startswith(".") else "." + extension.lower()
+                     for extension in match]
+        elif kind == "regex":
+
+            # Wrapped the way NameMatcher wraps it, so inline global flags are caught here too
+
+            try:
+                compiled = re.compile(f"(?:{match})")
+            except re.error as e:
+                raise ValueError(f"Rule '{name}': bad regex '{match}': {e}")
+            if compiled.groups:
+                raise ValueError(f"Rule '{name}': use (?:...) instead of capturing groups in '{match}'")
+
+        normalized.append({
+            "name": name,
+            "description": entry.get("description", f"Moves files matching the {name} rule"),
+            "kind": kind,
+            "match": match,
+            "ignore_case": bool(entry.get("ignore_case", False)),
+            "destination": entry["destination"],
+            "depth": depth,
+            "enabled": bool(entry.get("enabled", True)),
+        })
+
+    return normalized
+
+
+def load_rule_file(filename, cache_folder=None):
+    """
+
+    Load and check a rule file, through the on-disk rule cache when possible.
+
+    The cache ('rule_cache.json' in 'cache_folder') holds the checked rules under
+    the rule_set_hash() of the file. While the file doesn't change, startup skips
+    parsing and compiling every regex on its own; the combined matcher itself is
+    built lazily by the engine ('re' can't store compiled patterns on disk).
+
+    Parameters:
+        filename (str): JSON or TOML rule file
+        cache_folder (str, optional): Where the rule cache lives (no cache when None)
+
+    Return:
+        A tuple: (rule_set_hash, list of normalized rule dicts for build_rules())
+
+    """
+
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    key = rule_set_hash(data)
+    cache_path = os.path.join(cache_folder, RULE_CACHE_FILENAME) if cache_folder else None
+
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("hash") == key:
+                logger.info(f"Loaded {len(cached['rules'])} rules from the rule cache")
+                return key, cached["rules"]
+        except (OSError, ValueError) as e:
+            logger.info(f"Rule cache ignored. Error: {e}")
+
+    entries = validate_rules(parse_rule_file(filename, data))
+    logger.info(f"Loaded {len(entries)} rules from {filename}")
+
+    if cache_path is not None:
+        with open(cache_path, "w") as f:
+            json.dump({"hash": key, "rules": entries}, f)
+
+    return key, entries
+
+
+def build_rules(entries, base_destination):
+    """
+
+    Rule objects for the engine, in file order. Relative destinations are taken
+    inside 'base_destination' (the organized folder).
+
+    """
+
+    rules = []
+
+    for entry in entries:
+        destination = os.path.join(base_destination, entry["destination"])
+
+        if entry["kind"] == "extensions":
+            rule = ExtensionRule(entry["name"], entry["description"], entry["match"], destination,
+                                 enabled=entry["enabled"], depth=entry["depth"])
+        else:
+            rule = PatternRule(entry["name"], entry["description"], destination,
+                               **{entry["kind"]: entry["match"]}, ignore_case=entry["ignore_case"],
+                               enabled=entry["enabled"], depth=entry["depth"])
+        rules.append(rule)
+
+    return rules
+
+
+def rule_folders(entries, base_destination):
+    """
+
+    Top folders inside 'base_destination' the rules move files into (a recursive
+    walk stays out of them, like it does for the category folders).
+
+    """
+
+    folders = set()
+    base = os.path.abspath(base_destination)
+
+    for entry in entries:
+        destination = os.path.abspath(os.path.join(base, entry["destination"]))
+        relative = os.path.relpath(destination, base)
+        if relative != "." and not relative.startswith(os.pardir):
+            folders.add(os.path.join(base_destination, relative.split(os.sep)[0]))
+
+    return sorted(folders)
@@ -3,10 +3,12 @@ from services.models import FileItem
 
 
 def filter_excluded(files, excluded_items, excluded_ext):
+#  The scanner applies these before building FileItems (services/scan_filter.py), this is for lists we already have
+    excluded_ext = tuple(ext.lower() for ext in excluded_ext)
     return [
         file for file in files
         if file.name not in excluded_items
-        and not file.name.lower().endswith(tuple(excluded_ext))
+        and not file.name.lower().endswith(excluded_ext)
     ]
 
 def group_by_date(files, depth="month"):
@@ -51,4 +53,12 @@ def build_destination(base_dir, file, depth="month"):
     if depth == "day":
         return os.path.join(base_dir, year, month, day)
     
-    raise ValueError(f"Unsupported depth: {depth}")
\ No newline at end of file
+    raise ValueError(f"Unsupported depth: {depth}")
+
+def group_by_destination(moves):
+#  Same idea as group_by_date, keyed by the folder each planned move lands in
+#  'moves' are (plan position, PlannedMove) pairs so callers keep the plan order
+    grouped = {}
+    for position, move in moves:
+        grouped.setdefault(os.path.dirname(move.destination), []).append((position, move))
+    return grouped
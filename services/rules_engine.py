@@ -1,15 +1,40 @@
 import os
+import re
+import time
+import fnmatch
 import shutil
-import datetime
 import logging
 
-from config import FILE_CATEGORIES, EXCLUDED_ITEMS, EXCLUDED_EXT, YEAR_RANGE
+from config import (FILE_CATEGORIES, EXCLUDED_ITEMS, EXCLUDED_EXT, YEAR_RANGE, DUPLICATES_FOLDER,
+                    VECTORIZED_RULES, PLAN_BATCH_SIZE, VECTORIZED_MIN_FILES)
 from services.models import FileItem
 from services.rules import build_destination
+from services.report_generator import processed_timestamp
+from services.move_plan import MovePlan, PlannedMove, DestinationProbe
+from services.destination_index import DestinationIndex, SKIPPED
+from services.metrics import NULL_METRICS
+from services.file_batch import FileBatch, vectorized_available, load_numpy
 
 logger = logging.getLogger(__name__)
 
 
+def _chunks(files, size):
+    """
+    
+    Cut a list or a stream of files into lists of at most 'size' files.
+    
+    """
+    
+    chunk = []
+    for file in files:
+        chunk.append(file)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 class Rule:
     def __init__(self, name, description, enabled=True):
         """
@@ -38,7 +63,87 @@ class Rule:
         
         raise NotImplementedError("This method must be overridden by subclasses.")
     
-    def apply(self):
+    def index_keys(self):
+        """
+        
+        Extensions this rule can be looked up by in the compiled dispatch index.
+        Rules that must be checked file by file return None (the default).
+        
+        """
+        
+        return None
+    
+    def name_pattern(self):
+        """
+        
+        Regex the file name is matched against, for rules that go into the engine's
+        combined NameMatcher. None (the default) for every other rule.
+        
+        Return:
+            A tuple (regex source, ignore_case, literal first character or None), or None
+        
+        """
+        
+        return None
+    
+    def applies_to_batch(self, batch):
+        """
+        
+        Batch form of applies_to for a whole FileBatch at once.
+        
+        Return:
+            A boolean NumPy mask (one entry per file), or None (the default) when the
+            rule can only be checked file by file
+        
+        """
+        
+        return None
+    
+    def prepare(self, files, metrics=NULL_METRICS):
+        """
+        
+        Called with every chunk of files before any of them is decided, so a rule
+        that needs to read the disk (e.g. ContentTypeRule) can do it for the whole
+        chunk at once. Does nothing by default.
+        
+        """
+        
+        pass
+    
+    def planned(self, plan):
+        """
+        
+        Called with every MovePlan the engine builds, after it is built, so a rule
+        can remember where files are going (e.g. DuplicateRule). Does nothing by default.
+        
+        """
+        
+        pass
+    
+    def destination_for(self, file):
+        """
+        
+        Decide where the file would go, without touching the disk.
+        Used when building a MovePlan.
+        
+        Return:
+            Full destination path for the file
+        
+        """
+        
+        raise NotImplementedError("This method must be overridden by subclasses.")
+    
+    def link_target(self, file):
+        """
+        
+        Existing file the destination should be hard-linked to instead of moving the
+        file there. None (the default) means a normal move.
+        
+        """
+        
+        return None
+    
+    def apply(self, file):
         """
         
         Carry out the action of the rule method above on the file.
@@ -48,7 +153,122 @@ class Rule:
         
         """
         
-        raise NotImplementedError("This method must be overridden by subclasses.")
+        return self.apply_to(file)
+    
+    def apply_to(self, file, destination=None):
+        """
+        
+        Same as apply(), but moves the file to 'destination' (the path the engine's
+        DestinationIndex resolved) instead of destination_for() when one is given.
+        The engine only calls it on rules that don't override apply(); a rule
+        written against apply(file) keeps picking its own destination.
+        
+        Every built-in rule uses this one: they only supply destination_for() (and
+        link_target() for a hard link instead of a move).
+        
+        Return:
+            A tuple: (True, destination) once the file is there, (False, None) when it failed
+        
+        """
+        
+        try:
+            destination = destination or self.destination_for(file)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            
+            target = self.link_target(file)
+            if target is not None:
+                os.link(target, destination)
+                os.unlink(file.path)
+            else:
+                shutil.move(file.path, destination)
+                
+            logger.debug("%s '%s' moved '%s' to %s", type(self).__name__, self.name, file.name, destination)
+            return True, destination
+        except Exception as e:
+            logger.info(f"{type(self).__name__} '{self.name}' failed to move '{file.name}'. Error: {e}")
+            return False, None
+    
+    
+def _literal_first(source, glob=False):
+    """
+    
+    First character every match of the pattern has to start with, or None when it
+    can't be told without parsing (wildcards, groups, escapes, alternation, ...).
+    
+    """
+    
+    if glob:
+        return source[0] if source and source[0] not in "*?[" else None
+    
+    if source.startswith("^"):
+        source = source[1:]
+    if not source or "|" in source or not (source[0].isalnum() or source[0] in "_-"):
+        return None
+    if len(source) > 1 and source[1] in "*?{+":
+        return None
+    return source[0]
+
+
+class NameMatcher:
+    def __init__(self, patterns):
+        """
+        
+        All name patterns of an engine in one matcher: a single match() call per file
+        tells which pattern (in rule order) is the first to match.
+        
+        Patterns are joined into one alternation of named groups, '(?P<_p0>...)|(?P<_p1>...)',
+        so the group that matched is the pattern number. One alternation over hundreds
+        of patterns is still slow in 're' (every branch is tried), so patterns are
+        bucketed by the literal character they must start with: a name only meets the
+        patterns of its own first character plus the ones without a literal start.
+        Buckets are compiled the first time a name needs them.
+        
+        Parameters:
+            patterns (list): name_pattern() tuples, in rule order
+        
+        """
+        
+        buckets = {}
+        anywhere = []
+        
+        for number, (source, ignore_case, first) in enumerate(patterns):
+            if first is None:
+                anywhere.append(number)
+                continue
+            for char in {first.lower(), first.upper()} if ignore_case else (first,):
+                buckets.setdefault(char, []).append(number)
+                
+        self.sources = [f"(?i:{source})" if ignore_case else f"(?:{source})"
+                        for source, ignore_case, _ in patterns]
+        self._buckets = {char: sorted(numbers + anywhere) for char, numbers in buckets.items()}
+        self._anywhere = anywhere
+        self._compiled = {}
+        
+    def _compile(self, numbers):
+        if not numbers:
+            return None
+        return re.compile("|".join(f"(?P<_p{number}>{self.sources[number]})" for number in numbers))
+    
+    def first(self, name):
+        """
+        
+        Return:
+            Number of the first pattern that matches the start of 'name', or None
+        
+        """
+        
+        key = name[:1]
+        
+        try:
+            regex = self._compiled[key]
+        except KeyError:
+            regex = self._compiled[key] = self._compile(self._buckets.get(key, self._anywhere))
+            
+        if regex is None:
+            return None
+        
+        match = regex.match(name)
+        return int(match.lastgroup[2:]) if match is not None else None
     
     
 class ExtensionRule(Rule):
@@ -73,6 +293,7 @@ class ExtensionRule(Rule):
         # Call new parms
 
         self.target_extensions = [ext.lower() for ext in target_extensions]
+        self._extension_set = frozenset(self.target_extensions)
         self.destination_folder = destination_folder
         # year/month/day
         self.depth = depth
@@ -94,50 +315,218 @@ class ExtensionRule(Rule):
         # file_name = file_info.get('name', '').lower()
         
         # return any(file_name.endswith(ext) for ext in self.target_extensions)
-        return file.extension in self.target_extensions
+        return file.extension in self._extension_set
+    
+    def index_keys(self):
+        """
+        
+        A match only depends on the extension, so the rule can live in the hash index.
+        Subclasses that change applies_to are checked file by file instead.
+        
+        """
+        
+        if type(self).applies_to is not ExtensionRule.applies_to:
+            return None
+        return self._extension_set
     
-    def apply(self, file: FileItem):
+    def applies_to_batch(self, batch):
+        if type(self).applies_to is not ExtensionRule.applies_to:
+            return None
+        return batch.extension_mask(self._extension_set)
+    
+    def destination_for(self, file: FileItem):
+        """
+        
+        Build the destination folder using rules.py and add the file name.
+        
+        """
+        
+        destination_folder = build_destination(self.destination_folder, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+        
+        
+class SizeRule(Rule):
+    def __init__(self, name, description, destination_folder, min_size=None, max_size=None,
+                 target_extensions=None, enabled=True, depth="month"):
         """
         
-        Move the file to the designated folder.
+        Init a size-based rule: matches files with min_size <= size < max_size.
         
         Parameters:
-            file_info: Out dict with the metadata
+            destination_folder: path where matching files should move
+            min_size (int, optional): Smallest matching size in bytes (no lower bound when None)
+            max_size (int, optional): First size in bytes that no longer matches (no upper bound when None)
+            target_extensions (list, optional): Only files with one of these extensions match
         
         """
-                    
-        try:
-            
-            #   Build the destination folder using rules.py
-            
-            destination_folder = build_destination(self.destination_folder, file, depth="month")
-            os.makedirs(destination_folder, exist_ok=True)
-            
-            #  Final location for our path
-            
-            destination = os.path.join(destination_folder, file.name)
+        super().__init__(name, description, enabled)
+        
+        self.destination_folder = destination_folder
+        self.min_size = min_size
+        self.max_size = max_size
+        self._extension_set = frozenset(ext.lower() for ext in target_extensions) if target_extensions else None
+        self.depth = depth
+        
+    def applies_to(self, file: FileItem):
+        if self._extension_set is not None and file.extension not in self._extension_set:
+            return False
+        if self.min_size is not None and file.size < self.min_size:
+            return False
+        return self.max_size is None or file.size < self.max_size
+    
+    def applies_to_batch(self, batch):
+        if self._extension_set is not None:
+            mask = batch.extension_mask(self._extension_set)
+        else:
+            mask = batch.size >= 0
             
-            #  Move our file
+        if self.min_size is not None:
+            mask &= batch.size >= self.min_size
+        if self.max_size is not None:
+            mask &= batch.size < self.max_size
+        return mask
+    
+    def destination_for(self, file: FileItem):
+        destination_folder = build_destination(self.destination_folder, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+        
+        
+class AgeRule(Rule):
+    def __init__(self, name, description, destination_folder, older_than_days=None, newer_than_days=None,
+                 timestamp="mtime", now=None, target_extensions=None, enabled=True, depth="month"):
+        """
+        
+        Init an age-based rule, e.g. everything not touched for YEAR_RANGE years.
+        
+        Parameters:
+            destination_folder: path where matching files should move
+            older_than_days (float, optional): Only files at least this old match
+            newer_than_days (float, optional): Only files younger than this match
+            timestamp (str): "mtime" or "ctime"
+            now (float, optional): Reference time (defaults to when the rule is made,
+                                   so every file of a run is judged against the same cutoff)
+            target_extensions (list, optional): Only files with one of these extensions match
+        
+        """
+        super().__init__(name, description, enabled)
+        
+        if timestamp not in ("mtime", "ctime"):
+            raise ValueError(f"Unsupported timestamp: {timestamp}")
+        
+        now = time.time() if now is None else now
+        
+        self.destination_folder = destination_folder
+        self.timestamp = timestamp
+        self.older_than = now - older_than_days * 86400 if older_than_days is not None else None
+        self.newer_than = now - newer_than_days * 86400 if newer_than_days is not None else None
+        self._extension_set = frozenset(ext.lower() for ext in target_extensions) if target_extensions else None
+        self.depth = depth
+        
+    def applies_to(self, file: FileItem):
+        if self._extension_set is not None and file.extension not in self._extension_set:
+            return False
+        
+        stamp = getattr(file, self.timestamp)
+        if self.older_than is not None and stamp > self.older_than:
+            return False
+        return self.newer_than is None or stamp > self.newer_than
+    
+    def applies_to_batch(self, batch):
+        stamps = getattr(batch, self.timestamp)
+        
+        if self._extension_set is not None:
+            mask = batch.extension_mask(self._extension_set)
+        else:
+            mask = stamps == stamps
             
-            shutil.move(file.path, destination)
+        if self.older_than is not None:
+            mask &= stamps <= self.older_than
+        if self.newer_than is not None:
+            mask &= stamps > self.newer_than
+        return mask
+    
+    def destination_for(self, file: FileItem):
+        destination_folder = build_destination(self.destination_folder, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+        
+        
+class PatternRule(Rule):
+    def __init__(self, name, description, destination_folder, regex=None, glob=None, ignore_case=False,
+                 enabled=True, depth="month"):
+        """
+        
+        Init a name-based rule, e.g. glob 'invoice_*.pdf' or regex 'IMG_\\d+'.
+        
+        Globs must match the whole file name, regexes only its start (end them with '$'
+        to match the whole name). The engine matches every PatternRule at once through
+        its NameMatcher; applies_to() on its own is only used when a file falls through.
+        
+        Parameters:
+            destination_folder: path where matching files should move
+            regex (str, optional): Regular expression, without capturing groups
+            glob (str, optional): Shell-style pattern (give either regex or glob)
+            ignore_case (bool): Match upper and lower case alike
+        
+        """
+        super().__init__(name, description, enabled)
+        
+        if (regex is None) == (glob is None):
+            raise ValueError(f"Rule '{name}' needs either a regex or a glob pattern")
+        
+        if glob is not None:
+            self.pattern = fnmatch.translate(glob)
+            self.first_char = _literal_first(glob, glob=True)
+        else:
+            self.pattern = regex
+            self.first_char = _literal_first(regex)
             
-            logger.info(f"ExtensionRule '{self.name}' moved '{file.name}' to {destination}")
-            return True, destination
+        self.ignore_case = ignore_case
+        self.destination_folder = destination_folder
+        self.depth = depth
+        self._regex = None
         
-        except Exception as e:
-            logger.info(f"ExtensionRule '{self.name}' failed to move '{file.name}'. Error: {e} ")
-            return False, None
+    def name_pattern(self):
+        return self.pattern, self.ignore_case, self.first_char
+    
+    def applies_to(self, file: FileItem):
+        if self._regex is None:
+            self._regex = re.compile(self.pattern, re.IGNORECASE if self.ignore_case else 0)
+        return self._regex.match(file.name) is not None
+    
+    def destination_for(self, file: FileItem):
+        destination_folder = build_destination(self.destination_folder, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
         
         
 class RulesEngine:
-    def __init__(self):
+    def __init__(self, vectorized=VECTORIZED_RULES, batch_size=PLAN_BATCH_SIZE, min_vectorized=VECTORIZED_MIN_FILES):
         """
         
         Init the RulesEngine with an empty list
         
+        Parameters:
+            vectorized (bool): Let plan() decide chunks of 'batch_size' files with
+                               NumPy masks (ignored when NumPy isn't installed)
+            min_vectorized (int): Chunks smaller than this are decided file by file
+        
         """
         
         self.rules = []
+        self.vectorized = vectorized and vectorized_available()
+        self.batch_size = batch_size
+        self.min_vectorized = min_vectorized
+        
+        # Built by compile(), cleared whenever the rule list changes
+        
+        self._index = None
+        self._residual = None
+        self._candidates = None
+        self._active = None
+        self._preparing = None
+        self._planning = None
+        self._patterns = None
+        self._matcher = None
+        self._pattern_number = None
         
     def add_rule(self, rule):
         """
@@ -150,20 +539,337 @@ class RulesEngine:
         """
         
         self.rules.append(rule)
+        self._index = None
+        
+    def compile(self):
+        """
+        
+        Build the dispatch index once instead of scanning every rule for every file.
+        
+        Disabled rules are dropped here (logged once), rules that can be looked up by
+        extension go into a hash index, and everything else (e.g. FallbackRule) stays in
+        an ordered residual list. Each entry keeps its position in self.rules so the
+        first-match-wins order is exactly the same as a plain linear scan.
+        
+        """
+        
+        index = {}
+        residual = []
+        active = []
+        patterns = []
+        
+        for position, rule in enumerate(self.rules):
+            
+            # Only when rules are active
+            
+            if not rule.enabled:
+                logger.info(f"[SKIPPED] Rule '{rule.name}' is disabled")
+                continue
+            
+            active.append(rule)
+            
+            # Name patterns all go into one matcher instead of being checked one by one
+            
+            if rule.name_pattern() is not None:
+                patterns.append((position, rule))
+                continue
+            
+            keys = rule.index_keys()
+            
+            if keys is None:
+                residual.append((position, rule))
+            else:
+                for key in keys:
+                    index.setdefault(key, []).append((position, rule))
+                    
+        self._index = index
+        self._residual = residual
+        self._candidates = {}
+        self._active = active
+        
+        # Only rules that override prepare() get called per chunk
+        
+        self._preparing = [rule for rule in active if type(rule).prepare is not Rule.prepare]
+        self._planning = [rule for rule in active if type(rule).planned is not Rule.planned]
+        
+        self._patterns = patterns
+        self._matcher = NameMatcher([rule.name_pattern() for _, rule in patterns]) if patterns else None
+        
+        # Position in self._active -> pattern number, for _winners
+        
+        pattern_of = {id(rule): number for number, (_, rule) in enumerate(patterns)}
+        self._pattern_number = {
+            number: pattern_of[id(rule)] for number, rule in enumerate(active) if id(rule) in pattern_of
+        }
+        
+        logger.info(f"Compiled {len(self.rules)} rules: {len(index)} indexed extensions, "
+                    f"{len(patterns)} name patterns, {len(residual)} residual rules")
+        
+    def _candidates_for(self, extension, positions=False):
+        """
+        
+        Ordered (rule, needs_check) pairs that could match a file with this extension.
+        Indexed rules already match by extension, residual rules still need applies_to.
+        Merged once per extension and cached.
+        
+        Parameters:
+            positions (bool): Give (position, rule, needs_check) triples instead
+        
+        """
+        
+        merged = self._candidates.get(extension)
+        
+        if merged is None:
+            merged = [(position, rule, False) for position, rule in self._index.get(extension, ())]
+            merged.extend((position, rule, True) for position, rule in self._residual)
+            merged.sort(key=lambda entry: entry[0])
+            
+            merged = self._candidates[extension] = (
+                tuple(merged), tuple((rule, needs_check) for _, rule, needs_check in merged)
+            )
+            
+        return merged[0] if positions else merged[1]
+    
+    def matching_rules(self, file):
+        """
+        
+        Yield the enabled rules that apply to the file, in rule order.
+        
+        """
+        
+        if self._index is None:
+            self.compile()
+            
+        if self._matcher is None:
+            for rule, needs_check in self._candidates_for(file.extension):
+                if not needs_check or rule.applies_to(file):
+                    yield rule
+            return
+        
+        # Merge the matching pattern rules in by position
+        
+        patterns = self._pattern_rules(file)
+        pending = next(patterns, None)
+        
+        for position, rule, needs_check in self._candidates_for(file.extension, positions=True):
+            while pending is not None and pending[0] < position:
+                yield pending[1]
+                pending = next(patterns, None)
+            if not needs_check or rule.applies_to(file):
+                yield rule
+                
+        while pending is not None:
+            yield pending[1]
+            pending = next(patterns, None)
+            
+    def _pattern_rules(self, file):
+        """
+        
+        (position, rule) of the pattern rules that match the file, in rule order.
+        The first one comes from a single NameMatcher call; the later ones are only
+        checked if the caller asks for more (a rule before them could not plan the file).
+        
+        """
+        
+        number = self._matcher.first(file.name)
+        if number is None:
+            return
+        
+        yield self._patterns[number]
+        
+        for position, rule in self._patterns[number + 1:]:
+            if rule.applies_to(file):
+                yield position, rule
     
-    def process_files(self, file_list, report_data=None):
+    def plan(self, file_list, metrics=NULL_METRICS, destinations=None):
+        """
+        
+        Decide a destination for every file without moving anything.
+        
+        Parameters:
+            file_list: FileItems (list or a stream from the scanner)
+            metrics (Metrics, optional): Counts planned, unmatched and colliding files
+            destinations (DestinationIndex, optional): Names taken in the destination folders.
+                                                       Pass the same one to every plan() call of
+                                                       a run; a fresh one is used when not given
+        
+        Return:
+            An immutable MovePlan, run it with services.executor.execute_plan()
+        
+        """
+        
+        if self._index is None:
+            self.compile()
+            
+        if destinations is None:
+            destinations = DestinationIndex()
+            
+        moves = []
+        skipped = []
+        probe = DestinationProbe()
+        
+        # Destination -> position in moves, to find the move a "replaced" one supersedes
+        
+        positions = {}
+        
+        scanned = 0
+        
+        def add(move):
+            if move is None:
+                return
+            if move.collision is not None:
+                metrics.count(f"collisions_{move.collision}")
+            if move.collision in SKIPPED:
+                skipped.append(move)
+                return
+            
+            # A newer file replacing one planned earlier in this plan: the older one stays
+            # where it is instead of being moved there and overwritten right after
+            
+            if move.collision == "replaced" and move.destination in positions:
+                position = positions[move.destination]
+                skipped.append(moves[position]._replace(collision="skipped_older"))
+                metrics.count("collisions_skipped_older")
+                moves[position] = move
+                return
+            
+            positions[move.destination] = len(moves)
+            moves.append(move)
+        
+        for files in _chunks(file_list, self.batch_size):
+            scanned += len(files)
+            
+            for rule in self._preparing:
+                rule.prepare(files, metrics)
+                
+            if not self.vectorized or len(files) < self.min_vectorized:
+                for file in files:
+                    add(self._plan_file(file, probe, destinations))
+                continue
+            
+            for file, rule in zip(files, self._winners(files)):
+                move = self._planned_move(file, rule, probe, destinations) if rule is not None else None
+                
+                # A rule that can't plan the file hands it to the next matching one, as below
+                
+                if move is None and rule is not None:
+                    move = self._plan_file(file, probe, destinations)
+                add(move)
+                    
+        planned = len(moves) + len(skipped)
+        
+        metrics.count("files_scanned", scanned)
+        metrics.count("files_planned", planned)
+        metrics.count("files_unmatched", scanned - planned)
+        
+        plan = MovePlan(moves, probe.missing, skipped)
+        
+        for rule in self._planning:
+            rule.planned(plan)
+            
+        return plan
+    
+    def _planned_move(self, file, rule, probe, destinations, log=False):
+        try:
+            destination, collision = destinations.resolve(file, rule.destination_for(file))
+        except Exception as e:
+            if log:
+                logger.info(f"Rule '{rule.name}' could not plan '{file.name}'. Error: {e}")
+            return None
+        
+        same_device = probe.device_of(os.path.dirname(destination)) == file.device
+        return PlannedMove(file.path, destination, rule.name, file.size, same_device, file.device,
+                           rule.link_target(file), collision)
+    
+    def _plan_file(self, file, probe, destinations):
+        """
+        
+        Per-file path: the first matching rule that can plan the file wins.
+        
+        """
+        
+        for rule in self.matching_rules(file):
+            move = self._planned_move(file, rule, probe, destinations, log=True)
+            if move is not None:
+                return move
+        return None
+    
+    def _winners(self, files):
+        """
+        
+        First matching rule for every file of a chunk (None where no rule matches).
+        
+        Each rule gives a mask over the files that are still undecided; masked
+        assignment keeps the first rule that claimed a file, exactly like the
+        per-file loop. Rules without a batch form are checked file by file, only on
+        the files no earlier rule took.
+        
+        """
+        
+        np = load_numpy()
+        
+        batch = FileBatch(files)
+        winner = np.full(len(files), -1, dtype=np.int32)
+        undecided = np.ones(len(files), dtype=bool)
+        
+        # First matching name pattern of every file, one NameMatcher call each: a pattern
+        # rule then takes exactly the files whose first pattern it is
+        
+        first_pattern = None
+        if self._matcher is not None:
+            first = self._matcher.first
+            first_pattern = np.fromiter(
+                (-1 if number is None else number for number in (first(file.name) for file in files)),
+                dtype=np.int32, count=len(files)
+            )
+        
+        pattern_number = self._pattern_number
+        
+        for number, rule in enumerate(self._active):
+            if number in pattern_number:
+                mask = first_pattern == pattern_number[number]
+            else:
+                mask = rule.applies_to_batch(batch)
+            if mask is None:
+                mask = batch.mask_of(rule.applies_to, np.flatnonzero(undecided))
+                
+            taken = mask & undecided
+            winner[taken] = number
+            undecided &= ~taken
+            
+            if not undecided.any():
+                break
+            
+        active = self._active
+        return [active[number] if number >= 0 else None for number in winner.tolist()]
+    
+    def process_files(self, file_list, report_data=None, metrics=NULL_METRICS, destinations=None):
         """
         
         Process each file in file_list.
-        Check each file; check each rule.
+        Check each file against the rules that can match it (see compile()).
         If a rule's condition (applies_to) returns True, then the rule's action (apply) is executed.
 
         Parameters:
             file_list:  A list of dicts, each contain the metadata.
                         Example: [{'name'}: 'photo.jpg', 'path': '/images/photo.jpg']
             report_data:  A list to report records that get appended
+            metrics:  Optional Metrics, times every rule.apply and counts bytes per rule
+            destinations:  Optional DestinationIndex, names already taken (like plan())
         
         """
+        
+        if self._index is None:
+            self.compile()
+            
+        if destinations is None:
+            destinations = DestinationIndex()
+            
+        if self._preparing:
+            file_list = list(file_list)
+            for rule in self._preparing:
+                rule.prepare(file_list, metrics)
+            
         # Iterate over each file_list
         
         for file in file_list:
@@ -172,39 +878,55 @@ class RulesEngine:
             
             original_path = file.path
             
-            # Iterate over each rule of the file
+            # Iterate over each matching rule of the file
             
-            for rule in self.rules:
+            for rule in self.matching_rules(file):
+                
+                # Never move onto a name that is taken, unless the collision policy says so.
+                # Rules that override apply(file) pick their own destination, as they always did
                 
-                # Only when rules are active
+                resolves = type(rule).apply is Rule.apply
+                destination, collision = None, None
                 
-                if not rule.enabled:
-                    logger.info(f"[SKIPPED] Rule '{rule.name}' is disabled")
-                    continue
+                if resolves:
+                    try:
+                        destination, collision = destinations.resolve(file, rule.destination_for(file))
+                    except Exception:
+                        
+                        # apply_to() below runs into the same error and logs it
+                        
+                        destination, collision = None, None
                     
-                    # Check if rule applies to the file and then call our method when we have a match
+                if collision is not None:
+                    metrics.count(f"collisions_{collision}")
                     
-                if rule.applies_to(file):
-                        
-                    # Return a tuple: (success, destination)
+                # Return a tuple: (success, destination)
+                
+                if collision in SKIPPED:
+                    success, dest = True, destination
+                else:
+                    with metrics.timer("apply"):
+                        success, dest = rule.apply_to(file, destination) if resolves else rule.apply(file)
+                if success:
+                    if collision not in SKIPPED:
+                        metrics.count("files_moved")
+                        metrics.add_bytes(rule.name, file.size)
+                    if report_data is not None:
+                        record = {
+                            "file_name": file.name,
+                            "original_path": original_path,
+                            "destination": dest,
+                            "rule_applied": rule.name,
+                            "processed_at": processed_timestamp(),
+                            "collision": collision
+                            
+                        }
+                        report_data.append(record)
+                        logger.debug("[RECORD ADDED] Report entry added for '%s'", file.name)
                     
-                    success, dest = rule.apply(file)
-                    if success:
-                        if report_data is not None:
-                            record = {
-                                "file_name": file.name,
-                                "original_path": original_path,
-                                "destination": dest,
-                                "rule_applied": rule.name,
-                                "processed_at": datetime.datetime.now().isoformat()
-                                
-                            }
-                            report_data.append(record)
-                            logger.info(F"[RECORD ADDED] Report entry added for '{file.name}'")
-                        
-                        # Move if a rule has been applied
-                        
-                        break
+                    # Move if a rule has been applied
+                    
+                    break
                         
                         
 class FallbackRule(Rule):
@@ -239,34 +961,67 @@ class FallbackRule(Rule):
         
         return os.path.exists(file.path)
     
-    def apply(self, file: FileItem):
+    def destination_for(self, file: FileItem):
         """
         
-        Move the file to the fallback folder (Others folder)
-         
-        Steps:
-           1. Retrieve the file's modification time
-           2. Build a destination (Others) folder using datetime
-           3. Ensure our destination folder exists and mkae one if it doesn't
-           4. Move our files to the 'Others' destination folder using shutil
-            
+        Destination inside the 'Others' folder, grouped by owner and date.
+        
+        """
+        
+        base_dir = os.path.join(self.base_destination, "Others")
+        destination_folder = build_destination(base_dir, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+
+
+class DuplicateRule(Rule):
+    def __init__(self, name, description, duplicates, base_destination, action="move", enabled=True, depth="month"):
+        """
+        
+        Sends extra copies of a file (found by services.dedupe.find_duplicates) to the
+        'Duplicates' folder, before any category rule sees them.
+        
         Parameters:
-            file_info: dict using metadata
+            duplicates: dict of duplicate path -> FileItem that is kept
+            base_destination: Base folder for the 'Duplicates' folder
+            action: "move" keeps the copy as is, "hardlink" replaces it with a hard link
+                    to the kept file so the space is given back
         
         """
+        super().__init__(name, description, enabled)
+        
+        if action not in ("move", "hardlink"):
+            raise ValueError(f"Unsupported duplicate action: {action}")
+        
+        self.duplicates = duplicates
+        self.base_destination = base_destination
+        self.action = action
+        self.depth = depth
+        
+        # Kept file path -> destination an earlier plan moves it to (see link_target)
+        
+        self._kept = {kept.path for kept in duplicates.values()}
+        self._placed = {}
+        
+    def applies_to(self, file: FileItem):
+        return file.path in self.duplicates
+    
+    def destination_for(self, file: FileItem):
+        base_dir = os.path.join(self.base_destination, DUPLICATES_FOLDER)
+        destination_folder = build_destination(base_dir, file, depth=self.depth)
+        return os.path.join(destination_folder, file.name)
+    
+    def planned(self, plan):
+        for move in plan:
+            if move.source in self._kept:
+                self._placed[move.source] = move.destination
                 
-        try:
-            #   Build destination path using rules.py logic
-            
-            base_dir = os.path.join(self.base_destination, "Others")
-            destination_folder = build_destination(base_dir, file, depth=self.depth)
-            os.makedirs(destination_folder, exist_ok=True)
-            
-            destination = os.path.join(destination_folder, file.name)
-            shutil.move(file.path, destination)
-            
-            logger.info(f"FallbackRule moved '{file.name}' to '{destination}'")
-            return True, destination
-        except Exception as e:
-            logger.info(f"FallbackRule failed to move '{file.name}'.  Error: {e}")
-            return False, None
\ No newline at end of file
+    def link_target(self, file: FileItem):
+        
+        # A plan makes its links before any of its moves, so a kept file planned together
+        # with its copy is still at its original path. One planned earlier (an earlier
+        # pipeline chunk, executed before this one) is at its destination by then.
+        
+        if self.action == "hardlink":
+            kept = self.duplicates[file.path].path
+            return self._placed.get(kept, kept)
+        return None
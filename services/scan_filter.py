@@ -0,0 +1,87 @@
+import time
+import logging
+import threading
+
+from services.metrics import NULL_METRICS
+
+logger = logging.getLogger(__name__)
+
+# Average year length, so the age cutoff doesn't drift over leap years
+
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+
+
+class ScanFilter:
+    def __init__(self, excluded_items=(), excluded_ext=(), year_range=None, now=None):
+        """
+
+        Exclusions and the age cutoff compiled once per run and applied inside the scanner,
+        so a rejected entry never costs a stat call or a FileItem.
+
+        Stage 1 (names and extensions) only needs the dirent, stage 2 (age) needs the stat
+        result the scanner takes anyway. Files skipped at each stage are counted.
+
+        Parameters:
+            excluded_items (iterable): File names never organized
+            excluded_ext (iterable): Name endings never organized (case insensitive, e.g. '.exe')
+            year_range (int, optional): Only files modified within the last 'year_range' years
+                                        are organized (no cutoff when None or 0)
+            now (float, optional): Reference time for the cutoff (defaults to now)
+
+        """
+
+        self.excluded_items = frozenset(excluded_items)
+        self.excluded_ext = tuple(ext.lower() for ext in excluded_ext)
+
+        now = time.time() if now is None else now
+        self.cutoff = now - year_range * SECONDS_PER_YEAR if year_range else None
+
+        self.skipped = {"name": 0, "extension": 0, "age": 0}
+        self._lock = threading.Lock()
+
+    def rejects_name(self, name):
+        """
+
+        Stage 1, straight from the dirent.
+
+        Return:
+            "name", "extension", or None when the file goes on to the next stage
+
+        """
+
+        if name in self.excluded_items:
+            return "name"
+        if self.excluded_ext and name.lower().endswith(self.excluded_ext):
+            return "extension"
+        return None
+
+    def too_old(self, mtime):
+        """
+
+        Stage 2: True when the file was last modified before the YEAR_RANGE cutoff.
+
+        """
+
+        return self.cutoff is not None and mtime < self.cutoff
+
+    def add(self, name=0, extension=0, age=0):
+        """
+
+        Count skipped files. The scanner calls this once per directory, not once per file.
+
+        """
+
+        with self._lock:
+            self.skipped["name"] += name
+            self.skipped["extension"] += extension
+            self.skipped["age"] += age
+
+    def report(self, metrics=NULL_METRICS):
+        with self._lock:
+            skipped = dict(self.skipped)
+
+        for stage, count in skipped.items():
+            metrics.count(f"skipped_{stage}", count)
+
+        logger.info(f"Scan filter skipped {skipped['name']} files by name, {skipped['extension']} by extension "
+                    f"and {skipped['age']} older than the year range")
@@ -0,0 +1,360 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_MASK = (1 << 64) - 1
+
+
+def _names_digest(names):
+    """
+
+    Order independent fingerprint of a set of names, so a folder listing can be compared
+    without keeping it (only valid within one process, str hashes are salted).
+
+    """
+
+    return sum(map(hash, names)) & _DIGEST_MASK
+
+
+def config_hash(file_categories, excluded_items, excluded_ext, year_range, sniff_content=False, rule_set=None):
+    """
+
+    Fingerprint of everything that changes a decision. When it differs from the one
+    stored in the index, every stored decision is thrown away.
+
+    """
+
+    settings = {
+        "file_categories": {category: sorted(extensions) for category, extensions in file_categories.items()},
+        "excluded_items": sorted(excluded_items),
+        "excluded_ext": sorted(excluded_ext),
+        "year_range": year_range,
+    }
+
+    # Only part of the fingerprint when used, so indexes from before these options existed stay valid
+
+    if sniff_content:
+        settings["sniff_content"] = True
+    if rule_set:
+        settings["rule_set"] = rule_set
+
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+class ScanIndex:
+    def __init__(self, filename, rules_hash):
+        """
+
+        On-disk record of the last run, so an hourly re-run only looks at what changed.
+
+        Stores each directory's mtime (and its sub folders) and each file's
+        (inode, size, mtime) with the decision taken for it. A directory whose mtime
+        didn't move is skipped without being read; inside a changed directory only
+        new or changed files are handed out again. Rows for files and folders that
+        disappeared (deleted or renamed away) are dropped when their parent is re-read.
+
+        Our own moves change the mtime of the folders they empty (and of the folder the
+        category folders get created in). When the folder's listing after the run is
+        exactly what it was minus the files we moved out, plus the folders we created,
+        the post-run mtime is stored, so the next run still skips it. Anything else that
+        changed it in the meantime keeps the scan-time mtime and the folder is read again.
+        A folder holding a file whose move didn't happen is always read again next run.
+
+        Parameters:
+            filename (str): SQLite file (normally inside the logs folder)
+            rules_hash (str): config_hash() of the current rule settings
+
+        """
+
+        self.filename = filename
+        self._lock = threading.Lock()
+
+        # Scanner threads report in. File rows are written by record() a chunk at a time
+        # once their moves are done, everything else in one go by save()
+
+        self._connection = sqlite3.connect(filename, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, parent TEXT, mtime INTEGER);
+            CREATE TABLE IF NOT EXISTS files (
+                directory TEXT, name TEXT, inode INTEGER, size INTEGER, mtime REAL, decision TEXT,
+                PRIMARY KEY (directory, name)
+            );
+            CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+        """)
+
+        stored = self._connection.execute("SELECT value FROM meta WHERE key = 'rules_hash'").fetchone()
+
+        if stored is None or stored[0] != rules_hash:
+            if stored is not None:
+                logger.info("Rule settings changed since the last run, scan index reset")
+            with self._connection:
+                self._connection.execute("DELETE FROM directories")
+                self._connection.execute("DELETE FROM files")
+                self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('rules_hash', ?)", (rules_hash,))
+
+        self._directories = []
+        self._forget_files = []
+        self._forget_directories = []
+        self.skipped_directories = 0
+        self.skipped_files = 0
+        self.recorded_files = 0
+
+        # Path -> folder it was found in, for files handed out but not recorded yet
+
+        self._pending = {}
+
+        # Folders holding a file whose move didn't happen, read again next run
+
+        self._retry = set()
+
+        # Folder -> (entry count, _names_digest, sub folder names) when it was read, and
+        # folder -> [files moved out, _names_digest of them], to check the folder after the run
+
+        self._listings = {}
+        self._moved_out = {}
+
+        # Folders our moves went into (a handful: category/year/month)
+
+        self._destination_folders = set()
+
+    def directory_unchanged(self, directory, mtime):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mtime FROM directories WHERE path = ?", (directory,)
+            ).fetchone()
+
+        unchanged = row is not None and row[0] == mtime
+        if unchanged:
+            self.skipped_directories += 1
+        return unchanged
+
+    def known_subdirs(self, directory):
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path FROM directories WHERE parent = ?", (directory,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def files_in(self, directory):
+        """
+
+        Stored (inode, size, mtime) of every file in the directory, keyed by name.
+
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT name, inode, size, mtime FROM files WHERE directory = ?", (directory,)
+            ).fetchall()
+        return {name: (inode, size, mtime) for name, inode, size, mtime in rows}
+
+    def unchanged_file(self, known, name, stat_result):
+        if known.get(name) == (stat_result.st_ino, stat_result.st_size, stat_result.st_mtime):
+            self.skipped_files += 1
+            return True
+        return False
+
+    def file_found(self, directory, file):
+        """
+
+        Called by the scanner for every new or changed file it hands out.
+
+        """
+
+        with self._lock:
+            self._pending[file.path] = directory
+
+    def directory_scanned(self, directory, mtime, names, subdirs, known, folders=()):
+        """
+
+        Called by the scanner after reading a changed directory.
+
+        Parameters:
+            directory (str): Folder that was read
+            mtime (int): Its st_mtime_ns taken before reading it
+            names (set): Every name currently in it (files and folders)
+            subdirs (list or None): Sub folders to remember (None for a flat scan)
+            known (dict): What files_in() returned for it
+            folders (set): The names in 'names' that are folders
+
+        """
+
+        with self._lock:
+            self._directories.append((directory, os.path.dirname(directory), mtime))
+            self._listings[directory] = (len(names), _names_digest(names), frozenset(folders))
+            self._forget_files.extend((directory, name) for name in known if name not in names)
+
+            if subdirs is not None:
+                present = set(subdirs)
+                rows = self._connection.execute(
+                    "SELECT path FROM directories WHERE parent = ?", (directory,)
+                ).fetchall()
+                self._forget_directories.extend(row[0] for row in rows if row[0] not in present)
+
+                # New sub folders need a row now so known_subdirs() finds them next time
+
+                self._directories.extend((subdir, directory, None) for subdir in subdirs)
+
+    def record(self, files, plan=None, moved=None):
+        """
+
+        Write the rows of one chunk of files, once the chunk's moves are done, so memory
+        doesn't grow with the run and a crash keeps what finished chunks learned.
+
+        A file that had a move planned which didn't happen (failed, cancelled, left in place
+        by a name collision) gets no row, and its folder is read again next run, so it is
+        retried instead of being skipped as unchanged from then on.
+
+        Parameters:
+            files: FileItems of the chunk (the ones the scanner didn't hand out are ignored)
+            plan: MovePlan of the chunk, used to store each file's decision
+            moved (set, optional): Source paths whose move succeeded (every planned move when None)
+
+        """
+
+        decisions = {}
+        planned = set()
+        if plan is not None:
+            decisions = {move.source: move.rule for move in plan}
+            planned = set(decisions)
+            decisions.update((move.source, move.rule) for move in plan.skipped)
+
+        with self._lock:
+            rows = []
+            for file in files:
+                directory = self._pending.pop(file.path, None)
+                if directory is None:
+                    continue
+
+                decision = decisions.get(file.path)
+                if decision is not None and moved is not None and file.path not in moved:
+                    self._retry.add(directory)
+                    continue
+
+                if file.path in planned:
+                    moved_out = self._moved_out.setdefault(directory, [0, 0])
+                    moved_out[0] += 1
+                    moved_out[1] = (moved_out[1] + hash(file.name)) & _DIGEST_MASK
+
+                rows.append((directory, file.name, file.inode, file.size, file.mtime, decision))
+
+            if plan is not None:
+                self._destination_folders.update(
+                    os.path.dirname(move.destination) for move in plan if moved is None or move.source in moved
+                )
+
+            with self._connection:
+                self._connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+            self.recorded_files += len(rows)
+
+    def _only_our_changes(self, directory):
+        """
+
+        True when the folder now holds exactly what it held when it was read, minus the
+        files this run moved out of it and plus the folders this run created in it.
+
+        """
+
+        count, digest, folders = self._listings[directory]
+        moved_count, moved_digest = self._moved_out.get(directory, (0, 0))
+
+        prefix = directory.rstrip(os.sep) + os.sep
+        created = {folder[len(prefix):].split(os.sep)[0] for folder in self._destination_folders
+                   if folder.startswith(prefix)}
+
+        try:
+            names = [name for name in os.listdir(directory) if name not in created or name in folders]
+        except OSError:
+            return False
+
+        return len(names) == count - moved_count and _names_digest(names) == (digest - moved_digest) & _DIGEST_MASK
+
+    def _settled(self, directory, parent, mtime):
+        """
+
+        Folder row with the folder's mtime after the run when only our moves changed it.
+
+        """
+
+        if mtime is None or directory in self._retry or directory not in self._listings:
+            return directory, parent, mtime
+
+        try:
+            current = os.stat(directory).st_mtime_ns
+        except OSError:
+            return directory, parent, mtime
+
+        # The stat comes before the listing: a change after it shows up as a newer mtime next run
+
+        if current != mtime and self._only_our_changes(directory):
+            mtime = current
+        return directory, parent, mtime
+
+    def save(self):
+        """
+
+        Write the folder rows (mtimes, sub folders, what disappeared) in one transaction,
+        after every chunk has been record()ed. Until then a folder looks changed to the
+        next run, which then only re-reads it.
+
+        """
+
+        with self._lock:
+            directories = [self._settled(*row) for row in self._directories]
+
+        with self._lock, self._connection:
+
+            # Sub folder rows (mtime None) never overwrite a real mtime
+
+            self._connection.executemany(
+                "INSERT INTO directories VALUES (?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "parent = excluded.parent, mtime = COALESCE(excluded.mtime, directories.mtime)",
+                directories
+            )
+            self._connection.executemany(
+                "DELETE FROM files WHERE directory = ? AND name = ?", self._forget_files
+            )
+            self._connection.executemany(
+                "UPDATE directories SET mtime = NULL WHERE path = ?", ((path,) for path in self._retry)
+            )
+
+            for path in self._forget_directories:
+                prefix = path.rstrip(os.sep) + os.sep
+                self._connection.execute(
+                    "DELETE FROM directories WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (path, len(prefix), prefix)
+                )
+                self._connection.execute(
+                    "DELETE FROM files WHERE directory = ? OR substr(directory, 1, ?) = ?",
+                    (path, len(prefix), prefix)
+                )
+
+        logger.info(f"Scan index saved: {self.recorded_files} new or changed files, "
+                    f"{self.skipped_files} unchanged files and {self.skipped_directories} unchanged folders skipped")
+
+        self._directories = []
+        self._forget_files = []
+        self._forget_directories = []
+        self._pending = {}
+        self._retry = set()
+        self._listings = {}
+        self._moved_out = {}
+        self._destination_folders = set()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,222 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import SCAN_WORKERS
+from services.models import FileItem, default_owner
+from services.owners import OwnerResolver
+
+logger = logging.getLogger(__name__)
+
+
+def _iter_directory(directory, owner, index=None, skip_dirs=None, excluded_items=(), scan_filter=None,
+                    subdirs=None):
+    """
+    
+    Read one directory, yielding a FileItem for every file as the directory is read.
+    
+    Sub folders are only collected (into the 'subdirs' list) when skip_dirs is given
+    (recursive walk). With a ScanIndex an unchanged directory isn't read at all, and in
+    a changed one only new or changed files come out. A ScanFilter rejects files by name
+    before they are stat'ed and by age before a FileItem is built.
+    
+    """
+    
+    recursive = skip_dirs is not None
+    owner_of = owner.owner_of if isinstance(owner, OwnerResolver) else None
+    
+    if index is not None:
+        mtime = os.stat(directory).st_mtime_ns
+        
+        if index.directory_unchanged(directory, mtime):
+            if recursive:
+                subdirs.extend(index.known_subdirs(directory))
+            return
+        
+        known = index.files_in(directory)
+        names = set()
+        folders = set()
+        
+    skipped = {"name": 0, "extension": 0, "age": 0}
+    
+    # scandir hands us the file type from the dirent, so only files get a stat call
+    
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            
+            # Every name (files, folders, filtered or not) so the index can tell our moves
+            # from other changes to the folder afterwards
+            
+            if index is not None:
+                names.add(entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    folders.add(entry.name)
+                    
+            # Never follow directory symlinks so a link loop can't trap the walk
+            
+            if recursive and entry.is_dir(follow_symlinks=False):
+                if entry.name in excluded_items:
+                    continue
+                if os.path.normpath(entry.path) in skip_dirs:
+                    continue
+                subdirs.append(entry.path)
+                
+            elif entry.is_file():
+                if scan_filter is not None:
+                    reason = scan_filter.rejects_name(entry.name)
+                    if reason is not None:
+                        skipped[reason] += 1
+                        continue
+                    
+                try:
+                    stat_result = entry.stat()
+                except FileNotFoundError:
+                    
+                    # Deleted or renamed away since readdir, the rest of the folder is fine
+                    
+                    continue
+                
+                if scan_filter is not None and scan_filter.too_old(stat_result.st_mtime):
+                    skipped["age"] += 1
+                    continue
+                
+                if index is not None and index.unchanged_file(known, entry.name, stat_result):
+                    continue
+                    
+                file = FileItem.from_stat(
+                    entry.path, stat_result, owner=owner_of(stat_result) if owner_of else owner
+                )
+                if index is not None:
+                    index.file_found(directory, file)
+                yield file
+                
+    if scan_filter is not None:
+        scan_filter.add(**skipped)
+        
+    if index is not None:
+        index.directory_scanned(directory, mtime, names, subdirs if recursive else None, known, folders)
+
+
+def _read_directory(directory, owner, index=None, skip_dirs=None, excluded_items=(), scan_filter=None):
+    """
+    
+    Read one whole directory.
+    
+    Return:
+        A tuple: (files, subdirectories still to visit)
+    
+    """
+    
+    subdirs = []
+    files = list(_iter_directory(directory, owner, index, skip_dirs, excluded_items, scan_filter, subdirs))
+    return files, subdirs
+
+
+def scan_directory(directory, owner=None, index=None, scan_filter=None):
+    """
+    
+    Scan a single directory (no recursion) and build a FileItem for every file.
+    
+    Parameters:
+        directory (str): Folder to scan
+        owner (str or OwnerResolver, optional): Owner given to every FileItem, or how to find it
+        index (ScanIndex, optional): Skip what didn't change since the last run
+        scan_filter (ScanFilter, optional): Exclusions and age cutoff
+    
+    Return:
+        A list of FileItem objects
+    
+    """
+    
+    return _read_directory(directory, owner or default_owner(), index, scan_filter=scan_filter)[0]
+
+
+def iter_directory(directory, owner=None, index=None, scan_filter=None):
+    """
+    
+    Like scan_directory(), but yields every FileItem as soon as it is read, so a caller
+    can start on the first files of a huge flat folder before the scan is over.
+    
+    """
+    
+    return _iter_directory(directory, owner or default_owner(), index, scan_filter=scan_filter)
+
+
+def _scan_level(directory, skip_dirs, excluded_items, owner, index, scan_filter):
+    """
+    
+    Scan one directory for the recursive walk.
+    
+    Return:
+        A tuple: (files, subdirectories still to visit)
+    
+    """
+    
+    try:
+        return _read_directory(directory, owner, index, skip_dirs, excluded_items, scan_filter)
+    except OSError as e:
+        logger.warning(f"Could not scan '{directory}'. Error: {e}")
+        return [], []
+
+
+def walk_files(root, skip_dirs=(), excluded_items=(), workers=SCAN_WORKERS, owner=None, index=None, scan_filter=None):
+    """
+    
+    Recursively walk 'root' with a bounded thread pool and yield FileItems as they are found.
+    
+    Every directory is its own task on the pool's shared queue, so an idle worker always
+    picks up the next pending directory no matter which branch of the tree it came from.
+    Files are yielded as soon as their directory has been read, so callers can start
+    working before the walk is finished.
+    
+    Parameters:
+        root (str): Top of the tree to walk
+        skip_dirs (iterable): Directory paths that are never entered (e.g. our own output folders)
+        excluded_items (iterable): Directory names that are never entered, at any depth
+        workers (int): Max number of threads reading directories at the same time
+        owner (str or OwnerResolver, optional): Owner given to every FileItem, or how to find it
+        index (ScanIndex, optional): Skip what didn't change since the last run
+        scan_filter (ScanFilter, optional): Exclusions and age cutoff for files
+    
+    """
+    
+    owner = owner or default_owner()
+    skip_dirs = {os.path.normpath(path) for path in skip_dirs}
+    excluded_items = set(excluded_items)
+    
+    # Directories read ahead of the consumer are capped, so a slow consumer keeps
+    # at most this many directories' worth of FileItems in memory
+    
+    limit = workers * 2
+    waiting = deque([root])
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        pending = set()
+        
+        def fill():
+            while waiting and len(pending) < limit:
+                pending.add(pool.submit(_scan_level, waiting.popleft(), skip_dirs, excluded_items, owner, index,
+                                        scan_filter))
+                
+        fill()
+        
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    files, subdirs = future.result()
+                    
+                    # Queue sub folders first so workers stay busy while we yield
+                    
+                    waiting.extend(subdirs)
+                    fill()
+                        
+                    yield from files
+        finally:
+            
+            # Consumer stopped early, drop directories nobody has started on yet
+            
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,257 @@
+import os
+import time
+import logging
+import logging.handlers
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from config import (FILE_CATEGORIES, LOGS_FOLDER, EXCLUDED_ITEMS, DUPLICATES_FOLDER, REPORT_FORMAT,
+                    REPORT_BATCH_SIZE, SHARD_WORKERS, METRICS_FILENAME)
+from services.metrics import Metrics
+from services.report_generator import ReportSink, open_report_sink
+
+logger = logging.getLogger(__name__)
+
+# Set in every shard process by _init_shard
+
+_log_queue = None
+_record_queue = None
+
+
+def split_root(root, excluded_items=EXCLUDED_ITEMS, file_categories=FILE_CATEGORIES):
+    """
+
+    Sub folders of 'root' to run as shards (e.g. one per user under /home).
+    Each one is organized in place, as its own root. Our own output folders and
+    excluded names are left out.
+
+    Return:
+        Sorted list of folder paths
+
+    """
+
+    skip = set(file_categories) | {"Others", DUPLICATES_FOLDER, LOGS_FOLDER} | set(excluded_items)
+
+    with os.scandir(root) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.is_dir(follow_symlinks=False) and entry.name not in skip
+        )
+
+
+class _QueueReportSink(ReportSink):
+    """
+    Streams a shard's report records to the parent process in batches of
+    REPORT_BATCH_SIZE, tagged with the shard root.
+    """
+
+    def __init__(self, root, records, **kwargs):
+        super().__init__(root, **kwargs)
+        self.root = root
+        self.records = records
+
+    def _open(self, first_record):
+        pass
+
+    def _write_batch(self, records):
+        self.records.put((self.root, records))
+
+    def close(self):
+        self.flush()
+
+        # End marker: every batch of this shard is ahead of it in the queue
+
+        self.records.put((self.root, None))
+
+
+class _ForwardHandler(logging.Handler):
+    """Hands log records from the shard processes to our own loggers."""
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+def _init_shard(log_queue, record_queue):
+    global _log_queue, _record_queue
+
+    _log_queue = log_queue
+    _record_queue = record_queue
+
+    # Log records go back to the parent, which writes them with its own handlers
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+def _run_shard(root, dry_run, options):
+    """
+
+    Organize one root inside a pool process. Errors are returned, never raised,
+    so one bad root can't take the others down.
+
+    """
+
+    from services.file_organizer import FileOrganizer
+
+    start = time.perf_counter()
+    sink = _QueueReportSink(root, _record_queue)
+
+    try:
+        organizer = FileOrganizer(root, metrics=True, **options)
+        plan = organizer.organize_files(dry_run=dry_run, extra_report=sink)
+        result = {"root": root, "ok": True, "planned": len(plan), "metrics": organizer.last_metrics}
+    except Exception as e:
+        logger.error(f"Shard '{root}' failed: {e}")
+        result = {"root": root, "ok": False, "error": str(e)}
+    finally:
+        sink.close()
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _drain_records(record_queue, report_sink, finished):
+    """
+
+    Parent side: write every streamed batch into the merged report, with the shard
+    root as the first column. Stops at the None sent by run_shards.
+
+    """
+
+    while True:
+        item = record_queue.get()
+        if item is None:
+            return
+
+        root, records = item
+        if records is None:
+            finished.add(root)
+            continue
+
+        for record in records:
+            report_sink.write({"root": root, **record})
+
+
+def _run_round(roots, workers, context, log_queue, record_queue, dry_run, options, on_result):
+    """
+
+    Run 'roots' on one process pool.
+
+    Return:
+        Roots whose process died (the pool breaks for every shard in flight then)
+
+    """
+
+    broken = []
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_shard,
+                             initargs=(log_queue, record_queue)) as pool:
+        futures = {pool.submit(_run_shard, root, dry_run, options): root for root in roots}
+
+        for future in as_completed(futures):
+            try:
+                on_result(future.result())
+            except BrokenProcessPool:
+                broken.append(futures[future])
+
+    return broken
+
+
+def run_shards(roots, output_folder, workers=SHARD_WORKERS, dry_run=False, report_format=REPORT_FORMAT,
+               **options):
+    """
+
+    Organize many roots at once across a process pool.
+
+    Every shard is a normal FileOrganizer run with its own logs folder. Its report
+    records also stream back to one merged 'batch_report' (with a 'root' column) in
+    'output_folder', its log lines go to this process's log, and its metrics are
+    added into one 'batch_metrics.json' there.
+
+    A shard that raises is reported as failed and the rest carry on. A shard whose
+    process dies breaks the pool for every shard running next to it; those are run
+    again on a fresh pool, and whatever still breaks runs once more on its own so
+    only the culprit fails.
+
+    Parameters:
+        roots (list): Folders to organize (see split_root() to cut one big folder up)
+        output_folder (str): Where the merged report and metrics go
+        workers (int, optional): Processes in the pool (CPU count when None)
+        dry_run (bool): Plan only, the merged report is then the merged plan
+        report_format (str): "csv", "jsonl" or "sqlite", for the shards and the merged report
+        **options: Any other FileOrganizer argument (recursive, dedupe, ...)
+
+    Return:
+        List of shard results (dicts with 'root', 'ok' and 'metrics' or 'error')
+
+    """
+
+    os.makedirs(output_folder, exist_ok=True)
+    options["report_format"] = report_format
+
+    # Spawned workers don't inherit our threads (log listener, report drain) half-copied
+
+    context = multiprocessing.get_context("spawn")
+    log_queue = context.Queue()
+    record_queue = context.Queue()
+
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+
+    results = {}
+    merged = Metrics()
+    finished = set()
+
+    def on_result(result):
+        results[result["root"]] = result
+        if result["ok"]:
+            merged.merge(result["metrics"])
+            logger.info(f"Shard done: {result['root']} ({result['planned']} files, {result['seconds']:.1f}s)")
+        merged.count("shards_ok" if result["ok"] else "shards_failed")
+
+    name = "batch_plan" if dry_run else "batch_report"
+    report_sink = open_report_sink(output_folder, name, report_format, batch_size=REPORT_BATCH_SIZE)
+
+    with report_sink:
+        drain = threading.Thread(target=_drain_records, args=(record_queue, report_sink, finished),
+                                 name="batch-report", daemon=True)
+        drain.start()
+
+        try:
+            logger.info(f"Organizing {len(roots)} roots with {workers or os.cpu_count()} processes")
+
+            broken = _run_round(roots, workers, context, log_queue, record_queue, dry_run, options, on_result)
+            if broken:
+                logger.warning(f"A shard process died, running {len(broken)} shards again")
+                broken = _run_round(broken, workers, context, log_queue, record_queue, dry_run, options, on_result)
+
+            for root in broken:
+                if _run_round([root], 1, context, log_queue, record_queue, dry_run, options, on_result):
+                    logger.error(f"Shard '{root}' failed: its process died")
+                    on_result({"root": root, "ok": False, "error": "shard process died", "seconds": 0.0})
+        finally:
+
+            # Wait for the report of every shard that finished, then stop the drain
+
+            done = {root for root, result in results.items() if result["ok"]}
+            deadline = time.monotonic() + 30
+            while not done <= finished and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            record_queue.put(None)
+            drain.join()
+            listener.stop()
+
+    failed = [result for result in results.values() if not result["ok"]]
+    merged.dump(os.path.join(output_folder, "batch_" + METRICS_FILENAME),
+                {"shards": {root: {key: value for key, value in result.items() if key != "metrics"}
+                            for root, result in results.items()}})
+
+    logger.info(f"Batch finished: {len(results) - len(failed)} roots organized, {len(failed)} failed")
+    return [results[root] for root in roots if root in results]
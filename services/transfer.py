@@ -0,0 +1,219 @@
+import os
+import errno
+import shutil
+import hashlib
+import logging
+import threading
+
+from config import COPY_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning "this kernel/filesystem pair can't do that copy call", try the next method
+
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+# One reusable buffer per thread for the readinto fallback
+
+_buffers = threading.local()
+
+
+class TransferError(Exception):
+    """Raised when a copied file doesn't match its source."""
+
+
+def _buffer(chunk_size):
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) != chunk_size:
+        buffer = bytearray(chunk_size)
+        _buffers.buffer = buffer
+    return buffer
+
+
+def _copy_file_range(source_fd, destination_fd, size):
+    copied = 0
+    while copied < size:
+        sent = os.copy_file_range(source_fd, destination_fd, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+def _sendfile(source_fd, destination_fd, size):
+    copied = 0
+    while copied < size:
+        sent = os.sendfile(destination_fd, source_fd, copied, size - copied)
+        if sent == 0:
+            break
+        copied += sent
+    return copied
+
+
+def _kernel_copy(source_fd, destination_fd, size):
+    """
+    
+    Copy inside the kernel with copy_file_range, then sendfile.
+    
+    Return:
+        Bytes copied, or None when neither call works for these two files
+    
+    """
+    
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append(_copy_file_range)
+    if hasattr(os, "sendfile"):
+        methods.append(_sendfile)
+        
+    for copy in methods:
+        try:
+            return copy(source_fd, destination_fd, size)
+        except OSError as e:
+            
+            # Only switch methods when nothing was written yet
+            
+            if e.errno not in _UNSUPPORTED or os.lseek(destination_fd, 0, os.SEEK_CUR) != 0:
+                raise
+            
+    return None
+
+
+def _stream_copy(source_fd, destination_fd, chunk_size, digest=None):
+    """
+    
+    User space copy through one reusable buffer, hashing the data on the way through.
+    
+    """
+    
+    buffer = _buffer(chunk_size)
+    view = memoryview(buffer)
+    copied = 0
+    
+    with open(source_fd, "rb", buffering=0, closefd=False) as source:
+        while True:
+            read = source.readinto(buffer)
+            if not read:
+                break
+            
+            chunk = view[:read]
+            if digest is not None:
+                digest.update(chunk)
+                
+            written = 0
+            while written < read:
+                written += os.write(destination_fd, chunk[written:])
+            copied += read
+            
+    return copied
+
+
+def _hash_file(path, algorithm, chunk_size):
+    digest = hashlib.new(algorithm)
+    buffer = _buffer(chunk_size)
+    view = memoryview(buffer)
+    
+    with open(path, "rb", buffering=0) as f:
+        
+        # Ask the kernel to drop cached pages so the check reads what hit the disk
+        
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+            
+    return digest.hexdigest()
+
+
+def _fsync_directory(folder):
+    try:
+        fd = os.open(folder, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def transfer_file(source, destination, verify=False, algorithm="sha256", chunk_size=COPY_CHUNK_SIZE):
+    """
+    
+    Move a file to another filesystem safely.
+    
+    Without verification the data is copied inside the kernel (copy_file_range or
+    sendfile) when possible, falling back to a readinto loop with a reusable buffer.
+    With verification the source is read once through the buffer and hashed on the
+    way; after the copy is fsynced the destination is hashed and compared.
+    
+    The copy is written next to the destination under a temporary name, fsynced,
+    renamed into place and only then is the source unlinked.
+    
+    Parameters:
+        source (str): File to move
+        destination (str): Full destination path (its folder must exist)
+        verify (bool): Compare checksums before deleting the source
+        algorithm (str): hashlib algorithm used when verifying
+        chunk_size (int): Buffer size for the user space path
+    
+    Return:
+        Hex checksum of the data when verify is on, otherwise None
+    
+    """
+    
+    folder, name = os.path.split(destination)
+    temporary = os.path.join(folder, f".{name}.partial")
+    checksum = None
+    
+    source_fd = os.open(source, os.O_RDONLY)
+    try:
+        size = os.fstat(source_fd).st_size
+        destination_fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        
+        try:
+            if verify:
+                digest = hashlib.new(algorithm)
+                copied = _stream_copy(source_fd, destination_fd, chunk_size, digest)
+                checksum = digest.hexdigest()
+            else:
+                copied = _kernel_copy(source_fd, destination_fd, size)
+                if copied is None:
+                    copied = _stream_copy(source_fd, destination_fd, chunk_size)
+                    
+            if copied != size:
+                raise TransferError(f"Copied {copied} of {size} bytes for '{source}'")
+            
+            os.fsync(destination_fd)
+        finally:
+            os.close(destination_fd)
+            
+        if verify:
+            copied_checksum = _hash_file(temporary, algorithm, chunk_size)
+            if copied_checksum != checksum:
+                raise TransferError(f"Checksum mismatch for '{source}': {checksum} != {copied_checksum}")
+            
+        # Keep permissions and timestamps like shutil.move does
+        
+        shutil.copystat(source, temporary)
+        os.replace(temporary, destination)
+        _fsync_directory(folder)
+        
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    finally:
+        os.close(source_fd)
+        
+    os.unlink(source)
+    logger.debug(f"Transferred '{source}' to '{destination}' ({size} bytes)")
+    
+    return checksum
@@ -0,0 +1,217 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+# inotify flags (linux/inotify.h)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    def __init__(self, directory):
+        """
+
+        Linux inotify through ctypes, watching one directory for files that were
+        closed after writing or moved in.
+
+        Raises:
+            OSError when inotify isn't available
+
+        """
+
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout):
+        """
+
+        Wait up to 'timeout' seconds for events.
+
+        Return:
+            A list of file names, or None when the kernel queue overflowed
+            and the caller has to rescan the directory
+
+        """
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+
+            if length and not mask & IN_ISDIR:
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class PollingWatcher:
+    def __init__(self, directory):
+        """
+
+        Fallback for systems without inotify: every read() lists the directory and
+        reports files whose size or mtime changed since the previous look.
+
+        """
+
+        self.directory = directory
+        self._seen = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat_result = entry.stat()
+                    snapshot[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout):
+        time.sleep(timeout)
+
+        snapshot = self._snapshot()
+        names = [name for name, state in snapshot.items() if self._seen.get(name) != state]
+
+        # Only keep what is still there so memory follows the directory, not the uptime
+
+        self._seen = snapshot
+        return names
+
+    def close(self):
+        self._seen = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_watcher(directory, use_inotify=True):
+    """
+
+    inotify when we can, polling otherwise.
+
+    """
+
+    if use_inotify:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify not available ({e}), falling back to polling")
+
+    return PollingWatcher(directory)
+
+
+class BatchWatcher:
+    def __init__(self, directory, watcher, interval_ms, debounce_ms, stop_event):
+        """
+
+        Turns raw file events into batches of paths that are ready to organize.
+
+        A path is ready once it had no new event for 'debounce_ms' (so a file written
+        in several close-write rounds is only handled once it settled). Ready paths are
+        handed out every 'interval_ms'. Our own moves go into sub folders, which aren't
+        watched, so they never come back as events.
+
+        Parameters:
+            directory (str): Watched folder
+            watcher: InotifyWatcher or PollingWatcher for that folder
+            interval_ms (int): Time between batches
+            debounce_ms (int): Quiet time before a file counts as finished
+            stop_event (threading.Event): Set it to end the watch
+
+        """
+
+        self.directory = directory
+        self.watcher = watcher
+        self.interval = interval_ms / 1000
+        self.debounce = debounce_ms / 1000
+        self.stop_event = stop_event
+        self._pending = {}
+
+    def _rescan(self, now):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    self._pending.setdefault(entry.path, now)
+
+    def __iter__(self):
+
+        # Whatever is already sitting in the folder is the first batch
+
+        self._rescan(time.monotonic() - self.debounce)
+        next_batch = time.monotonic()
+
+        while not self.stop_event.is_set():
+            timeout = max(0.0, min(next_batch - time.monotonic(), self.interval))
+            names = self.watcher.read(timeout)
+            now = time.monotonic()
+
+            if names is None:
+                logger.info("Watch event queue overflowed, rescanning the folder")
+                self._rescan(now)
+            else:
+                for name in names:
+                    self._pending[os.path.join(self.directory, name)] = now
+
+            if now < next_batch:
+                continue
+
+            next_batch = now + self.interval
+
+            ready = [path for path, last_event in self._pending.items() if now - last_event >= self.debounce]
+            for path in ready:
+                del self._pending[path]
+
+            if ready:
+                yield ready
@@ -0,0 +1,96 @@
+import os
+import glob
+import logging
+
+import pytest
+
+import main
+import file_organizer
+import logging_config
+
+
+@pytest.fixture(autouse=True)
+def loggers(monkeypatch):
+    """setup_logger() calls, without touching the real handlers."""
+
+    calls = []
+    monkeypatch.setattr(logging_config, "setup_logger", lambda **kwargs: calls.append(kwargs))
+    return calls
+
+
+def _inbox(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    for name in ("notes.txt", "photo.jpg"):
+        (inbox / name).write_text(name)
+    return str(inbox)
+
+
+def test_shared_options_reach_the_organizer():
+    args = file_organizer.build_parser().parse_args([
+        "organize", "/tmp/x", "--recursive", "--incremental", "--dedupe", "--duplicate-action", "hardlink",
+        "--sniff", "--rules", "rules.toml", "--on-collision", "keep_newest", "--report-format", "jsonl",
+        "--owner-source", "mapping", "--owner-map", "teams.json",
+    ])
+
+    assert args.run is file_organizer.organize
+    assert file_organizer._organizer_options(args) == {
+        "recursive": True, "incremental": True, "dedupe": True, "duplicate_action": "hardlink",
+        "sniff_content": True, "rule_file": "rules.toml", "collision_policy": "keep_newest",
+        "report_format": "jsonl", "owner_source": "mapping", "owner_map": "teams.json",
+    }
+
+
+def test_organize_exits_0(tmp_path, loggers):
+    inbox = _inbox(tmp_path)
+
+    assert file_organizer.main(["--log-dir", str(tmp_path), "--log-level", "DEBUG", "organize", inbox]) == 0
+
+    assert glob.glob(os.path.join(inbox, "*.*")) == []
+    assert loggers == [{"base_directory": str(tmp_path), "level": logging.DEBUG}]
+
+
+def test_plan_moves_nothing(tmp_path):
+    inbox = _inbox(tmp_path)
+
+    assert file_organizer.main(["plan", inbox]) == 0
+
+    assert sorted(os.listdir(inbox)) == ["logs", "notes.txt", "photo.jpg"]
+    assert os.path.exists(os.path.join(inbox, "logs", "plan.csv"))
+
+
+def test_a_failing_command_exits_1(tmp_path):
+    assert file_organizer.main(["organize", str(tmp_path / "missing")]) == 1
+    assert file_organizer.main(["resume", str(tmp_path)]) == 1
+
+
+@pytest.mark.parametrize("argv, code", [
+    ([], 2),
+    (["organise", "/tmp"], 2),
+    (["organize"], 2),
+    (["organize", "/tmp", "--on-collision", "overwrite"], 2),
+    (["--help"], 0),
+])
+def test_argument_errors_exit_before_anything_runs(argv, code, loggers):
+    with pytest.raises(SystemExit) as exit_info:
+        file_organizer.main(argv)
+
+    assert exit_info.value.code == code
+    assert loggers == []
+
+
+def test_batch_exits_1_when_a_root_fails(tmp_path, capsys):
+    inbox = _inbox(tmp_path)
+    missing = str(tmp_path / "missing")
+
+    code = file_organizer.main(["batch", inbox, missing, "--workers", "1", "--output", str(tmp_path / "out")])
+
+    assert code == 1
+    assert f"Failed: {missing}" in capsys.readouterr().err
+
+
+def test_main_py_takes_the_same_commands(tmp_path):
+    inbox = _inbox(tmp_path)
+
+    assert main.main(["organize", inbox]) == 0
+    assert main.main(["organize", str(tmp_path / "missing")]) == 1
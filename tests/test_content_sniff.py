@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from services.models import FileItem
+from services.content_sniff import MAGIC_NUMBERS, SniffCache, ContentTypeRule, sniff_type
+
+TAR_HEADER = b"\0" * 257 + b"ustar\x0000"
+
+
+@pytest.mark.parametrize("header, extension", [
+    (b"%PDF-1.7\n", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n\0\0", ".png"),
+    (b"\xff\xd8\xff\xe0JFIF", ".jpg"),
+    (b"RIFF\0\0\0\0WAVEfmt ", ".wav"),
+    (b"RIFF\0\0\0\0AVI LIST", ".avi"),
+    (b"\0\0\0\x14ftypqt  ", ".mov"),
+    (b"\0\0\0\x18ftypisom", ".mp4"),
+    (b"PK\x03\x04\x14\0", ".zip"),
+    (TAR_HEADER, ".tar"),
+    (b"plain text", None),
+    (b"", None),
+])
+def test_magic_numbers(header, extension):
+    assert sniff_type(header) == extension
+
+
+def test_every_signature_is_recognized():
+    for parts, extension in MAGIC_NUMBERS:
+        header = bytearray(300)
+        for offset, signature in parts:
+            header[offset:offset + len(signature)] = signature
+
+        # An earlier, more specific signature may win (QuickTime is also 'ftyp')
+
+        assert sniff_type(bytes(header)) is not None
+
+
+def _write(path, data, mtime=None):
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return FileItem(path)
+
+
+def test_cache_is_dropped_when_size_or_mtime_change(tmp_path):
+    file = _write(str(tmp_path / "download"), b"%PDF-1.7", mtime=1000)
+
+    with SniffCache(str(tmp_path / "sniff.db")) as cache:
+        cache.put(file, ".pdf")
+        cache.put(_write(str(tmp_path / "unknown"), b"???"), None)
+        cache.save()
+
+        assert cache.get(file) == ".pdf"
+        assert cache.get(FileItem(str(tmp_path / "unknown"))) == ""
+
+        _write(file.path, b"%PDF-1.7", mtime=2000)
+        assert cache.get(FileItem(file.path)) is None
+
+        _write(file.path, b"%PDF-1.7 and more", mtime=1000)
+        assert cache.get(FileItem(file.path)) is None
+
+
+def test_rule_reads_unknown_files_once_across_runs(tmp_path):
+    os.makedirs(tmp_path / "in")
+    scan = _write(str(tmp_path / "in" / "scan"), b"%PDF-1.7")
+    known = _write(str(tmp_path / "in" / "notes.txt"), b"%PDF-1.7")
+    categories = {"Documents": [".pdf", ".txt"], "Others": []}
+
+    def run():
+        with SniffCache(str(tmp_path / "sniff.db")) as cache:
+            rule = ContentTypeRule("Sniff", "", str(tmp_path), categories, cache=cache)
+            rule.prepare([scan, known])
+            return rule
+
+    first = run()
+    assert first.applies_to(scan)
+    assert not first.applies_to(known)
+    assert first.destination_for(scan).startswith(str(tmp_path / "Documents"))
+    assert (first.stats["reads"], first.stats["cache_hits"]) == (1, 0)
+
+    second = run()
+    assert second.applies_to(scan)
+    assert (second.stats["reads"], second.stats["cache_hits"]) == (0, 1)
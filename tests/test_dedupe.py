@@ -0,0 +1,144 @@
+import os
+import errno
+
+import services.dedupe as dedupe
+from services.models import FileItem
+from services.dedupe import PARTIAL_HASH_BYTES, HashCache, find_duplicates
+from services.executor import execute_plan
+from services.rules_engine import RulesEngine, DuplicateRule
+
+BIG = 4 * PARTIAL_HASH_BYTES
+
+
+def _write(path, data, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return FileItem(path)
+
+
+def _counting(monkeypatch, name):
+    calls = []
+    hasher = getattr(dedupe, name)
+
+    def counted(path, *args):
+        calls.append(path)
+        return hasher(path, *args)
+
+    monkeypatch.setattr(dedupe, name, counted)
+    return calls
+
+
+def test_same_size_different_tail_is_not_a_duplicate(tmp_path, monkeypatch):
+    full_calls = _counting(monkeypatch, "full_hash")
+
+    head = b"h" * (BIG - 1)
+    first = _write(str(tmp_path / "first.bin"), head + b"1")
+    second = _write(str(tmp_path / "second.bin"), head + b"2")
+
+    assert find_duplicates([first, second]) == {}
+
+    # The partial hash (head and tail) already tells them apart
+
+    assert full_calls == []
+
+
+def test_same_head_and_tail_different_middle_needs_the_full_hash(tmp_path, monkeypatch):
+    full_calls = _counting(monkeypatch, "full_hash")
+
+    edge = b"e" * PARTIAL_HASH_BYTES
+    first = _write(str(tmp_path / "first.bin"), edge + b"a" * PARTIAL_HASH_BYTES + edge)
+    second = _write(str(tmp_path / "second.bin"), edge + b"b" * PARTIAL_HASH_BYTES + edge)
+    other_size = _write(str(tmp_path / "other.bin"), edge)
+
+    assert find_duplicates([first, second, other_size]) == {}
+    assert sorted(full_calls) == sorted([first.path, second.path])
+
+
+def test_identical_files_keep_the_oldest(tmp_path):
+    data = os.urandom(BIG)
+    newest = _write(str(tmp_path / "a_newest.bin"), data, mtime=3000)
+    oldest = _write(str(tmp_path / "z_oldest.bin"), data, mtime=1000)
+    middle = _write(str(tmp_path / "m_middle.bin"), data, mtime=2000)
+
+    duplicates = find_duplicates([newest, oldest, middle])
+
+    assert set(duplicates) == {newest.path, middle.path}
+    assert {kept.path for kept in duplicates.values()} == {oldest.path}
+
+
+def test_empty_files_are_never_duplicates(tmp_path):
+    files = [_write(str(tmp_path / f"empty_{number}"), b"") for number in range(3)]
+
+    assert find_duplicates(files) == {}
+
+
+def test_hash_cache_is_dropped_when_size_or_mtime_change(tmp_path):
+    file = _write(str(tmp_path / "data.bin"), b"x" * 100, mtime=1000)
+
+    with HashCache(str(tmp_path / "hashes.db")) as cache:
+        cache.put(file, "partial", "full")
+        cache.save()
+
+        assert cache.get(file) == ("partial", "full")
+
+        _write(file.path, b"x" * 100, mtime=2000)
+        assert cache.get(FileItem(file.path)) == (None, None)
+
+        _write(file.path, b"x" * 101, mtime=1000)
+        assert cache.get(FileItem(file.path)) == (None, None)
+
+
+def _duplicate_plan(tmp_path):
+    data = os.urandom(1000)
+    kept = _write(str(tmp_path / "in" / "kept.bin"), data, mtime=1000)
+    copy = _write(str(tmp_path / "in" / "copy.bin"), data, mtime=2000)
+
+    engine = RulesEngine(vectorized=False)
+    engine.add_rule(DuplicateRule("Duplicates", "", find_duplicates([kept, copy]), str(tmp_path / "out"),
+                                  action="hardlink"))
+    return kept, copy, engine.plan([kept, copy])
+
+
+def test_hardlink_action_links_the_copy_to_the_kept_file(tmp_path):
+    kept, copy, plan = _duplicate_plan(tmp_path)
+
+    assert [(move.source, move.link_target) for move in plan] == [(copy.path, kept.path)]
+
+    assert execute_plan(plan) == 1
+    assert not os.path.exists(copy.path)
+    assert os.path.samefile(plan.moves[0].destination, kept.path)
+
+
+def test_hardlink_falls_back_to_a_move(tmp_path, monkeypatch):
+    kept, copy, plan = _duplicate_plan(tmp_path)
+
+    def no_links(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", no_links)
+
+    assert execute_plan(plan) == 1
+    assert not os.path.exists(copy.path)
+    assert os.path.exists(plan.moves[0].destination)
+    assert not os.path.samefile(plan.moves[0].destination, kept.path)
+    assert os.path.exists(kept.path)
+
+
+def test_process_files_hardlinks_through_the_shared_apply(tmp_path):
+    data = os.urandom(1000)
+    kept = _write(str(tmp_path / "in" / "kept.bin"), data, mtime=1000)
+    copy = _write(str(tmp_path / "in" / "copy.bin"), data, mtime=2000)
+
+    engine = RulesEngine(vectorized=False)
+    engine.add_rule(DuplicateRule("Duplicates", "", find_duplicates([kept, copy]), str(tmp_path / "out"),
+                                  action="hardlink"))
+
+    report = []
+    engine.process_files([kept, copy], report)
+
+    assert [record["original_path"] for record in report] == [copy.path]
+    assert not os.path.exists(copy.path)
+    assert os.path.samefile(report[0]["destination"], kept.path)
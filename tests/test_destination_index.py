@@ -0,0 +1,102 @@
+import os
+
+from services.models import FileItem
+from services.rules_engine import Rule, RulesEngine, ExtensionRule
+from services.destination_index import DestinationIndex
+
+
+def _write(path, data="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+    return path
+
+
+class OldStyleRule(Rule):
+    """A custom rule written against the original apply(file) signature."""
+
+    def __init__(self, destination_folder):
+        super().__init__("Old style", "Moves every .txt file")
+        self.destination_folder = destination_folder
+
+    def applies_to(self, file):
+        return file.extension == ".txt"
+
+    def apply(self, file):
+        destination = os.path.join(self.destination_folder, file.name)
+        os.makedirs(self.destination_folder, exist_ok=True)
+        os.rename(file.path, destination)
+        return True, destination
+
+
+def test_process_files_keeps_old_apply_signature(tmp_path):
+    source = _write(str(tmp_path / "in" / "note.txt"))
+
+    engine = RulesEngine()
+    engine.add_rule(OldStyleRule(str(tmp_path / "out")))
+
+    report = []
+    engine.process_files([FileItem(source)], report)
+
+    assert os.path.exists(tmp_path / "out" / "note.txt")
+    assert report[0]["collision"] is None
+
+
+def test_process_files_renames_on_collision(tmp_path):
+    first = _write(str(tmp_path / "a" / "note.txt"), "a")
+    second = _write(str(tmp_path / "b" / "note.txt"), "b")
+
+    engine = RulesEngine()
+    engine.add_rule(ExtensionRule("Docs", "", [".txt"], str(tmp_path / "Docs")))
+
+    report = []
+    engine.process_files([FileItem(first), FileItem(second)], report)
+
+    assert [os.path.basename(record["destination"]) for record in report] == ["note.txt", "note (1).txt"]
+    assert [record["collision"] for record in report] == [None, "renamed"]
+
+
+def test_unlistable_destination_fails_only_that_file(tmp_path):
+
+    # A top level file named like a category folder: nothing can be moved under it
+
+    _write(str(tmp_path / "Documents"))
+    blocked = _write(str(tmp_path / "in" / "report.txt"))
+    fine = _write(str(tmp_path / "in" / "photo.jpg"))
+
+    engine = RulesEngine(vectorized=False)
+    engine.add_rule(ExtensionRule("Docs", "", [".txt"], str(tmp_path / "Documents")))
+    engine.add_rule(ExtensionRule("Images", "", [".jpg"], str(tmp_path / "Images")))
+
+    plan = engine.plan([FileItem(blocked), FileItem(fine)], destinations=DestinationIndex())
+
+    assert sorted(move.rule for move in plan) == ["Docs", "Images"]
+
+
+def test_keep_newest_between_files_of_one_plan(tmp_path):
+    from services.executor import execute_plan
+
+    older = _write(str(tmp_path / "a" / "note.txt"), "older")
+    newer = _write(str(tmp_path / "b" / "note.txt"), "newer")
+    now = os.stat(newer).st_mtime
+    os.utime(older, (now - 60, now - 60))
+
+    engine = RulesEngine(vectorized=False)
+    engine.add_rule(ExtensionRule("Docs", "", [".txt"], str(tmp_path / "Docs")))
+
+    plan = engine.plan([FileItem(older), FileItem(newer)], destinations=DestinationIndex("keep_newest"))
+
+    assert [move.source for move in plan] == [newer]
+    assert [(move.source, move.collision) for move in plan.skipped] == [(older, "skipped_older")]
+
+    report = []
+    execute_plan(plan, report)
+
+    # The older file stays where it was instead of being overwritten at the destination
+
+    with open(older) as f:
+        assert f.read() == "older"
+    with open(plan.moves[0].destination) as f:
+        assert f.read() == "newer"
+    assert {record["original_path"]: record["collision"] for record in report} == \
+        {older: "skipped_older", newer: "replaced"}
@@ -0,0 +1,113 @@
+import os
+import glob
+import time
+
+import services.file_organizer as file_organizer
+from services.file_organizer import FileOrganizer
+
+
+def _write(path, data, age=0):
+    with open(path, "w") as f:
+        f.write(data)
+    if age:
+        then = time.time() - age
+        os.utime(path, (then, then))
+    return path
+
+
+def test_hardlinked_duplicates_across_chunks(tmp_path, monkeypatch):
+
+    # One file per pipeline chunk, in name order: the kept (oldest) copy is planned
+    # and moved in the first chunk, every duplicate in a later one
+
+    monkeypatch.setattr(file_organizer, "PIPELINE_FIRST_CHUNK", 1)
+    monkeypatch.setattr(file_organizer, "PIPELINE_CHUNK_SIZE", 1)
+
+    scan = FileOrganizer._scan_files
+    monkeypatch.setattr(FileOrganizer, "_scan_files",
+                        lambda self, *args: sorted(scan(self, *args), key=lambda file: file.name))
+
+    _write(str(tmp_path / "a_kept.txt"), "same content", age=3600)
+    for number in range(5):
+        _write(str(tmp_path / f"copy_{number}.txt"), "same content")
+
+    FileOrganizer(str(tmp_path), dedupe=True, duplicate_action="hardlink").organize_files()
+
+    kept = glob.glob(str(tmp_path / "Documents" / "**" / "a_kept.txt"), recursive=True)
+    copies = glob.glob(str(tmp_path / "Duplicates" / "**" / "copy_*.txt"), recursive=True)
+
+    assert len(kept) == 1
+    assert len(copies) == 5
+    assert all(os.path.samefile(copy, kept[0]) for copy in copies)
+    assert os.stat(kept[0]).st_nlink == 6
+
+
+def test_profile_covers_worker_threads(tmp_path):
+    import pstats
+
+    for number in range(20):
+        _write(str(tmp_path / f"file_{number}.txt"), str(number))
+
+    FileOrganizer(str(tmp_path)).organize_files(profile=True)
+
+    stats = pstats.Stats(str(tmp_path / "logs" / "profile.pstats"))
+    functions = {function for _, _, function in stats.stats}
+
+    # Scan, plan and moves all run on pipeline threads, not on the event loop thread
+
+    assert {"_iter_directory", "plan", "execute_plan"} <= functions
+
+
+def test_incremental_retries_failed_moves(tmp_path, monkeypatch):
+    import services.executor as executor
+
+    for name in ("good.txt", "bad.txt"):
+        _write(str(tmp_path / name), name)
+
+    move = executor._move
+
+    def failing_move(planned, *args):
+        if planned.source.endswith("bad.txt"):
+            raise OSError("simulated failure")
+        return move(planned, *args)
+
+    monkeypatch.setattr(executor, "_move", failing_move)
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+    assert os.path.exists(tmp_path / "bad.txt")
+
+    monkeypatch.setattr(executor, "_move", move)
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+
+    assert not os.path.exists(tmp_path / "bad.txt")
+    assert glob.glob(str(tmp_path / "Documents" / "**" / "bad.txt"), recursive=True)
+
+
+def test_new_run_after_cancel(tmp_path, monkeypatch):
+    import threading
+    import services.executor as executor
+
+    for number in range(200):
+        _write(str(tmp_path / f"file_{number}.txt"), str(number))
+
+    cancel_event = threading.Event()
+    move = executor._move
+    moves = 0
+
+    def cancelling_move(*args):
+        nonlocal moves
+        moves += 1
+        if moves == 5:
+            cancel_event.set()
+        return move(*args)
+
+    monkeypatch.setattr(executor, "_move", cancelling_move)
+    FileOrganizer(str(tmp_path)).organize_files(cancel_event=cancel_event)
+    assert glob.glob(str(tmp_path / "*.txt"))
+
+    # Cancelled is not interrupted: the next run just organizes what is left
+
+    monkeypatch.setattr(executor, "_move", move)
+    FileOrganizer(str(tmp_path)).organize_files()
+
+    assert glob.glob(str(tmp_path / "*.txt")) == []
+    assert len(glob.glob(str(tmp_path / "Documents" / "**" / "*.txt"), recursive=True)) == 200
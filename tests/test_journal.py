@@ -0,0 +1,106 @@
+import os
+import sys
+import glob
+import random
+import subprocess
+
+import pytest
+
+from config import LOGS_FOLDER, JOURNAL_FILENAME
+from services.file_organizer import FileOrganizer
+from services.journal import unfinished_moves
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILES = 300
+
+# Organizes the folder in a child process that dies (no cleanup, nothing flushed) once it
+# has made a given number of moves, like a kill -9 at that point of the run
+
+CRASHING_RUN = """
+import os, sys
+import services.executor as executor
+from services.file_organizer import FileOrganizer
+
+limit = int(sys.argv[2])
+moves = 0
+move = executor._move
+
+def dying_move(*args):
+    global moves
+    moves += 1
+    if moves > limit:
+        os._exit(9)
+    return move(*args)
+
+executor._move = dying_move
+FileOrganizer(sys.argv[1]).organize_files()
+"""
+
+
+def _crashed_run(folder, limit):
+    for number in range(FILES):
+        with open(os.path.join(folder, f"file_{number}.txt"), "w") as f:
+            f.write(str(number))
+
+    completed = subprocess.run([sys.executable, "-c", CRASHING_RUN, folder, str(limit)], cwd=REPO)
+    assert completed.returncode == 9
+
+
+def _contents(paths):
+    contents = []
+    for path in paths:
+        with open(path) as f:
+            contents.append(f.read())
+    return sorted(contents, key=int)
+
+
+def _everything():
+    return [str(number) for number in range(FILES)]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_resume_after_crash_loses_and_duplicates_nothing(tmp_path, seed):
+    _crashed_run(str(tmp_path), random.Random(seed).randint(0, FILES - 1))
+
+    journal = os.path.join(str(tmp_path), LOGS_FOLDER, JOURNAL_FILENAME)
+    if unfinished_moves(journal):
+
+        # A new run must not throw the interrupted run's journal away
+
+        with pytest.raises(Exception, match="interrupted run"):
+            FileOrganizer(str(tmp_path)).organize_files()
+
+    FileOrganizer(str(tmp_path)).resume()
+
+    assert glob.glob(str(tmp_path / "*.txt")) == []
+    assert _contents(glob.glob(str(tmp_path / "Documents" / "**" / "*.txt"), recursive=True)) == _everything()
+    assert unfinished_moves(journal) == 0
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_rollback_after_crash_loses_and_duplicates_nothing(tmp_path, seed):
+    _crashed_run(str(tmp_path), random.Random(seed).randint(0, FILES - 1))
+
+    FileOrganizer(str(tmp_path)).rollback()
+
+    assert glob.glob(str(tmp_path / "Documents" / "**" / "*.txt"), recursive=True) == []
+    assert _contents(glob.glob(str(tmp_path / "*.txt"))) == _everything()
+
+    # Nothing left to finish, so the next run starts normally
+
+    assert unfinished_moves(os.path.join(str(tmp_path), LOGS_FOLDER, JOURNAL_FILENAME)) == 0
+    FileOrganizer(str(tmp_path)).organize_files()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_rollback_after_resume_restores_the_whole_run(tmp_path, seed):
+    _crashed_run(str(tmp_path), random.Random(seed).randint(0, FILES - 1))
+
+    FileOrganizer(str(tmp_path)).resume()
+    FileOrganizer(str(tmp_path)).rollback()
+
+    # Moves of the crashed run and of the resume alike
+
+    assert glob.glob(str(tmp_path / "Documents" / "**" / "*.txt"), recursive=True) == []
+    assert _contents(glob.glob(str(tmp_path / "*.txt"))) == _everything()
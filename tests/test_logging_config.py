@@ -0,0 +1,22 @@
+import atexit
+import logging
+
+import logging_config
+
+
+def test_setup_logger_registers_the_exit_hook_once(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    monkeypatch.setattr(logging_config, "_exit_hook_registered", False)
+
+    try:
+        for _ in range(3):
+            logging_config.setup_logger(base_directory=str(tmp_path), queued=True)
+    finally:
+        logging_config.setup_logger(base_directory=str(tmp_path), queued=False)
+        for handler in logging_config._handlers:
+            logging.getLogger().removeHandler(handler)
+            handler.close()
+        logging_config._handlers = []
+
+    assert registered == [logging_config._stop_listener]
@@ -0,0 +1,83 @@
+import os
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import services.owners as owners
+from services.owners import OwnerResolver
+from services.models import default_owner
+
+
+def _stat(uid, gid=100):
+    return os.stat_result((0o100644, 1, 1, 1, uid, gid, 0, 0, 0, 0))
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """A fake pwd with two known users, counting lookups."""
+
+    names = {1000: "alice", 1001: "bob"}
+    calls = []
+
+    def getpwuid(uid):
+        calls.append(uid)
+        if uid not in names:
+            raise KeyError(uid)
+        return SimpleNamespace(pw_name=names[uid])
+
+    def getpwnam(name):
+        for uid, known in names.items():
+            if known == name:
+                return SimpleNamespace(pw_uid=uid)
+        raise KeyError(name)
+
+    monkeypatch.setattr(owners, "pwd", SimpleNamespace(getpwuid=getpwuid, getpwnam=getpwnam))
+    return calls
+
+
+def _owner_map(tmp_path, mapping):
+    path = str(tmp_path / "owners.json")
+    with open(path, "w") as f:
+        json.dump(mapping, f)
+    return path
+
+
+def test_user_source_is_whoever_runs_it():
+    assert OwnerResolver("user").owner_of(_stat(12345)) == default_owner()
+
+
+def test_uid_source_looks_up_each_uid_once(users):
+    resolver = OwnerResolver("uid")
+
+    assert [resolver.owner_of(_stat(uid)) for uid in (1000, 1001, 1000, 4242, 4242)] == \
+        ["alice", "bob", "alice", "4242", "4242"]
+
+    # Misses are cached too
+
+    assert users == [1000, 1001, 4242]
+
+
+def test_mapping_source_uid_then_gid_then_user_name(tmp_path, users, monkeypatch):
+    monkeypatch.setattr(owners, "grp", None)
+    owner_map = _owner_map(tmp_path, {"users": {"1000": "design", "bob": "finance"}, "groups": {"50": "media"}})
+    resolver = OwnerResolver("mapping", owner_map)
+
+    assert resolver.owner_of(_stat(1000, gid=50)) == "design"
+    assert resolver.owner_of(_stat(1001, gid=50)) == "finance"
+    assert resolver.owner_of(_stat(2000, gid=50)) == "media"
+    assert resolver.owner_of(_stat(2000, gid=60)) == "2000"
+
+
+def test_unknown_names_in_the_map_are_ignored(tmp_path, users):
+    owner_map = _owner_map(tmp_path, {"users": {"nobody-like-this": "ghosts", "1001": "finance"}})
+    resolver = OwnerResolver("mapping", owner_map)
+
+    assert resolver.users == {1001: "finance"}
+
+
+def test_bad_sources():
+    with pytest.raises(ValueError):
+        OwnerResolver("group")
+    with pytest.raises(ValueError):
+        OwnerResolver("mapping")
@@ -0,0 +1,94 @@
+import os
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from services.report_generator import open_report_sink, TeeReport
+
+
+def _record(number):
+    return {"file_name": f"file_{number}.txt", "destination": f"/out/file_{number}.txt"}
+
+
+def _jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_jsonl_is_written_a_batch_at_a_time(tmp_path):
+    sink = open_report_sink(str(tmp_path), "report", "jsonl", batch_size=3, flush_interval=3600)
+
+    sink.write(_record(0))
+    sink.write(_record(1))
+    assert _jsonl(sink.filename) == []
+
+    sink.write(_record(2))
+    sink.append(_record(3))
+    assert _jsonl(sink.filename) == [_record(number) for number in range(3)]
+
+    sink.flush()
+    assert len(_jsonl(sink.filename)) == 4
+
+    sink.write(_record(4))
+    sink.close()
+    assert _jsonl(sink.filename) == [_record(number) for number in range(5)]
+    assert sink.count == 5
+
+
+def test_flush_interval_writes_without_a_full_batch(tmp_path):
+    with open_report_sink(str(tmp_path), "report", "jsonl", batch_size=1000, flush_interval=0) as sink:
+        sink.write(_record(0))
+        assert _jsonl(sink.filename) == [_record(0)]
+
+
+def test_sqlite_batches_are_queryable(tmp_path):
+    with open_report_sink(str(tmp_path), "report", "sqlite", batch_size=2, flush_interval=3600) as sink:
+        for number in range(3):
+            sink.write(_record(number))
+
+        connection = sqlite3.connect(sink.filename)
+        assert connection.execute("SELECT COUNT(*) FROM report").fetchone() == (2,)
+        connection.close()
+
+        # Columns come from the first record, a missing one is NULL
+
+        sink.write({"file_name": "partial.txt"})
+
+    connection = sqlite3.connect(sink.filename)
+    rows = connection.execute("SELECT file_name, destination FROM report ORDER BY rowid").fetchall()
+    connection.close()
+
+    assert rows == [(f"file_{number}.txt", f"/out/file_{number}.txt") for number in range(3)] + \
+        [("partial.txt", None)]
+
+
+def test_csv_header_from_the_first_record(tmp_path):
+    with open_report_sink(str(tmp_path), "report", "csv", batch_size=2) as sink:
+        for number in range(3):
+            sink.write(_record(number))
+
+    with open(sink.filename, newline="") as f:
+        assert list(csv.DictReader(f)) == [_record(number) for number in range(3)]
+
+
+def test_nothing_written_means_no_file(tmp_path):
+    with open_report_sink(str(tmp_path), "report", "jsonl") as sink:
+        pass
+
+    assert not os.path.exists(sink.filename)
+
+
+def test_tee_report_and_unknown_formats(tmp_path):
+    collected = []
+    with open_report_sink(str(tmp_path), "report", "jsonl") as sink:
+        TeeReport(sink, collected).write(_record(0))
+
+    assert collected == [_record(0)]
+    assert _jsonl(sink.filename) == [_record(0)]
+
+    with pytest.raises(ValueError):
+        open_report_sink(str(tmp_path), "report", "xml")
@@ -0,0 +1,116 @@
+import os
+import json
+
+import pytest
+
+import services.rule_config as rule_config
+from services.models import FileItem
+from services.rule_config import load_rule_file, build_rules, validate_rules, rule_folders
+from services.rules_engine import RulesEngine, PatternRule, NameMatcher
+
+RULES = {"rules": [
+    {"name": "Invoices", "glob": "invoice_*.pdf", "destination": "Finance/Invoices"},
+    {"name": "Camera", "regex": "IMG_\\d+", "ignore_case": True, "destination": "Pictures/Camera"},
+    {"name": "Ebooks", "extensions": ["epub", ".MOBI"], "destination": "Books", "depth": "year"},
+]}
+
+
+def _rule_file(tmp_path, rules=RULES, name="rules.json"):
+    path = str(tmp_path / name)
+    with open(path, "w") as f:
+        json.dump(rules, f)
+    return path
+
+
+def _file(tmp_path, name):
+    path = str(tmp_path / "in" / name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(name)
+    return FileItem(path)
+
+
+def test_glob_regex_and_extension_rules(tmp_path):
+    _, entries = load_rule_file(_rule_file(tmp_path))
+
+    engine = RulesEngine(vectorized=False)
+    for rule in build_rules(entries, str(tmp_path)):
+        engine.add_rule(rule)
+
+    names = ["invoice_2024.pdf", "invoice_2024.PDF", "img_0042.jpg", "IMG_x.jpg", "novel.EPUB", "story.mobi",
+             "my_invoice_1.pdf"]
+    planned = {os.path.basename(move.source): move.rule for move in engine.plan([_file(tmp_path, name)
+                                                                                for name in names])}
+
+    assert planned == {"invoice_2024.pdf": "Invoices", "img_0042.jpg": "Camera", "novel.EPUB": "Ebooks",
+                       "story.mobi": "Ebooks"}
+    assert entries[2]["match"] == [".epub", ".mobi"]
+
+
+def test_toml_rule_file(tmp_path):
+    path = str(tmp_path / "rules.toml")
+    with open(path, "w") as f:
+        f.write('[[rules]]\nname = "Invoices"\nglob = "invoice_*"\ndestination = "Finance"\n')
+
+    _, entries = load_rule_file(path)
+    assert [(entry["name"], entry["kind"]) for entry in entries] == [("Invoices", "glob")]
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"name": "Groups", "regex": "(IMG)_\\d+", "destination": "x"}, "capturing groups"),
+    ({"name": "Broken", "regex": "IMG_(", "destination": "x"}, "bad regex"),
+    ({"name": "Both", "glob": "*", "regex": "x", "destination": "x"}, "exactly one"),
+    ({"name": "Nowhere", "glob": "*"}, "no destination"),
+    ({"name": "Deep", "glob": "*", "destination": "x", "depth": "hour"}, "depth"),
+])
+def test_bad_rules_are_rejected_by_name(entry, message):
+    with pytest.raises(ValueError, match=message):
+        validate_rules([entry])
+
+
+def test_rule_cache_follows_the_file_hash(tmp_path, monkeypatch):
+    path = _rule_file(tmp_path)
+    first_hash, entries = load_rule_file(path, str(tmp_path))
+
+    # Unchanged file: straight from the cache, nothing parsed or checked
+
+    def not_called(*args):
+        raise AssertionError("the rule file was parsed again")
+
+    monkeypatch.setattr(rule_config, "validate_rules", not_called)
+    assert load_rule_file(path, str(tmp_path)) == (first_hash, entries)
+
+    # Any change to the file gives a new hash, so the cache is not used
+
+    monkeypatch.undo()
+    changed = {"rules": RULES["rules"][:1]}
+    _rule_file(tmp_path, changed)
+
+    second_hash, second_entries = load_rule_file(path, str(tmp_path))
+    assert second_hash != first_hash
+    assert [entry["name"] for entry in second_entries] == ["Invoices"]
+
+
+def test_name_matcher_gives_the_first_pattern_in_rule_order(tmp_path):
+    rules = [
+        PatternRule("a", "", "x", glob="scan_*"),
+        PatternRule("b", "", "x", regex="(?:scan|img)_\\d+", ignore_case=True),
+        PatternRule("c", "", "x", regex=".*\\.pdf$"),
+        PatternRule("d", "", "x", glob="Scan_1.pdf"),
+    ]
+    matcher = NameMatcher([rule.name_pattern() for rule in rules])
+
+    assert matcher.first("scan_1.pdf") == 0
+    assert matcher.first("Scan_1.pdf") == 1
+    assert matcher.first("IMG_7.jpg") == 1
+    assert matcher.first("report.pdf") == 2
+    assert matcher.first("notes.txt") is None
+
+
+def test_rule_folders_stay_inside_the_base(tmp_path):
+    entries = validate_rules([
+        {"name": "a", "glob": "*", "destination": "Finance/Invoices"},
+        {"name": "b", "glob": "*", "destination": "../Elsewhere"},
+    ])
+
+    assert rule_folders(entries, str(tmp_path)) == [os.path.join(str(tmp_path), "Finance")]
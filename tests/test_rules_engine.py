@@ -0,0 +1,88 @@
+import os
+import random
+
+import pytest
+
+from services.models import FileItem
+from services.file_batch import vectorized_available
+from services.rules_engine import RulesEngine, ExtensionRule, SizeRule, AgeRule, PatternRule
+
+EXTENSIONS = [".txt", ".pdf", ".jpg", ".JPG", ".png", ".mp3", ".zip", ".csv", ""]
+STEMS = ["invoice_2024", "IMG_0042", "img_7", "report", "scan", "notes.backup", "data", "Invoice_x"]
+NOW = 1_700_000_000
+
+
+def _random_rule(rng, number, destination):
+    kind = rng.choice(["extension", "size", "age", "glob", "regex"])
+    name = f"{kind} {number}"
+    enabled = rng.random() > 0.15
+    extensions = rng.sample(EXTENSIONS[:-1], rng.randint(1, 3))
+
+    if kind == "extension":
+        return ExtensionRule(name, "", extensions, destination, enabled=enabled)
+    if kind == "size":
+        low = rng.choice([None, 0, 100, 5000])
+        return SizeRule(name, "", destination, min_size=low,
+                        max_size=rng.choice([None, (low or 0) + rng.randint(1, 20000)]),
+                        target_extensions=rng.choice([None, extensions]), enabled=enabled)
+    if kind == "age":
+        return AgeRule(name, "", destination, older_than_days=rng.choice([None, 1, 30, 400]),
+                       newer_than_days=rng.choice([None, 10, 1000]), now=NOW,
+                       target_extensions=rng.choice([None, extensions]), enabled=enabled)
+    if kind == "glob":
+        return PatternRule(name, "", destination, glob=rng.choice(["invoice_*", "IMG_*.jpg", "*.pdf", "scan*", "*"]),
+                           ignore_case=rng.random() > 0.5, enabled=enabled)
+    return PatternRule(name, "", destination, regex=rng.choice([r"IMG_\d+", r"(?:img|IMG)_", r"report$", r"\w+\.backup"]),
+                       ignore_case=rng.random() > 0.5, enabled=enabled)
+
+
+def _random_file(rng, number, folder):
+    name = f"{rng.choice(STEMS)}{rng.choice(EXTENSIONS)}"
+    mtime = NOW - rng.randint(0, 2000) * 86400
+    stat_result = os.stat_result((0o100644, number, 1, 1, 0, 0, rng.randint(0, 30000), mtime, mtime, mtime))
+    return FileItem(os.path.join(folder, str(number), name), owner="owner", stat_result=stat_result)
+
+
+def _linear_first(rules, file):
+    for rule in rules:
+        if rule.enabled and rule.applies_to(file):
+            return rule
+    return None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_index_matches_linear_scan(seed, tmp_path):
+    rng = random.Random(seed)
+    rules = [_random_rule(rng, number, str(tmp_path / "out")) for number in range(rng.randint(1, 40))]
+    files = [_random_file(rng, number, str(tmp_path / "in")) for number in range(300)]
+
+    expected = [_linear_first(rules, file) for file in files]
+
+    engine = RulesEngine(vectorized=False)
+    for rule in rules:
+        engine.add_rule(rule)
+
+    # Every matching rule, in order, not only the first one
+
+    for file in files:
+        assert list(engine.matching_rules(file)) == [rule for rule in rules if rule.enabled and rule.applies_to(file)]
+
+    planned = {move.source: move.rule for move in engine.plan(files)}
+    assert [planned.get(file.path) for file in files] == [rule.name if rule else None for rule in expected]
+
+
+@pytest.mark.skipif(not vectorized_available(), reason="NumPy is not installed")
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_plan_matches_linear_scan(seed, tmp_path):
+    rng = random.Random(seed)
+    rules = [_random_rule(rng, number, str(tmp_path / "out")) for number in range(rng.randint(1, 40))]
+    files = [_random_file(rng, number, str(tmp_path / "in")) for number in range(300)]
+
+    engine = RulesEngine(vectorized=True, min_vectorized=0)
+    for rule in rules:
+        engine.add_rule(rule)
+
+    planned = {move.source: move.rule for move in engine.plan(files)}
+    expected = [_linear_first(rules, file) for file in files]
+
+    assert [planned.get(file.path) for file in files] == [rule.name if rule else None for rule in expected]
@@ -0,0 +1,61 @@
+import os
+import time
+
+from services.scanner import scan_directory, walk_files
+from services.scan_filter import ScanFilter, SECONDS_PER_YEAR
+
+NOW = 1_700_000_000
+
+
+def _write(path, age_years=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x")
+    if age_years:
+        then = time.time() - age_years * SECONDS_PER_YEAR
+        os.utime(path, (then, then))
+
+
+def test_names_and_extensions():
+    scan_filter = ScanFilter(excluded_items=["desktop.ini"], excluded_ext=[".EXE", ".tmp"])
+
+    assert scan_filter.rejects_name("desktop.ini") == "name"
+    assert scan_filter.rejects_name("setup.exe") == "extension"
+    assert scan_filter.rejects_name("SETUP.EXE") == "extension"
+    assert scan_filter.rejects_name("download.tmp") == "extension"
+    assert scan_filter.rejects_name("Desktop.ini") is None
+    assert scan_filter.rejects_name("notes.txt") is None
+
+
+def test_age_cutoff():
+    scan_filter = ScanFilter(year_range=2, now=NOW)
+
+    assert scan_filter.too_old(NOW - 3 * SECONDS_PER_YEAR)
+    assert not scan_filter.too_old(NOW - 1 * SECONDS_PER_YEAR)
+    assert not ScanFilter(year_range=0, now=NOW).too_old(0)
+    assert not ScanFilter(now=NOW).too_old(0)
+
+
+def test_scanner_skips_and_counts(tmp_path):
+    _write(str(tmp_path / "keep.txt"))
+    _write(str(tmp_path / "desktop.ini"))
+    _write(str(tmp_path / "setup.exe"))
+    _write(str(tmp_path / "ancient.txt"), age_years=5)
+
+    scan_filter = ScanFilter(["desktop.ini"], [".exe"], year_range=2)
+    files = scan_directory(str(tmp_path), scan_filter=scan_filter)
+
+    assert [file.name for file in files] == ["keep.txt"]
+    assert scan_filter.skipped == {"name": 1, "extension": 1, "age": 1}
+
+
+def test_walk_applies_the_filter_at_every_depth(tmp_path):
+    _write(str(tmp_path / "a" / "keep.txt"))
+    _write(str(tmp_path / "a" / "b" / "setup.exe"))
+    _write(str(tmp_path / "a" / "b" / "ancient.txt"), age_years=5)
+
+    scan_filter = ScanFilter(excluded_ext=[".exe"], year_range=2)
+    files = list(walk_files(str(tmp_path), workers=2, scan_filter=scan_filter))
+
+    assert [file.name for file in files] == ["keep.txt"]
+    assert scan_filter.skipped == {"name": 0, "extension": 1, "age": 1}
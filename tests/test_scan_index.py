@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from services.scan_index import ScanIndex
+from services.file_organizer import FileOrganizer
+
+
+def _write(path, data="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def unchanged(monkeypatch):
+    """Folder -> what directory_unchanged() answered for it, last run wins."""
+
+    answers = {}
+    directory_unchanged = ScanIndex.directory_unchanged
+
+    def spy(self, directory, mtime):
+        answers[directory] = directory_unchanged(self, directory, mtime)
+        return answers[directory]
+
+    monkeypatch.setattr(ScanIndex, "directory_unchanged", spy)
+    return answers
+
+
+def test_second_run_skips_the_inbox_it_emptied(tmp_path, unchanged):
+    for number in range(10):
+        _write(str(tmp_path / f"file_{number}.txt"))
+    _write(str(tmp_path / "notes.unknownext"))
+
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+    assert unchanged == {str(tmp_path): False}
+
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+    assert unchanged == {str(tmp_path): True}
+
+
+def test_second_run_skips_an_unchanged_tree(tmp_path, unchanged):
+    for folder in ("a", "a/b", "c"):
+        for number in range(3):
+            _write(str(tmp_path / folder / f"file_{number}.txt"))
+
+    FileOrganizer(str(tmp_path), incremental=True, recursive=True).organize_files()
+    scanned = set(unchanged)
+    assert {str(tmp_path), str(tmp_path / "a"), str(tmp_path / "a" / "b"), str(tmp_path / "c")} <= scanned
+
+    unchanged.clear()
+    FileOrganizer(str(tmp_path), incremental=True, recursive=True).organize_files()
+
+    assert set(unchanged) == scanned
+    assert all(unchanged.values())
+
+
+def test_a_file_added_after_the_run_is_picked_up(tmp_path, unchanged):
+    for number in range(3):
+        _write(str(tmp_path / f"file_{number}.txt"))
+
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+    _write(str(tmp_path / "late.txt"))
+
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+
+    assert unchanged == {str(tmp_path): False}
+    assert not os.path.exists(tmp_path / "late.txt")
+
+
+def test_a_change_during_the_run_keeps_the_folder_changed(tmp_path, unchanged, monkeypatch):
+    for number in range(3):
+        _write(str(tmp_path / f"file_{number}.txt"))
+
+    # Lands while the run is moving files: the folder must be read again next time
+
+    save = ScanIndex.save
+
+    def save_after_a_new_file(self):
+        _write(str(tmp_path / "during.txt"))
+        save(self)
+
+    monkeypatch.setattr(ScanIndex, "save", save_after_a_new_file)
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+
+    monkeypatch.setattr(ScanIndex, "save", save)
+    FileOrganizer(str(tmp_path), incremental=True).organize_files()
+
+    assert unchanged == {str(tmp_path): False}
+    assert not os.path.exists(tmp_path / "during.txt")
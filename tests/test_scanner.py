@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from services.scanner import scan_directory, iter_directory, walk_files
+
+
+class _Vanishing:
+    """os.scandir() where 'vanishing.txt' is deleted right after readdir returned it."""
+
+    def __init__(self, scandir):
+        self.scandir = scandir
+
+    def __call__(self, path):
+        entries = self.scandir(path)
+
+        class Entries:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                entries.close()
+                return False
+
+            def __iter__(self):
+                for entry in entries:
+                    if entry.name == "vanishing.txt":
+                        os.unlink(entry.path)
+                    yield entry
+
+        return Entries()
+
+
+def _write(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x")
+
+
+@pytest.fixture
+def vanishing(monkeypatch):
+    monkeypatch.setattr(os, "scandir", _Vanishing(os.scandir))
+
+
+@pytest.mark.parametrize("scan", [scan_directory, lambda directory: list(iter_directory(directory))])
+def test_flat_scan_skips_a_file_that_vanished(tmp_path, vanishing, scan):
+    for name in ("a.txt", "vanishing.txt", "z.txt"):
+        _write(str(tmp_path / name))
+
+    assert sorted(file.name for file in scan(str(tmp_path))) == ["a.txt", "z.txt"]
+
+
+def test_walk_keeps_the_rest_of_the_folder(tmp_path, vanishing):
+    for name in ("a.txt", "vanishing.txt", "z.txt"):
+        _write(str(tmp_path / "sub" / name))
+    _write(str(tmp_path / "top.txt"))
+
+    files = walk_files(str(tmp_path), workers=2)
+
+    assert sorted(file.name for file in files) == ["a.txt", "top.txt", "z.txt"]
@@ -0,0 +1,50 @@
+import os
+import json
+
+from services.shards import split_root, run_shards
+
+
+def _write(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(os.path.basename(path))
+
+
+def test_split_root_leaves_out_our_folders(tmp_path):
+    for name in ("alice", "bob", "Documents", "logs", "Duplicates"):
+        os.makedirs(tmp_path / name)
+    _write(str(tmp_path / "loose.txt"))
+
+    assert split_root(str(tmp_path)) == [str(tmp_path / "alice"), str(tmp_path / "bob")]
+
+
+def test_merged_report_and_an_isolated_failure(tmp_path):
+    home = tmp_path / "home"
+    for user in ("alice", "bob"):
+        for number in range(3):
+            _write(str(home / user / f"{user}_{number}.txt"))
+
+    roots = split_root(str(home)) + [str(home / "missing")]
+    output = str(tmp_path / "out")
+
+    results = run_shards(roots, output, workers=2, report_format="jsonl")
+
+    assert [(result["root"], result["ok"]) for result in results] == \
+        [(roots[0], True), (roots[1], True), (roots[2], False)]
+    assert "not a valid directory" in results[2]["error"]
+
+    # The good shards were organized in place all the same
+
+    for user in ("alice", "bob"):
+        assert not any(name.endswith(".txt") for name in os.listdir(home / user))
+
+    with open(os.path.join(output, "batch_report.jsonl")) as f:
+        records = [json.loads(line) for line in f]
+
+    assert sorted((record["root"], record["file_name"]) for record in records) == \
+        sorted((str(home / user), f"{user}_{number}.txt") for user in ("alice", "bob") for number in range(3))
+
+    with open(os.path.join(output, "batch_metrics.json")) as f:
+        metrics = json.load(f)
+    assert metrics["counters"]["shards_ok"] == 2
+    assert metrics["counters"]["shards_failed"] == 1
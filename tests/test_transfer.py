@@ -0,0 +1,92 @@
+import os
+import errno
+
+import pytest
+
+import services.transfer as transfer
+from services.transfer import TransferError, transfer_file
+
+DATA = os.urandom(300_000)
+
+
+def _source(tmp_path):
+    path = str(tmp_path / "source.bin")
+    with open(path, "wb") as f:
+        f.write(DATA)
+    os.makedirs(tmp_path / "out")
+    return path, str(tmp_path / "out" / "source.bin")
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _no_kernel_copy(monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.ENOSYS, "Function not implemented")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+
+
+def test_kernel_copy_moves_the_file(tmp_path):
+    source, destination = _source(tmp_path)
+
+    assert transfer_file(source, destination) is None
+
+    assert _read(destination) == DATA
+    assert not os.path.exists(source)
+    assert os.listdir(tmp_path / "out") == ["source.bin"]
+
+
+@pytest.mark.parametrize("verify", [False, True])
+def test_readinto_fallback_moves_the_file(tmp_path, monkeypatch, verify):
+    _no_kernel_copy(monkeypatch)
+
+    streamed = []
+    stream_copy = transfer._stream_copy
+
+    def counted(*args):
+        streamed.append(args)
+        return stream_copy(*args)
+
+    monkeypatch.setattr(transfer, "_stream_copy", counted)
+    source, destination = _source(tmp_path)
+
+    checksum = transfer_file(source, destination, verify=verify, chunk_size=4096)
+
+    assert len(streamed) == 1
+    assert _read(destination) == DATA
+    assert not os.path.exists(source)
+    assert (checksum is not None) == verify
+
+
+def test_checksum_mismatch_keeps_the_source(tmp_path, monkeypatch):
+    stream_copy = transfer._stream_copy
+
+    def corrupting(source_fd, destination_fd, *args):
+        copied = stream_copy(source_fd, destination_fd, *args)
+        os.pwrite(destination_fd, b"\0" if DATA[1000:1001] != b"\0" else b"\1", 1000)
+        return copied
+
+    monkeypatch.setattr(transfer, "_stream_copy", corrupting)
+    source, destination = _source(tmp_path)
+
+    with pytest.raises(TransferError, match="Checksum mismatch"):
+        transfer_file(source, destination, verify=True)
+
+    assert _read(source) == DATA
+    assert os.listdir(tmp_path / "out") == []
+
+
+def test_short_copy_keeps_the_source(tmp_path, monkeypatch):
+    kernel_copy = transfer._kernel_copy
+    monkeypatch.setattr(transfer, "_kernel_copy", lambda *args: kernel_copy(*args) - 1)
+    source, destination = _source(tmp_path)
+
+    with pytest.raises(TransferError, match="Copied"):
+        transfer_file(source, destination)
+
+    assert _read(source) == DATA
+    assert os.listdir(tmp_path / "out") == []
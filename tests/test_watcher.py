@@ -0,0 +1,44 @@
+import os
+import glob
+import time
+import threading
+
+from services.file_organizer import FileOrganizer
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return condition()
+
+
+def test_watch_organizes_files_as_they_land(tmp_path):
+    with open(tmp_path / "already_there.txt", "w") as f:
+        f.write("before the watch")
+
+    stop_event = threading.Event()
+    organizer = FileOrganizer(str(tmp_path))
+    watch = threading.Thread(target=organizer.watch,
+                             kwargs={"interval_ms": 50, "debounce_ms": 100, "stop_event": stop_event,
+                                     "use_inotify": False})
+    watch.start()
+
+    try:
+        assert _wait_for(lambda: not os.path.exists(tmp_path / "already_there.txt"))
+
+        for name in ("notes.txt", "photo.jpg"):
+            with open(tmp_path / name, "w") as f:
+                f.write(name)
+
+        assert _wait_for(lambda: glob.glob(str(tmp_path / "*.*")) == [])
+    finally:
+        stop_event.set()
+        watch.join(timeout=10)
+
+    assert not watch.is_alive()
+
+    organized = {os.path.basename(path) for path in glob.glob(str(tmp_path / "*" / "**" / "*.*"), recursive=True)}
+    assert {"already_there.txt", "notes.txt", "photo.jpg"} <= organized
@@ -1,5 +1,7 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, ttk
 
 from services.file_organizer import FileOrganizer
 from services.filepath_utils import FilePathUtils
@@ -21,7 +23,7 @@ class OrganizerGUI:
     # Set the window dimensions: Center
     
         self.window_width = 500
-        self.window_height = 150
+        self.window_height = 210
     
     # Get Screen dimensions
     
@@ -44,10 +46,21 @@ class OrganizerGUI:
     
         self.path_utils = FilePathUtils(max_length=34)
         
+    # The run happens on a worker thread, which only posts events to this queue.
+    # The Tk thread drains it every POLL_MS, so the UI never waits on the organizer.
+    
+        self.events = queue.Queue()
+        self.cancel_event = None
+        self.worker = None
+        
     # Build the GUI
     
         self.create_app()
         
+    # Closing the window mid-run cancels it first, so no file is left half moved
+    
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        
     def create_app(self):
 
     # Create a main frame for better structure
@@ -93,6 +106,32 @@ class OrganizerGUI:
             font=self.retro_font
             )
         self.run_button.grid(row=1, column=3, padx=5,pady=5)
+        
+        self.cancel_button = tk.Button(
+            self.file_frame,
+            text="Cancel",
+            command=self.cancel_organizer_command,
+            bg=self.button_bg,
+            relief=tk.RAISED,
+            bd=self.button_bd,
+            font=self.retro_font,
+            state=tk.DISABLED
+            )
+        self.cancel_button.grid(row=1, column=4, padx=5, pady=5)
+        
+    # Progress of the current run
+    
+        self.progress_bar = ttk.Progressbar(self.file_frame, orient="horizontal", length=420, mode="determinate")
+        self.progress_bar.grid(row=2, column=0, columnspan=5, padx=5, pady=5, sticky="w")
+        
+        self.status_label = tk.Label(
+            self.file_frame,
+            text="",
+            anchor="w",
+            fg="black",
+            font=self.retro_font
+            )
+        self.status_label.grid(row=3, column=0, columnspan=5, padx=5, sticky="w")
 
     # Function to open a directory chooser dialog
     
@@ -119,21 +158,121 @@ class OrganizerGUI:
     button_relief = tk.RAISED
     button_bd = 2
     
+    # How often the Tk thread looks for events from the worker (ms)
+    
+    POLL_MS = 100
+    
     
     # Function to run the organizer with the selected directory
     
     def run_organizer_command(self):
+        if self.worker is not None:
+            return
+        
         if self.selected_directory:
-            try:
-                organizer = FileOrganizer(self.selected_directory)
-                organizer.organize_files()
-                self.directory_label.config(text=f"Organizer complete for:\n {self.selected_directory}")
-            except Exception as e:
-                self.directory_label.config(text=f"Error:\n {e}")
+            self.cancel_event = threading.Event()
+            self.worker = threading.Thread(
+                target=self._organize_worker,
+                args=(self.selected_directory, self.cancel_event),
+                name="organizer",
+                daemon=True
+                )
+            
+            self.run_button.config(state=tk.DISABLED)
+            self.browse_button.config(state=tk.DISABLED)
+            self.cancel_button.config(state=tk.NORMAL)
+            self.progress_bar.config(value=0)
+            self.status_label.config(text="Starting...")
+            
+            self.worker.start()
+            self.root.after(self.POLL_MS, self._poll_events)
         else:
             self.directory_label.config(text=f"Please select a directory first!")
+            
+    # Runs on the worker thread: no Tk calls in here, only events
+    
+    def _organize_worker(self, directory, cancel_event):
+        try:
+            organizer = FileOrganizer(directory)
+            organizer.organize_files(
+                on_progress=lambda event: self.events.put(("progress", event)),
+                cancel_event=cancel_event
+                )
+            self.events.put(("cancelled" if cancel_event.is_set() else "done", directory))
+        except Exception as e:
+            self.events.put(("error", e))
+            
+    # Stop between two files, what wasn't moved yet stays where it is
+    
+    def cancel_organizer_command(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Cancelling...")
+            
+    def _poll_events(self):
+        progress = None
+        finished = None
+        
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            
+        # Only the newest progress event is drawn, older ones are already out of date
+        
+            if kind == "progress":
+                progress = payload
+            else:
+                finished = (kind, payload)
+                
+        if progress is not None:
+            self._show_progress(progress)
+            
+        if finished is None:
+            self.root.after(self.POLL_MS, self._poll_events)
+        else:
+            self._finish(*finished)
+            
+    def _show_progress(self, event):
+        if event["total_files"]:
+            self.progress_bar.config(mode="determinate", maximum=event["total_files"], value=event["files"])
+            megabytes = event["bytes"] / (1024 * 1024)
+            total_megabytes = event["total_bytes"] / (1024 * 1024)
+            self.status_label.config(
+                text=f"{event['phase']}: {event['files']}/{event['total_files']} files, "
+                     f"{megabytes:.1f}/{total_megabytes:.1f} MB"
+                )
+        else:
+            self.progress_bar.config(value=0)
+            self.status_label.config(text=f"{event['phase']}...")
+            
+    def _finish(self, kind, payload):
+        self.worker.join()
+        self.worker = None
+        self.cancel_event = None
+        
+        self.run_button.config(state=tk.NORMAL)
+        self.browse_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        
+        if kind == "done":
+            self.status_label.config(text="Done")
+            self.directory_label.config(text=f"Organizer complete for:\n {payload}")
+        elif kind == "cancelled":
+            self.status_label.config(text="Cancelled, files not moved yet were left in place")
+        else:
+            self.status_label.config(text="")
+            self.directory_label.config(text=f"Error:\n {payload}")
 
     
+    def close(self):
+        if self.worker is not None:
+            self.cancel_event.set()
+            self.worker.join()
+        self.root.destroy()
+    
     # Start the event loop
     def run(self):
         self.root.mainloop()